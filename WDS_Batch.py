@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+
+####################################
+# File name: WDS_Batch.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import traceback
+import multiprocessing
+import WDS_Extraction_Tool as wdsExtractor
+import WDS_Export
+
+# Runs many queries of the WDS catalog without the GUI, e.g. every night
+# of a semester for each instrument, on all of the computer's cores:
+#
+#     python WDS_Batch.py semester.json --output-dir semester
+#
+# The query file is JSON. Each query has the same inputs as the GUI:
+#  - date: the date of the night, yyyy-mm-dd
+#  - startTime, stopTime: local mean solar time (or the clock time of the
+#    preferences' utcOffset, if they have one), hh:mm or hh:mm:ss.s
+#  - separation, magnitude, deltaMag: [upper, lower] bounds
+#  - preferences: the telescope preferences file (or the preferences
+#    themselves), WDS_Preferences.json by default
+# and optionally:
+#  - name: the name of the query, for the output file
+#  - airmass, visibility: whether to add the airmass and whole-night
+#    visibility columns (both true by default)
+#  - format: one of WDS_Export.exportFormats (csv by default)
+#  - columns: the columns to save (all of them by default)
+#  - output: the output file, which can use any of the query's values,
+#    e.g. "{name}_{date}.csv" (by default the name and the format's
+#    extension)
+# The file is either a list of queries, or a dictionary with any of
+#  - "defaults": values used by every query which doesn't set them
+#  - "queries": the list of queries
+#  - "grid": lists of values, every combination of which is run for each
+#    query. A date can also be a range of dates, e.g.
+#    {"from": "2017-02-01", "to": "2017-07-31", "every": 1} (in days)
+# e.g.
+#     {"defaults": {"output": "{name}_{date}.csv"},
+#      "queries": [{"name": "bright", "magnitude": [7.0, -10.0]},
+#                  {"name": "faint", "magnitude": [10.0, 7.0]}],
+#      "grid": {"date": {"from": "2017-02-01", "to": "2017-07-31"}}}
+
+# The inputs of a query which aren't given, the same as the GUI's
+defaultQuery = {'startTime': '18:00', 'stopTime': '24:00',
+                'separation': [2.0, 0.5], 'magnitude': [7.0, -10.0], 'deltaMag': [2.0, -2.0],
+                'preferences': 'WDS_Preferences.json',
+                'airmass': True, 'visibility': True,
+                'format': 'csv', 'columns': None}
+
+# The catalog loaded by the main process (see prepareCatalog). Worker
+# processes which are forked from it share it (read only) rather than
+# loading their own.
+sharedCatalog = None
+# The catalog each worker process queries (see initWorker)
+workerCatalog = None
+# Preferences files loaded by this process, by filename
+loadedPreferences = {}
+
+
+def expandQueries(spec):
+    '''
+        Turns the contents of a query file (see the top of this file) into
+        a list of queries, with every input filled in.
+    '''
+    if isinstance(spec, list):
+        spec = {'queries': spec}
+
+    defaults = dict(defaultQuery)
+    defaults.update(spec.get('defaults', {}))
+
+    # Every combination of the grid values, as a list of dictionaries
+    grid = dict(spec.get('grid', {}))
+    for key in grid:
+        if isinstance(grid[key], dict):
+            grid[key] = wdsExtractor.dateRange(grid[key]['from'], grid[key]['to'], grid[key].get('every', 1))
+    keys = sorted(grid)
+    combinations = [dict(zip(keys, values)) for values in itertools.product(*[grid[key] for key in keys])]
+
+    queries = []
+    for index, query in enumerate(spec.get('queries', [{}])):
+        for number, combination in enumerate(combinations):
+            expanded = dict(defaults)
+            expanded.update(query)
+            expanded.update(combination)
+            expanded.setdefault('name', 'query%03d' % index)
+            if 'output' not in expanded:
+                expanded['output'] = expanded['name']
+                if len(combinations) > 1:
+                    expanded['output'] += '_%03d' % number
+                expanded['output'] += WDS_Export.exportFormats[expanded['format']]
+            expanded['output'] = expanded['output'].format(**expanded)
+            if 'date' not in expanded:
+                raise ValueError("Query " + expanded['name'] + " has no date")
+            queries.append(expanded)
+    return queries
+
+def getPreferences(preferences):
+    '''
+        Gets the preferences of a query: loads them from the file if they
+        are a filename (only once per process), or uses them as they are.
+    '''
+    if isinstance(preferences, dict):
+        return preferences
+    if preferences not in loadedPreferences:
+        loadedPreferences[preferences] = wdsExtractor.loadPreferences(preferences)
+    return loadedPreferences[preferences]
+
+def prepareCatalog(catalogFilename, queries):
+    '''
+        Loads the catalog, and makes every index the queries will use, in
+        this process. Workers forked after this share all of it.
+    '''
+    global sharedCatalog
+    catalog = wdsExtractor.Catalog(catalogFilename)
+    catalog.load()
+    catalog.getRangeIndexes()
+    catalog.getZoneIndex()
+    for query in queries:
+        catalog.getVisibilityIndex(getPreferences(query['preferences']))
+    sharedCatalog = catalog
+    return catalog
+
+def initWorker(catalogFilename, quiet=False):
+    '''
+        Sets up a worker process: uses the catalog of the main process if
+        it was forked from it, otherwise loads the catalog (once, for all
+        of the queries the worker runs).
+    '''
+    global workerCatalog
+    if sharedCatalog is not None and sharedCatalog.filename == catalogFilename:
+        workerCatalog = sharedCatalog
+    else:
+        workerCatalog = wdsExtractor.Catalog(catalogFilename)
+        workerCatalog.load()
+    if quiet:
+        sys.stdout = open(os.devnull, 'w')
+
+def runQuery(query):
+    '''
+        Runs one query (see expandQueries) in a session of the worker's
+        catalog, and saves the results (see WDS_Export).
+        Returns a summary: the name, the number of results, the output
+        file, how long it took and the error (None if it worked).
+    '''
+    start = time.time()
+    summary = {'name': query['name'], 'output': query['output'], 'results': 0, 'error': None}
+    try:
+        preferences = getPreferences(query['preferences'])
+        session = wdsExtractor.CatalogSession(workerCatalog, preferences)
+
+        inputs = wdsExtractor.nightInputs(query['date'], query['startTime'], query['stopTime'], preferences)
+        inputs['separation'] = tuple(query['separation'])
+        inputs['magnitude'] = tuple(query['magnitude'])
+        inputs['deltaMag'] = tuple(query['deltaMag'])
+        session.setInputs(inputs)
+
+        # No terminal progress bars from the workers
+        def progress(stage, done, total):
+            pass
+        session.constrain(airmass=query['airmass'], visibility=query['visibility'], progress=progress)
+        session.export(query['output'], query['format'], query['columns'])
+        summary['results'] = len(session.interestingHere)
+    except Exception:
+        summary['error'] = traceback.format_exc()
+    summary['seconds'] = time.time() - start
+    return summary
+
+def runQueries(queries, catalogFilename=wdsExtractor.catalogFilename, processes=None, quiet=False):
+    '''
+        Runs the queries on a pool of processes (one per core by default),
+        and yields their summaries (see runQuery) in order as they finish.
+    '''
+    prepareCatalog(catalogFilename, queries)
+    if processes == 1:
+        # This process is the worker, so it is only quiet while it runs
+        # the queries, not while the summaries are printed
+        stdout = sys.stdout
+        initWorker(catalogFilename, quiet)
+        workerStdout = sys.stdout
+        sys.stdout = stdout
+        try:
+            for query in queries:
+                sys.stdout = workerStdout
+                try:
+                    summary = runQuery(query)
+                finally:
+                    sys.stdout = stdout
+                yield summary
+        finally:
+            if workerStdout is not stdout:
+                workerStdout.close()
+        return
+
+    pool = multiprocessing.Pool(processes, initWorker, (catalogFilename, quiet))
+    try:
+        for summary in pool.imap(runQuery, queries):
+            yield summary
+    finally:
+        pool.close()
+        pool.join()
+
+def main(argv=None):
+    '''
+        Runs the queries in a query file, and prints how each one went.
+        Exits with an error if any of them failed.
+    '''
+    parser = argparse.ArgumentParser(description="Runs many queries of the WDS catalog at once, without the GUI.")
+    parser.add_argument('queryFile', help="JSON file of queries (see the top of WDS_Batch.py)")
+    parser.add_argument('--catalog', default=wdsExtractor.catalogFilename,
+                        help="WDS catalog file (default %(default)s)")
+    parser.add_argument('--processes', type=int, default=None,
+                        help="number of processes to run the queries on (default one per core)")
+    parser.add_argument('--output-dir', default='.',
+                        help="folder to save the results in (default the current folder)")
+    parser.add_argument('--quiet', action='store_true',
+                        help="don't print what each query is doing, only the summary")
+    args = parser.parse_args(argv)
+
+    with open(args.queryFile, 'r') as fp:
+        queries = expandQueries(json.load(fp))
+    if not os.path.isdir(args.output_dir):
+        os.makedirs(args.output_dir)
+    for query in queries:
+        query['output'] = os.path.join(args.output_dir, query['output'])
+
+    start = time.time()
+    failed = 0
+    for summary in runQueries(queries, args.catalog, args.processes, args.quiet):
+        if summary['error'] is None:
+            print('%-30s %6d results %7.2f s  %s' % (summary['name'], summary['results'],
+                                                   summary['seconds'], summary['output']))
+        else:
+            failed += 1
+            print('%-30s failed:\n%s' % (summary['name'], summary['error']))
+    print(str(len(queries)) + " queries in " + str(round(time.time() - start, 1)) + " s, "
+          + str(failed) + " failed")
+    if failed:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
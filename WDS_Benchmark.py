@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+
+####################################
+# File name: WDS_Benchmark.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import datetime
+import platform
+import threading
+import subprocess
+import multiprocessing
+import numpy as np
+import WDS_Extraction_Tool as wdsExtractor
+import WDS_Synthetic
+import WDS_Cache
+try:
+    import resource
+    resourceInstalled = True
+except ImportError:
+    # (not on Windows)
+    resourceInstalled = False
+
+# Times each stage of the tool on fake catalogs (see WDS_Synthetic) of
+# different sizes, and saves the results as JSON so runs of different
+# versions of the code can be compared:
+#
+#     python WDS_Benchmark.py --sizes 10000 100000 1000000 --output new.json
+#     python WDS_Benchmark.py --sizes 10000 100000 1000000 --compare old.json
+#
+# For each stage it records the wall time and the peak memory (resident
+# set size) of the process while it ran. Each catalog size is run in a
+# fresh process, so the sizes don't affect each other.
+
+# The stages, in the order they are run (see benchmarkCatalog)
+stageNames = ['parse', 'formatWds', 'cacheSave', 'loadCached', 'constrain', 'constrainWarm',
+              'addAirmassCol', 'tableToString', 'sortInterestingHere']
+# The night the queries are for, as in the GUI
+benchmarkNight = {'date': '2017-03-05', 'startTime': '18:00', 'stopTime': '24:00'}
+# How much slower (new / old) a stage may get before --compare calls it a
+# regression, and how many seconds it must have slowed by too (so tiny
+# stages don't fail on noise)
+defaultThreshold = 1.25
+defaultMinSlowdown = 0.05
+# How often the memory is checked while a stage runs, in seconds
+memoryInterval = 0.005
+
+
+def currentMemory():
+    '''
+        Gets the memory (resident set size) this process is using now, in
+        bytes, or None if this system doesn't say (only Linux does).
+    '''
+    try:
+        with open('/proc/self/statm', 'r') as fp:
+            return int(fp.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, AttributeError):
+        return None
+
+def maxMemory():
+    '''
+        Gets the most memory (resident set size) this process has used so
+        far, in bytes, or None if it can't be found.
+    '''
+    if not resourceInstalled:
+        return None
+    maxRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Macs give it in bytes, Linux in kilobytes
+    if sys.platform == 'darwin':
+        return maxRss
+    return maxRss * 1024
+
+def timeStage(stages, name, function, *args, **kwargs):
+    '''
+        Runs function(*args, **kwargs) and records how long it took and
+        the peak memory while it ran in stages[name], as 'seconds' and
+        'peakMB'. Returns what the function returns.
+        The memory is watched from another thread where the system says
+        what it is using now; otherwise the peak is the most the process
+        has used so far.
+    '''
+    peak = [currentMemory()]
+    done = threading.Event()
+
+    def watch():
+        while not done.wait(memoryInterval):
+            memory = currentMemory()
+            if memory is not None and memory > peak[0]:
+                peak[0] = memory
+
+    watcher = None
+    if peak[0] is not None:
+        watcher = threading.Thread(target=watch)
+        watcher.daemon = True
+        watcher.start()
+
+    start = time.time()
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        seconds = time.time() - start
+        done.set()
+        if watcher is not None:
+            watcher.join()
+            memory = currentMemory()
+            peak[0] = max(peak[0], memory)
+        else:
+            peak[0] = maxMemory()
+
+    stages[name] = {'seconds': seconds, 'peakMB': None if peak[0] is None else peak[0] / 1e6}
+    return result
+
+def benchmarkCatalog(filename, preferences):
+    '''
+        Runs every stage of the tool on the catalog file filename, from
+        parsing it to sorting the results, and times each of them (see
+        timeStage and stageNames). The cache of the catalog is deleted
+        first, so loading it starts from nothing.
+        Returns a dictionary with the 'stages', and the number of
+        'results' of the query (interesting and interestingHere).
+    '''
+    stages = {}
+    cacheDir = WDS_Cache.cacheDirFor(filename)
+    if os.path.isdir(cacheDir):
+        shutil.rmtree(cacheDir)
+
+    # Loading, split up into its parts
+    table = timeStage(stages, 'parse', wdsExtractor.parseWds, filename)
+    table = timeStage(stages, 'formatWds', wdsExtractor.formatWds, table)
+    table = wdsExtractor.renameWds(table)
+    timeStage(stages, 'cacheSave', WDS_Cache.loadCachedTable, filename, lambda name: table)
+    table = timeStage(stages, 'loadCached', wdsExtractor.loadWds, filename)
+
+    # A query like the GUI's default one, the first time (making the
+    # indexes) and again with different star constraints
+    session = wdsExtractor.CatalogSession(wdsExtractor.Catalog(filename, table), preferences)
+    inputs = wdsExtractor.nightInputs(benchmarkNight['date'], benchmarkNight['startTime'],
+                                      benchmarkNight['stopTime'], preferences)
+    inputs.update({'separation': (2.0, 0.5), 'magnitude': (7.0, -10.0), 'deltaMag': (2.0, -2.0)})
+    session.setInputs(inputs)
+    timeStage(stages, 'constrain', session.constrain)
+    session.setStarConstraints((3.0, 0.3), (8.0, -10.0), (3.0, -3.0))
+    timeStage(stages, 'constrainWarm', session.constrain)
+
+    # No progress bar
+    def progress(stage, done, total):
+        pass
+    timeStage(stages, 'addAirmassCol', session.addAirmassCol, progress)
+    timeStage(stages, 'tableToString', session.getSmallerWdsInterestingHereString)
+    # Just the sort: sortWdsInterestingHere also prints the whole table
+    timeStage(stages, 'sortInterestingHere', session.interestingHere.sort, wdsExtractor.raCoors)
+
+    return {'stages': stages,
+            'results': {'interesting': len(session.interesting), 'interestingHere': len(session.interestingHere)}}
+
+def benchmarkWorker(filename, preferences):
+    '''
+        Runs benchmarkCatalog in a worker process, with everything the
+        tool prints (e.g. whole tables) thrown away.
+    '''
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        return benchmarkCatalog(filename, preferences)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+def syntheticCatalog(workDir, rows, seed=0):
+    '''
+        Gets the filename of a fake catalog of rows rows in workDir, and
+        makes it (see WDS_Synthetic) if it isn't there yet. Returns the
+        filename and how many seconds making it took (0 if it was there).
+    '''
+    if not os.path.isdir(workDir):
+        os.makedirs(workDir)
+    filename = os.path.join(workDir, 'synthetic_%d_%d.txt' % (rows, seed))
+    if os.path.exists(filename):
+        return filename, 0.0
+    start = time.time()
+    # Write it under another name first, so an interrupted one isn't used
+    WDS_Synthetic.writeSyntheticCatalog(filename + '.part', rows, seed)
+    os.rename(filename + '.part', filename)
+    return filename, time.time() - start
+
+def runBenchmarks(sizes, workDir='WDS_Benchmark', preferences=None, seed=0, repeat=1, log=print):
+    '''
+        Benchmarks each of the catalog sizes (numbers of rows), each one
+        repeat times in a fresh process, keeping the fastest time and the
+        highest peak memory of each stage.
+        Returns the results as a dictionary (see main), ready to be saved
+        as JSON.
+    '''
+    import astropy
+    if preferences is None:
+        preferences = wdsExtractor.loadPreferences(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                'WDS_Preferences.json'))
+    report = {'date': datetime.datetime.now().isoformat(), 'revision': gitRevision(),
+              'python': platform.python_version(), 'numpy': np.__version__, 'astropy': astropy.__version__,
+              'platform': platform.platform(), 'seed': seed, 'repeat': repeat, 'runs': []}
+
+    for rows in sizes:
+        filename, generateSeconds = syntheticCatalog(workDir, rows, seed)
+        log("%d rows:" % rows)
+        run = {'rows': rows, 'generateSeconds': generateSeconds, 'stages': {}}
+        for attempt in range(repeat):
+            pool = multiprocessing.Pool(1)
+            try:
+                result = pool.apply(benchmarkWorker, (filename, preferences))
+            finally:
+                pool.close()
+                pool.join()
+            run['results'] = result['results']
+            for name in result['stages']:
+                stage = result['stages'][name]
+                if name in run['stages']:
+                    best = run['stages'][name]
+                    best['seconds'] = min(best['seconds'], stage['seconds'])
+                    if stage['peakMB'] is not None:
+                        best['peakMB'] = max(best['peakMB'], stage['peakMB'])
+                else:
+                    run['stages'][name] = dict(stage)
+        for name in stageNames:
+            stage = run['stages'][name]
+            peak = '' if stage['peakMB'] is None else '%10.1f MB' % stage['peakMB']
+            log("  %-24s %9.3f s %s" % (name, stage['seconds'], peak))
+        report['runs'].append(run)
+    return report
+
+def gitRevision():
+    '''
+        Gets the git commit the code is at (with -dirty if it has been
+        changed since), or None if it isn't in a git repository.
+    '''
+    try:
+        with open(os.devnull, 'w') as devnull:
+            return subprocess.check_output(['git', 'describe', '--always', '--dirty'], stderr=devnull,
+                                           cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compareReports(old, new, threshold=defaultThreshold, minSlowdown=defaultMinSlowdown, log=print):
+    '''
+        Compares two benchmark reports (see runBenchmarks), stage by stage
+        for each catalog size in both. A stage is a regression if it got
+        more than threshold times slower, and by more than minSlowdown
+        seconds. Prints the comparison, and returns the number of
+        regressions.
+    '''
+    oldRuns = dict((run['rows'], run) for run in old['runs'])
+    regressions = 0
+    log("Compared with %s (%s)" % (old.get('revision'), old.get('date')))
+    for run in new['runs']:
+        if run['rows'] not in oldRuns:
+            continue
+        oldStages = oldRuns[run['rows']]['stages']
+        log("%d rows:" % run['rows'])
+        for name in stageNames:
+            if name not in run['stages'] or name not in oldStages:
+                continue
+            oldSeconds = oldStages[name]['seconds']
+            newSeconds = run['stages'][name]['seconds']
+            ratio = newSeconds / oldSeconds if oldSeconds > 0 else float('inf')
+            flag = ''
+            if ratio > threshold and newSeconds - oldSeconds > minSlowdown:
+                flag = '  REGRESSION'
+                regressions += 1
+            log("  %-24s %9.3f s -> %9.3f s  x%.2f%s" % (name, oldSeconds, newSeconds, ratio, flag))
+    return regressions
+
+def main(argv=None):
+    '''
+        Runs the benchmarks, saves them, and compares them with an older
+        run if asked to. Exits with an error if anything got slower.
+    '''
+    parser = argparse.ArgumentParser(description="Benchmarks the WDS tool on fake catalogs.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000],
+                        help="numbers of catalog rows to run (default 10000 100000; up to 10000000)")
+    parser.add_argument('--output', default=None,
+                        help="save the results to this JSON file (default benchmark_<revision>.json)")
+    parser.add_argument('--compare', default=None, help="JSON file of an older run to compare with")
+    parser.add_argument('--threshold', type=float, default=defaultThreshold,
+                        help="slowdown (new / old) that counts as a regression (default %(default)s)")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="runs of each size, keeping the fastest (default %(default)s)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed of the fake catalogs (default %(default)s)")
+    parser.add_argument('--work-dir', default='WDS_Benchmark',
+                        help="folder for the fake catalogs, which are kept for next time (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    report = runBenchmarks(args.sizes, args.work_dir, seed=args.seed, repeat=args.repeat)
+
+    output = args.output
+    if output is None:
+        output = 'benchmark_%s.json' % (report['revision'] or 'unknown')
+    with open(output, 'w') as fp:
+        json.dump(report, fp, indent=1, sort_keys=True)
+    print("Saved the results to " + output)
+
+    if args.compare is not None:
+        with open(args.compare, 'r') as fp:
+            old = json.load(fp)
+        if compareReports(old, report, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
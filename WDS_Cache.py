@@ -0,0 +1,363 @@
+#!/usr/bin/env python
+
+####################################
+# File name: WDS_Cache.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import os
+import json
+import hashlib
+import shutil
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Bump this whenever the layout of the formatted WDS table changes
+# (new derived columns, renamed columns, ...) so old caches get rebuilt.
+CACHE_VERSION = 2
+
+# Name of the folder (next to the catalog) which holds the cache
+cacheDirName = 'WDS_Cache'
+manifestName = 'manifest.json'
+
+
+def cacheDirFor(filename):
+    '''
+        Gets the cache folder used for the catalog file filename.
+        The cache lives in the same folder as the catalog itself.
+    '''
+    return os.path.join(os.path.dirname(os.path.abspath(filename)), cacheDirName)
+
+
+def fileHash(filename, blockSize=1 << 20):
+    '''
+        Calculates the sha1 hash of the contents of a file.
+        Reads the file in blocks so the whole catalog is never in memory.
+    '''
+    sha = hashlib.sha1()
+    with open(filename, 'rb') as fp:
+        block = fp.read(blockSize)
+        while block:
+            sha.update(block)
+            block = fp.read(blockSize)
+    return sha.hexdigest()
+
+
+def fileSignature(filename, withHash=True):
+    '''
+        Gets the size, modification time and (optionally) content hash
+        of a file as a dictionary. This is what the cache is keyed on.
+    '''
+    stat = os.stat(filename)
+    signature = {'size': stat.st_size, 'mtime': stat.st_mtime}
+    if withHash:
+        signature['sha1'] = fileHash(filename)
+    return signature
+
+
+def readManifest(cacheDir):
+    '''
+        Reads the manifest of a cache folder.
+        Returns None if there is no (readable) manifest.
+    '''
+    try:
+        with open(os.path.join(cacheDir, manifestName), 'r') as fp:
+            return json.load(fp)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def writeManifest(cacheDir, manifest):
+    '''
+        Writes the manifest of a cache folder. The manifest is written last
+        (and via a rename) so that a half-written cache is never trusted.
+    '''
+    path = os.path.join(cacheDir, manifestName)
+    with open(path + '.tmp', 'w') as fp:
+        json.dump(manifest, fp, indent=4, sort_keys=True)
+    os.rename(path + '.tmp', path)
+
+
+def isCacheValid(filename, manifest):
+    '''
+        Checks if a cache manifest still matches the catalog file.
+        If the size and mtime match the cache is trusted without hashing.
+        If only the mtime changed (e.g. the file was touched or copied) the
+        contents are hashed, and the cache is still valid if the hash matches.
+        Returns (valid, signature), where signature is the refreshed
+        signature of the file if it had to be hashed and None otherwise.
+    '''
+    if manifest is None or manifest.get('version') != CACHE_VERSION:
+        return False, None
+    source = manifest.get('source', {})
+    current = fileSignature(filename, withHash=False)
+    if current['size'] != source.get('size'):
+        return False, None
+    if current['mtime'] == source.get('mtime'):
+        return True, None
+    current['sha1'] = fileHash(filename)
+    return current['sha1'] == source.get('sha1'), current
+
+
+def saveTable(table, cacheDir, signature):
+    '''
+        Saves an astropy table to a cache folder, one .npy file per column
+        (plus one per mask for masked columns), and a manifest describing it.
+    '''
+    import astropy.table
+
+    # Start from an empty folder so no stale columns are left lying around
+    if os.path.isdir(cacheDir):
+        shutil.rmtree(cacheDir)
+    os.makedirs(cacheDir)
+
+    columns = []
+    for i, name in enumerate(table.colnames):
+        column = table[name]
+        entry = {'name': name, 'data': 'col%d.npy' % i, 'mask': None}
+        np.save(os.path.join(cacheDir, entry['data']), np.asarray(column))
+        if isinstance(column, astropy.table.MaskedColumn):
+            entry['mask'] = 'col%d.mask.npy' % i
+            np.save(os.path.join(cacheDir, entry['mask']), np.ma.getmaskarray(column))
+        columns.append(entry)
+
+    writeManifest(cacheDir, {'version': CACHE_VERSION, 'source': signature, 'columns': columns})
+
+
+def loadTable(cacheDir, manifest):
+    '''
+        Loads a table saved with saveTable. The column data is memory
+        mapped (copy-on-write, so the cache files are never modified),
+        which makes loading nearly instant no matter the catalog size.
+    '''
+    import astropy.table
+    columns = []
+    for entry in manifest['columns']:
+        data = np.load(os.path.join(cacheDir, entry['data']), mmap_mode='c')
+        if entry['mask']:
+            mask = np.load(os.path.join(cacheDir, entry['mask']), mmap_mode='c')
+            columns.append(astropy.table.MaskedColumn(data=data, mask=mask, name=entry['name'], copy=False))
+        else:
+            columns.append(astropy.table.Column(data=data, name=entry['name'], copy=False))
+    return astropy.table.Table(columns, masked=any(entry['mask'] for entry in manifest['columns']), copy=False)
+
+
+def loadCachedTable(filename, buildTable):
+    '''
+        Gets the formatted table for the catalog file filename.
+        If there is a valid cache for the file it is loaded from there,
+        otherwise buildTable(filename) is called to parse the catalog and
+        the result is saved to the cache for next time.
+    '''
+    cacheDir = cacheDirFor(filename)
+    manifest = readManifest(cacheDir)
+    valid, signature = isCacheValid(filename, manifest)
+
+    if valid:
+        try:
+            if signature is not None:
+                # Same contents, new mtime; remember it so we don't hash again
+                manifest['source'] = signature
+                writeManifest(cacheDir, manifest)
+            return loadTable(cacheDir, manifest)
+        except (IOError, OSError, ValueError, KeyError) as error:
+            print("WDS cache is unreadable, rebuilding it: ", error)
+
+    # Take the signature before parsing, so if the file changes while we
+    # parse it the cache is considered stale next time
+    signature = fileSignature(filename)
+    table = buildTable(filename)
+    try:
+        saveTable(table, cacheDir, signature)
+    except (IOError, OSError) as error:
+        print("Could not save the WDS cache: ", error)
+    return table
+
+
+def catalogSource(filename):
+    '''
+        Gets the size and content hash of the catalog file filename, as
+        recorded by its table cache, if that cache is up to date with the
+        file (see isCacheValid). Returns None if there is no valid cache,
+        e.g. the catalog changed and hasn't been loaded (see 
+        loadCachedTable) since.
+    '''
+    manifest = readManifest(cacheDirFor(filename))
+    valid, signature = isCacheValid(filename, manifest)
+    if not valid:
+        return None
+    if signature is None:
+        signature = manifest['source']
+    if 'sha1' not in signature:
+        return None
+    return {'size': signature['size'], 'sha1': signature['sha1']}
+
+
+def loadCachedArrays(filename, name, key, buildArrays, length=None):
+    '''
+        Gets a dictionary of arrays derived from the catalog file filename
+        (e.g. an index) which depend on the settings in the dictionary key.
+        They are kept in the catalog's cache folder under name and a hash 
+        of key, so different keys (e.g. different telescope preferences) 
+        each have their own copy. If there is no valid copy, 
+        buildArrays() is called and its result saved. 
+        A copy is only valid for the catalog it was made from: the size 
+        and hash of the catalog (see catalogSource) are saved with it, and
+        if length is given every array must have that many rows. So the
+        catalog should be loaded (or its cache checked) before this is
+        called; if its table cache is stale the arrays are always rebuilt.
+    '''
+    keyString = json.dumps(key, sort_keys=True)
+    folder = os.path.join(cacheDirFor(filename),
+                          name + '-' + hashlib.sha1(keyString.encode('utf-8')).hexdigest()[:16])
+
+    source = catalogSource(filename)
+    manifest = readManifest(folder)
+    if (source is not None and manifest is not None and manifest.get('version') == CACHE_VERSION
+            and manifest.get('key') == key and manifest.get('source') == source):
+        try:
+            arrays = dict((arrayName, np.load(os.path.join(folder, arrayName + '.npy'), mmap_mode='c'))
+                          for arrayName in manifest['arrays'])
+            if length is None or all(len(arrays[arrayName]) == length for arrayName in arrays):
+                return arrays
+            print("Cached " + name + " doesn't match the catalog, rebuilding it")
+        except (IOError, OSError, ValueError) as error:
+            print("Cached " + name + " is unreadable, rebuilding it: ", error)
+
+    arrays = buildArrays()
+    # Building may have (re)loaded the catalog, which updates its cache
+    source = catalogSource(filename)
+    if source is None:
+        # Don't know which catalog these came from, so don't keep them
+        return arrays
+    try:
+        if os.path.isdir(folder):
+            shutil.rmtree(folder)
+        os.makedirs(folder)
+        for arrayName in arrays:
+            np.save(os.path.join(folder, arrayName + '.npy'), arrays[arrayName])
+        writeManifest(folder, {'version': CACHE_VERSION, 'key': key, 'source': source, 'arrays': sorted(arrays)})
+    except (IOError, OSError) as error:
+        print("Could not save the cached " + name + ": ", error)
+    return arrays
+
+
+def normalizeKey(value, places=6):
+    '''
+        Makes a JSON string out of a (nested) dictionary of settings to use
+        as a cache key. Tuples become lists and numbers are rounded to 
+        places decimal places (so e.g. 2, 2.0 and 2.0000000001 are all the
+        same key), and dictionary keys are sorted.
+    '''
+    def normalize(item):
+        if isinstance(item, dict):
+            return dict((str(name), normalize(item[name])) for name in item)
+        if isinstance(item, (list, tuple, np.ndarray)):
+            return [normalize(part) for part in item]
+        if isinstance(item, (bool, np.bool_)) or item is None:
+            return item
+        if isinstance(item, (int, float, np.integer, np.floating)):
+            return round(float(item), places)
+        return str(item)
+    return json.dumps(normalize(value), sort_keys=True)
+
+
+class ResultCache(object):
+    '''
+        A least recently used cache of query results in memory. Each 
+        result is a dictionary of numpy arrays (e.g. the row numbers 
+        that matched and columns calculated for them), stored under a
+        string key (see normalizeKey).
+        Holds at most maxEntries results and maxBytes bytes of arrays; the
+        results used longest ago are dropped first to make room.
+        Counts hits and misses, see stats. It can be shared between 
+        threads.
+    '''
+
+    def __init__(self, maxEntries=32, maxBytes=64 << 20):
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.totalBytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        '''
+            Gets the result stored under key, or None if there isn't one.
+            A result that is found becomes the most recently used.
+        '''
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            result = self.entries.pop(key)
+            self.entries[key] = result
+            return result
+
+    def put(self, key, result):
+        '''
+            Stores the dictionary of arrays result under key, dropping the
+            least recently used results if it is over the limits. 
+            A result bigger than maxBytes on its own is not stored.
+        '''
+        size = sum(np.asarray(result[name]).nbytes for name in result)
+        with self.lock:
+            self.remove(key)
+            if size > self.maxBytes or self.maxEntries <= 0:
+                return
+            self.entries[key] = result
+            self.sizes[key] = size
+            self.totalBytes += size
+            self.trim()
+
+    def remove(self, key):
+        '''
+            Drops the result stored under key, if there is one.
+        '''
+        with self.lock:
+            if key in self.entries:
+                del self.entries[key]
+                self.totalBytes -= self.sizes.pop(key)
+
+    def trim(self):
+        '''
+            Drops the least recently used results until the cache is within
+            its limits (e.g. after changing maxEntries or maxBytes).
+        '''
+        with self.lock:
+            while self.entries and (len(self.entries) > self.maxEntries or self.totalBytes > self.maxBytes):
+                self.remove(next(iter(self.entries)))
+
+    def clear(self):
+        '''
+            Drops all of the results. The hit and miss counts are kept.
+        '''
+        with self.lock:
+            self.entries.clear()
+            self.sizes.clear()
+            self.totalBytes = 0
+
+    def stats(self):
+        '''
+            Gets the number of hits, misses, results held and bytes used,
+            as a dictionary.
+        '''
+        return {'hits': self.hits, 'misses': self.misses, 
+                'entries': len(self.entries), 'bytes': self.totalBytes}
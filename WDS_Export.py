@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+
+####################################
+# File name: WDS_Export.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import io
+import csv
+from collections import OrderedDict
+import numpy as np
+import WDS_Sexagesimal
+# astropy is imported in the functions which use it, since it is slow
+# to import (see WDS_Timing)
+
+# The formats results can be saved in, and the file extension of each.
+# text is the same fixed width table that tableToString makes, for
+# reading; the others have every digit of every value, for other programs
+# (e.g. telescope control software) to read.
+exportFormats = OrderedDict([('text', '.txt'),
+                             ('csv', '.csv'),
+                             ('fits', '.fits'),
+                             ('votable', '.vot')])
+
+# Names of the columns which hold hhmmss.s (or ddmmss.s) numbers, which
+# the text format shows as hh:mm:ss.s
+sexagesimalCols = ['RA', 'Dec']
+
+# FITS files are made of blocks of this many bytes
+fitsBlockSize = 2880
+
+# How many rows are formatted and written at a time. Only this many
+# rows of text (or FITS data) are ever in memory at once.
+defaultChunkSize = 10000
+
+
+def formatFromFilename(filename):
+    '''
+        Guesses the export format from the extension of a file name,
+        e.g. 'csv' for object_list.csv. Anything unknown is text.
+    '''
+    for format in exportFormats:
+        if filename.lower().endswith(exportFormats[format]):
+            return format
+    if filename.lower().endswith('.xml'):
+        return 'votable'
+    return 'text'
+
+def tableSlice(result, start, stop, names=None):
+    '''
+        Makes an astropy Table of the rows start to stop of a result,
+        which can be an astropy Table or a WDS_Extraction_Tool.ResultSet,
+        with the columns in names (all of them by default).
+    '''
+    import astropy.table
+    if isinstance(result, astropy.table.Table):
+        # Slice first so only the chunk is copied when picking columns
+        table = result[start:stop]
+        if names is not None:
+            table = table[names]
+        return table
+    return result.table(names, start, stop)
+
+def iterChunks(result, names=None, chunkSize=defaultChunkSize):
+    '''
+        Goes through a result chunkSize rows at a time, as astropy Tables
+        (see tableSlice).
+    '''
+    for start in range(0, len(result), chunkSize):
+        yield tableSlice(result, start, start + chunkSize, names)
+
+def formatColumn(column, colName, colonSeparated = True):
+    '''
+        Converts a whole column of a table to the strings its values are
+        shown as, all at once. Gives the same strings as
+        WDS_Extraction_Tool.formatCell on each value (masked values are
+        shown as --), as an array of strings.
+    '''
+    data = np.ma.getdata(column)
+    mask = np.ma.getmaskarray(column)
+    strings = np.char.mod('%s', data)
+
+    # If this is RA or Dec want to convert from hhmmss.s to hh:mm:ss.s
+    # (from the strings, like formatCell does, so the rounding is the same)
+    if colonSeparated and colName in sexagesimalCols and len(strings) > 0:
+        strings = WDS_Sexagesimal.hhmmssToColonString(np.where(mask, '0', strings).astype(float))
+
+    if mask.any():
+        strings = np.where(mask, '--', strings)
+    return strings
+
+def iterTableLines(result, colWidth = 20, colonSeparated = True, names = None, chunkSize = defaultChunkSize):
+    '''
+        Makes the lines of a fixed width table of a result (see tableSlice)
+        one at a time: the column names, a horizontal bar, then one line
+        per row.
+        The rows are formatted chunkSize at a time, a whole column at once
+        (see formatColumn), so writing out even a huge table never needs
+        all of its text in memory.
+    '''
+    # List of the names of each column
+    if names is None:
+        names = result.colnames
+
+    # Each value is padded so it starts colWidth characters after the
+    # start of the last one (or right after it if it is longer than that)
+    header = ''
+    lastWordLen = colWidth
+    for colName in names:
+        header = header + (colWidth - lastWordLen)*' ' + str(colName)
+        lastWordLen = len(colName)
+    yield header
+
+    # Add a horizontal bar to separate the titles from the data a bit
+    yield len(header)*'-' + (colWidth - lastWordLen)*'-'
+
+    for table in iterChunks(result, names, chunkSize):
+        lines = None
+        for colName in names:
+            data = formatColumn(table[colName], colName, colonSeparated)
+            if lines is None:
+                lines = data
+            else:
+                padding = np.char.multiply(' ', np.maximum(colWidth - lastWordLen, 0))
+                lines = np.char.add(np.char.add(lines, padding), data)
+            lastWordLen = np.char.str_len(data)
+        for line in lines.tolist():
+            yield line
+
+def writeText(result, fileobj, names=None, chunkSize=defaultChunkSize, colWidth=20, colonSeparated=True):
+    '''
+        Writes a result to an open file as a fixed width table, like
+        tableToString makes (see iterTableLines).
+    '''
+    first = True
+    for line in iterTableLines(result, colWidth, colonSeparated, names, chunkSize):
+        if not first:
+            fileobj.write('\n')
+        fileobj.write(line)
+        first = False
+
+def writeCsv(result, fileobj, names=None, chunkSize=defaultChunkSize):
+    '''
+        Writes a result to an open file as comma separated values, with
+        the column names on the first line. Masked values are left empty,
+        and numbers are written with all of their digits.
+    '''
+    if names is None:
+        names = result.colnames
+    writer = csv.writer(fileobj, lineterminator='\n')
+    writer.writerow(names)
+    for table in iterChunks(result, names, chunkSize):
+        columns = []
+        for colName in names:
+            # Python numbers (which csv writes at full precision), with
+            # None (an empty value) where the value is masked
+            values = np.ma.getdata(table[colName]).astype(object)
+            values[np.ma.getmaskarray(table[colName])] = None
+            columns.append(values)
+        writer.writerows(zip(*columns))
+
+def writeFits(result, fileobj, names=None, chunkSize=defaultChunkSize):
+    '''
+        Writes a result to an open (binary) file as a FITS binary table,
+        the same as astropy would write the whole table, but a chunk of
+        rows at a time.
+    '''
+    from astropy.io import fits
+
+    # The header only depends on the columns, except for the row count
+    header = fits.table_to_hdu(tableSlice(result, 0, 0, names)).header
+    header['NAXIS2'] = len(result)
+    fileobj.write(fits.PrimaryHDU().header.tostring().encode('ascii'))
+    fileobj.write(header.tostring().encode('ascii'))
+
+    size = 0
+    for table in iterChunks(result, names, chunkSize):
+        # astropy fills in the masked values, then the rows are written
+        # big endian like FITS wants
+        data = fits.table_to_hdu(table).data.view(np.ndarray)
+        data = data.astype(data.dtype.newbyteorder('>'))
+        fileobj.write(data.tostring())
+        size += data.nbytes
+
+    # Pad the data out to a whole block
+    fileobj.write(b'\0' * (-size % fitsBlockSize))
+
+def writeVotable(result, fileobj, names=None, chunkSize=defaultChunkSize):
+    '''
+        Writes a result to an open (binary) file as a VOTable, the same
+        as astropy would write the whole table, but a chunk of rows at a
+        time.
+    '''
+    from astropy.io.votable import from_table
+
+    start = b'<TABLEDATA>\n'
+    stop = b'</TABLEDATA>'
+    end = None
+    for table in iterChunks(result, names, chunkSize):
+        # astropy writes the rows of each chunk, which go between the
+        # beginning and end of the first chunk's document
+        document = io.BytesIO()
+        from_table(table).to_xml(document)
+        document = document.getvalue()
+        rowsStart = document.index(start) + len(start)
+        # (from the start of the line the end of TABLEDATA is on)
+        rowsStop = document.rindex(b'\n', 0, document.rindex(stop)) + 1
+        if end is None:
+            fileobj.write(document[:rowsStart])
+            end = document[rowsStop:]
+        fileobj.write(document[rowsStart:rowsStop])
+
+    if end is None:
+        # With no rows there is no TABLEDATA at all
+        document = io.BytesIO()
+        from_table(tableSlice(result, 0, 0, names)).to_xml(document)
+        end = document.getvalue()
+    fileobj.write(end)
+
+def export(result, target, format=None, names=None, chunkSize=defaultChunkSize, colWidth=20, colonSeparated=True):
+    '''
+        Saves a result (an astropy Table or a
+        WDS_Extraction_Tool.ResultSet) to target, which is either the name
+        of a file or an open file (e.g. a pipe to telescope control
+        software). format is one of exportFormats; by default it comes
+        from the file name. Only the columns in names are saved (all of
+        them by default). colWidth and colonSeparated are only used by
+        the text format.
+        The result is written chunkSize rows at a time, so the whole of
+        it is never in memory as text.
+    '''
+    # Anything that can't be written to is a file name (str or unicode)
+    isFilename = not hasattr(target, 'write')
+    if format is None:
+        if isFilename:
+            format = formatFromFilename(target)
+        else:
+            format = 'text'
+    if format not in exportFormats:
+        raise ValueError("Unknown export format " + str(format) + ", use one of "
+                         + ', '.join(exportFormats))
+
+    if isFilename:
+        if format in ('fits', 'votable'):
+            mode = 'wb'
+        else:
+            mode = 'w'
+        with open(target, mode) as fileobj:
+            export(result, fileobj, format, names, chunkSize, colWidth, colonSeparated)
+        return
+
+    if format == 'text':
+        writeText(result, target, names, chunkSize, colWidth, colonSeparated)
+    elif format == 'csv':
+        writeCsv(result, target, names, chunkSize)
+    elif format == 'fits':
+        writeFits(result, target, names, chunkSize)
+    else:
+        writeVotable(result, target, names, chunkSize)
@@ -4,100 +4,35 @@
 # File name: WDS_Extraction_Tool.py
 # Author: Sarah Hale
 # Email: shale@hmc.edu
-# Date last modified: 2016-02-18
+# Date last modified: 2026-10-18
 # Python Version: 2.7
 ####################################
 
 # import the python3 print function
 from __future__ import print_function
 
+import sys
+import json
+import datetime
+import threading
+from collections import OrderedDict
 import numpy as np
-from numpy import *
-import astropy
-from astropy.io import ascii
-from StringIO import StringIO
 import numpy.ma as ma
-np.set_printoptions(threshold='nan')
-from collections import Counter 
-from astropy import units as u
-from astropy.time import Time
-from astropy.coordinates import SkyCoord, EarthLocation, AltAz
-import re
-import json
+# Print all of an array, not just the start and end of it
+np.set_printoptions(threshold=sys.maxsize)
+import WDS_Cache
+import WDS_Visibility
+import WDS_Sidereal
+import WDS_Sexagesimal
+import WDS_Index
+import WDS_Export
+import WDS_Timing
+# astropy (and the optional progress package) take a while to import, so
+# they are imported in the functions which use them, the first time they
+# are needed, rather than here. That way the GUI can start straight away.
+# (See WDS_Timing for how long each import takes.)
+# Whether 'progress' is installed, for loading bars (see progressStep)
 progressInstalled = True
-try:
-    from progress.bar import Bar
-except ImportError:
-    print("Install 'progress' for helpful loading bars!")
-    progressInstalled = False
-
-# This funtion needs to be up here so it can be called during 'setup'
-def formatWds(wds):
-    '''
-        Takes the WDS table and returns a modified version of it.
-         - Converts the combined RADec column of the WDS master table to
-           two separate columns of RA and Dec.
-         - Creates a new column of delta mag from primary and secondary mags
-    '''
-    
-    radec = wds['col21']
-    primag = wds['col11']
-    secmag = wds['col12']
-    
-    # Separate out RA and Dec from existing column and put into two lists
-    ra = []
-    dec = []
-    split = ''
-    # Loop over all the radec angles
-    for i  in range(0, len(radec)):
-        # Split the RA from the Dec
-        # the ra appears before the dec, delimited by a + or -
-        # if it's in the expected format, then the split should be
-        #  [ra, + or -, dec]
-        split = re.split('([+-])', radec[i])
-        # If the split worked, add the ra and decs to new lists
-        if len(split) == 3:
-            ra.append(float(split[0]))
-            dec.append(float(split[1]+split[2]))
-        # Otherwise append blank values to the new lists to keep the lengths correct
-        else:
-            ra.append(-999999.9)
-            dec.append(-999999.9)
-
-    # Create list of delta mags from primary and secondary mags
-    deltamag = []
-    if len(primag) == len(secmag):
-        for i  in range(0, len(primag)):
-            # Take the difference such that it is positive
-            # Assuming that secmag > primag
-            if secmag[i] and primag[i]:
-                delta = float(secmag[i]) - float(primag[i])
-                # Round the output so the table doesn't get messed up
-                delta = round(delta, 2)
-                deltamag.append(delta)
-            else:
-                deltamag.append(-99.9)
-
-    
-    # Add the new lists as new columns to the wds table
-    raCol = astropy.table.Column(data=ra, name='RA')
-    decCol = astropy.table.Column(data=dec, name='Dec')
-    deltaMagCol = astropy.table.Column(data=deltamag, name='DeltaMag')
-    wds.add_column(raCol)
-    wds.add_column(decCol)
-    wds.add_column(deltaMagCol)
-    
-    return wds
-
-# Import the WDS catalog
-wdsMaster = astropy.io.ascii.read('WDS_CSV_cat.txt', 
-                delimiter =',',guess=False, Reader =ascii.NoHeader,
-                fill_values=[('.', '-999'), ('', '-999')])
-wdsMaster = formatWds(wdsMaster)
-# Create the sub-catalog we want (to be narrowed down by constrain function)
-wdsInteresting = wdsMaster
-# Create sub-sub catalog which has the interesting stars that we can view
-wdsInterestingHere = wdsInteresting
 
 # Associate each row with its type
 # e.g. Using wdsMaster[numObjs] is equiv to wdsMaster['col2']
@@ -118,170 +53,219 @@ priDecProperMotion = 'PriDecPropMotion'
 raCoors = 'RA'
 decCoors = 'Dec'
 deltaMag = 'DeltaMag'
+# RA and Dec in decimal degrees, which is what all the calculations use
+raDegrees = 'RAdeg'
+decDegrees = 'Decdeg'
+# Angular distance from a pointing in degrees, added by coneSearch
+distanceCol = 'Distance'
+# The columns which are shown in the GUI (plus secz when there is one).
+# Not including numObjs because it doesn't seem to have much in it
+displayColNames = [discovererAndNumber, raCoors, decCoors, priMag, deltaMag, 
+                   sepFirst, sepLast, spectralType]
 
-## Rename all the columns to the useful names
-wdsMaster['col2'].name = discovererAndNumber
-wdsMaster['col3'].name = numObjs
-wdsMaster['col7'].name = posAngleFirst
-wdsMaster['col8'].name = posAngleLast
-wdsMaster['col9'].name = sepFirst
-wdsMaster['col10'].name = sepLast
-wdsMaster['col11'].name = priMag
-wdsMaster['col12'].name = secMag
-wdsMaster['col13'].name = spectralType
-wdsMaster['col14'].name = priRaProperMotion
-wdsMaster['col15'].name = priDecProperMotion
+def stringsToFloats(strings):
+    '''
+        Converts an array of strings to an array of floats in one go.
+        Only plain decimal numbers (digits with at most one decimal point)
+        are converted. Returns (values, ok), where ok is a boolean array
+        which is False for the strings which could not be converted; those
+        have a value of 0.0.
+    '''
+    strings = np.char.strip(strings)
+    ok = np.char.isdigit(np.char.replace(strings, '.', '', 1))
+    values = np.zeros(len(strings))
+    values[ok] = strings[ok].astype(float)
+    return values, ok
 
+def splitRaDec(radec):
+    '''
+        Splits the combined RADec column of the WDS table into two arrays 
+        of RA (hhmmss.ss) and Dec (ddmmss.s) floats.
+        Works on the whole column at once rather than row by row.
+        Rows which are not in the expected format (masked, not exactly one 
+        + or -, or not numbers) get -999999.9 for both RA and Dec.
+    '''
+    strings = np.asarray(ma.filled(radec, ''), dtype=str)
 
-# Constriant parameters
-# Constraints is the actual numbers -- upper and lower bounds for
-# different properties.
-constraints = {}
-observing_date = Time.now()
+    ra = np.full(len(strings), -999999.9)
+    dec = np.full(len(strings), -999999.9)
 
+    # The ra appears before the dec, delimited by a + or -
+    # It's only in the expected format if there is exactly one of them
+    minus = np.char.count(strings, '-')
+    good = (np.char.count(strings, '+') + minus) == 1
 
-def getWdsInterestingHere():
+    # Make every delimiter a + so the split is the same for all rows,
+    # then remember which ones were actually a - for the sign of the dec
+    #  [ra, +, dec]
+    split = np.char.partition(np.char.replace(strings[good], '-', '+'), '+')
+    raValues, raOk = stringsToFloats(split[:, 0])
+    decValues, decOk = stringsToFloats(split[:, 2])
+    decValues = np.where(minus[good] == 1, -decValues, decValues)
+
+    # Only fill in the rows where both numbers could be read
+    ok = raOk & decOk
+    rows = np.flatnonzero(good)[ok]
+    ra[rows] = raValues[ok]
+    dec[rows] = decValues[ok]
+
+    return ra, dec
+
+def calcDeltaMagColumn(primag, secmag):
     '''
-        Gets the WDS table constrained to what stars are both 
-        interesting and viewable. 
+        Calculates the delta mag (secondary - primary, rounded to 0.01) 
+        for whole columns of primary and secondary mags at once.
+        Rows missing either magnitude (masked or zero) get -99.9.
     '''
-    global wdsInterestingHere
-    return wdsInterestingHere
+    pri = np.asarray(ma.filled(primag, 0.0), dtype=float)
+    sec = np.asarray(ma.filled(secmag, 0.0), dtype=float)
 
-def getWdsInteresting():
+    # Take the difference such that it is positive
+    # Assuming that secmag > primag
+    # Round the output so the table doesn't get messed up
+    have = (pri != 0.0) & (sec != 0.0)
+    return np.where(have, np.round(sec - pri, 2), -99.9)
+
+# This funtion needs to be up here so it can be called during 'setup'
+def formatWds(wds):
     '''
-        Gets the WDS table constrained to what stars are interesting. 
+        Takes the WDS table and returns a modified version of it.
+         - Converts the combined RADec column of the WDS master table to
+           two separate columns of RA and Dec.
+         - Creates a new column of delta mag from primary and secondary mags
+         - Also adds the RA and Dec in decimal degrees, as RAdeg and Decdeg
     '''
-    global wdsInteresting
-    return wdsInteresting
+    
+    import astropy.table
 
-def getWdsMaster():
+    # Separate out RA and Dec from existing column 
+    ra, dec = splitRaDec(wds['col21'])
+
+    # And keep them in decimal degrees too, with NaN for the missing ones
+    missing = (ra == -999999.9)
+    raDeg = np.where(missing, np.nan, WDS_Sexagesimal.hhmmssToDecimal(ra) * 15.0)
+    decDeg = np.where(missing, np.nan, WDS_Sexagesimal.hhmmssToDecimal(dec))
+
+    # Create delta mags from primary and secondary mags
+    deltamag = calcDeltaMagColumn(wds['col11'], wds['col12'])
+    
+    # Add the new arrays as new columns to the wds table
+    raCol = astropy.table.Column(data=ra, name='RA')
+    decCol = astropy.table.Column(data=dec, name='Dec')
+    deltaMagCol = astropy.table.Column(data=deltamag, name='DeltaMag')
+    raDegCol = astropy.table.Column(data=raDeg, name='RAdeg')
+    decDegCol = astropy.table.Column(data=decDeg, name='Decdeg')
+    wds.add_column(raCol)
+    wds.add_column(decCol)
+    wds.add_column(deltaMagCol)
+    wds.add_column(raDegCol)
+    wds.add_column(decDegCol)
+    
+    return wds
+
+def renameWds(wds):
     '''
-        Gets the master WDS table. 
+        Renames the columns of the WDS table to the useful names.
     '''
-    global wdsMaster
-    return wdsMaster
+    wds['col2'].name = discovererAndNumber
+    wds['col3'].name = numObjs
+    wds['col7'].name = posAngleFirst
+    wds['col8'].name = posAngleLast
+    wds['col9'].name = sepFirst
+    wds['col10'].name = sepLast
+    wds['col11'].name = priMag
+    wds['col12'].name = secMag
+    wds['col13'].name = spectralType
+    wds['col14'].name = priRaProperMotion
+    wds['col15'].name = priDecProperMotion
+
+    return wds
+
+def parseWds(filename='WDS_CSV_cat.txt'):
+    '''
+        Parses the WDS catalog CSV file into an astropy Table, as it is
+        in the file (see readWds). Blank and '.' values are masked.
+    '''
+    from astropy.io import ascii
+    return ascii.read(filename, 
+                delimiter =',',guess=False, Reader =ascii.NoHeader,
+                fill_values=[('.', '-999'), ('', '-999')])
+
+def readWds(filename='WDS_CSV_cat.txt'):
+    '''
+        Reads the WDS catalog from the CSV file and formats it 
+        (see formatWds and renameWds). This parses the whole catalog, 
+        so it is slow; use loadWds to go through the cache instead.
+    '''
+    wds = parseWds(filename)
+    wds = formatWds(wds)
+    wds = renameWds(wds)
+
+    return wds
+
+def loadWds(filename='WDS_CSV_cat.txt'):
+    '''
+        Loads the formatted WDS catalog. Uses the binary cache in 
+        WDS_Cache/ if it is up to date with the CSV file, otherwise 
+        reads the CSV and (re)builds the cache.
+    '''
+    return WDS_Cache.loadCachedTable(filename, readWds)
+
+def loadPreferences(filename='WDS_Preferences.json'):
+    '''
+        Loads the telescope preferences (latitude, longitude, viewing 
+        range, ...) from the preferences file as a dictionary.
+    '''
+    with open(filename, 'r') as fp:
+        return json.load(fp)
 
 def hhmmssAdd(first, second):
     '''
         Function for adding hhmmss.s
         This is necissary because the number rolls over at 60, not 100.
+        Single number version of WDS_Sexagesimal.hhmmssAdd.
     '''
-
-    # Split up the two inputs into hh, mm, and ss
-    ss1 = first % 100
-    mm1 = (first % 10000 - first % 100) / 100
-    hh1 = (first % 1000000 - first % 10000) / 10000
-    ss2 = second % 100
-    mm2 = (second % 10000 - second % 100) / 100
-    hh2 = (second % 1000000 - second % 10000) / 10000
-
-    # Add from least to most significant digits, taking care of rollover.
-    ss = ss1 + ss2
-    mm = mm1 + mm2
-    hh = hh1 + hh2
-    if ss > 60:
-        mm = mm + 1
-        ss = ss - 60
-    if mm > 60:
-        hh = hh + 1
-        mm = mm - 60
-
-    # Merge the hhmmss back together
-    mm = mm * 100
-    hh = hh * 10000
-    return hh + mm + ss
+    return float(WDS_Sexagesimal.hhmmssAdd(first, second))
 
 def hhmmssSubtract(first, second):
     '''
         Function for subtracting hhmmss.s
         Second is subtracted from first, first - second.
         This is necissary because the number rolls over at 60, not 100.
+        Single number version of WDS_Sexagesimal.hhmmssSubtract.
     '''
-
-    # Split up the two inputs into hh, mm, and ss
-    ss1 = first % 100
-    mm1 = (first % 10000 - first % 100) / 100
-    hh1 = (first % 1000000 - first % 10000) / 10000
-    ss2 = second % 100
-    mm2 = (second % 10000 - second % 100) / 100
-    hh2 = (second % 1000000 - second % 10000) / 10000
-
-    # Subtract, taking care of rollover.
-    ss = ss1 - ss2
-    mm = mm1 - mm2
-    hh = hh1 - hh2
-    if ss < 0:
-        mm = mm - 1
-        ss = ss + 60
-    if mm < 0:
-        hh = hh - 1
-        mm = mm + 60
-
-    # Merge the hhmmss back together
-    mm = mm * 100
-    hh = hh * 10000
-    return hh + mm + ss
+    return float(WDS_Sexagesimal.hhmmssSubtract(first, second))
 
 
 def ddmmssToDeg(coordinate):
-    # Check for + or - for Dec, and save so can add back later
-    leadingSign = ''
-    if '-' in str(coordinate):
-        leadingSign = '-'
-    elif '+' in str(coordinate):
-        leadingSign = '+'
-
-    data = float(coordinate)
-    # Split the float into hh, mm, and ss
-    # Casting all of the splits into int before string so there are no
-    #  trailing decimal points
-    #  Except seconds are rounded to 2 decimal points
-    seconds = data % 100
-    minutes = (data % 10000 - data % 100) / 100
-    degrees = (data % 1000000 - data % 10000) / 10000
-
-    # Divide through from mmss to decimal
-    minutes = minutes / 60.0
-    seconds = seconds / 3600.0
-    degrees = float(leadingSign + str(degrees))
-    
-    degrees = degrees + minutes + seconds
+    '''
+        Converts a ddmmss.s (or hhmmss.s) float, or a string of one, to 
+        decimal degrees (or hours), limited to between -90 and 90.
+        Single number version of WDS_Sexagesimal.hhmmssToDecimal.
+    '''
+    degrees = WDS_Sexagesimal.hhmmssToDecimal(float(coordinate))
     # TODO this isn't the best fix. Why are some of the lats out of range?
-    if degrees < -90.0:
-        degrees = -90.0
-    elif degrees > 90.0:
-        degrees = 90.0
-
-    return degrees
+    return min(max(degrees, -90.0), 90.0)
 
 def floatStringToColonSeparated(coordinate):
-    # Check for + or - for Dec, and save so can add back later
-    leadingSign = ''
-    if '-' in coordinate:
-        leadingSign = '-'
-    elif '+' in coordinate:
-        leadingSign = '+'
-
-    data = float(coordinate)
-    # Split the float into hh, mm, and ss
-    # Casting all of the splits into int before string so there are no
-    #  trailing decimal points
-    #  Except seconds are rounded to 2 decimal points
-    seconds = str(round(data % 100, 2))
-    minutes = str(int((data % 10000 - data % 100) / 100))
-    hours = str(int((data % 1000000 - data % 10000) / 10000))
-
-    # Make sure there are leading zeros when one of them is <10
-    if len(seconds.partition('.')[0]) < 2:
-        seconds = '0' + seconds
-    if len(minutes) < 2:
-        minutes = '0' + minutes
-    if len(hours) < 2:
-        hours = '0' + hours
-
-    # Concat them together with colons and return
-    return leadingSign + hours + ':' + minutes + ':' + seconds
+    '''
+        Converts a string of a hhmmss.s (or ddmmss.s) float to a colon 
+        separated string, hh:mm:ss.s. 
+        Single number version of WDS_Sexagesimal.hhmmssToColonString.
+    '''
+    return WDS_Sexagesimal.hhmmssToColonString(float(coordinate))
+
+def formatCell(value, colName, colonSeparated = True):
+    '''
+        Converts one value of a table to the string it is shown as. 
+        RA and Dec are converted from hhmmss.s to hh:mm:ss.s if 
+        colonSeparated is True.
+    '''
+    data = str(value)
+    # If this is RA or Dec want to convert from hhmmss.s to hh:mm:ss.s
+    if colonSeparated and (colName == raCoors or colName == decCoors):
+        data = floatStringToColonSeparated(data)
+    return data
 
 def tableToString(table, colWidth = 20, colonSeparated = True):
     '''
@@ -290,77 +274,23 @@ def tableToString(table, colWidth = 20, colonSeparated = True):
         characters; the default value for this is 20.
         This is different from simply casting the table to a string 
         because it ensures that all of the columns are displayed. 
+        See WDS_Export for writing it out a chunk at a time instead.
     '''
-    
-    # Number of rows in the table (excluding column names)
-    rows = len(table.columns[1])
-    # List of the names of each column 
-    colNames = table.colnames
-    
-    # The string that will store the whole table
-    string = ''
-    
-    # Keep track of the length of the last word so the column width
-    # stays uniform
-    lastWordLen = colWidth
-    
-    # Write the names of the columns to the string 
-    for colName in colNames:
-            string = string + (colWidth - lastWordLen)*' ' + str(colName)
-            lastWordLen = len(colName)
-    
-    # Add a horizontal bar to separate the titles from the data a bit
-    string = string + '\n' + len(string)*'-' + (colWidth - lastWordLen)*'-'
-    
-    # Loop over all of the elements of the table 
-    for row in range(rows):
-        lastWordLen = colWidth
-        rowstring = ''
-        # Write all the data in a row to a string 
-        for colName in colNames:
-            data = str(table[row][colName])
-            # Remove the first and last characters from the string because 
-            # they are just brackets 
-            data = data[1:-1]
-            # If this is RA or Dec want to convert from hhmmss.s to hh:mm:ss.s
-            if colonSeparated and (colName == 'RA' or colName == 'Dec'):
-                data = floatStringToColonSeparated(data)
-            rowstring = rowstring + (colWidth - lastWordLen)*' ' + data
-            lastWordLen = len(data)
-        # Then add that string as a new line to the full table's string 
-        string = string + '\n' + rowstring
-    
-    return string
+    return '\n'.join(WDS_Export.iterTableLines(table, colWidth, colonSeparated))
 
-# Added by shale 2017-01-30: Same default colWidth as tableToString, but changeable
-def getSmallerWdsInterestingHereString(colWidth = 20, colonSeparated = True):
-    '''
-        Gets a string of the  WDS table constrained to what stars 
-        are both interesting and viewable. Returns only the columns with 
-        specified names. (Those are assumed to be the columns of
-        interest.) 
-    '''
-    global wdsInterestingHere
-    
-    # Not including numObjs because it doesn't seem to have much in it
-    if 'secz' in wdsInterestingHere.dtype.names:
-        return tableToString(wdsInterestingHere[discovererAndNumber, raCoors, decCoors,
-                                        priMag, deltaMag, sepFirst, sepLast, spectralType, 'secz'],
-                                        colWidth, colonSeparated)
-    else:
-        return tableToString(wdsInterestingHere[discovererAndNumber, raCoors, decCoors,
-                                        priMag, deltaMag, sepFirst, sepLast, spectralType],
-                                        colWidth, colonSeparated)
 
-
-def calcDeltaMags():
+def calcDeltaMags(table=None):
     '''
         Creates an array with the delta magnitudes of WDS objects.
+        Uses wdsInteresting if no table is given.
     '''
+    if table is None:
+        table = wdsInteresting
+
     # Calculating magnitude difference for each object
     # Make nice formats...
-    Pri_mag_g = ma.filled(wdsInteresting[priMag],[-999])
-    Sec_mag_g = ma.filled(wdsInteresting[secMag],[-999])
+    Pri_mag_g = ma.filled(table[priMag],[-999])
+    Sec_mag_g = ma.filled(table[secMag],[-999])
     Pri_mag_gg = np.asarray(Pri_mag_g, dtype = 'float_' )
     Sec_mag_gg = np.asarray(Sec_mag_g, dtype = 'float_' )
     # Then calculate the actual delta mags
@@ -369,250 +299,1326 @@ def calcDeltaMags():
     return Delta_mag
 
 
-def calcSiderealAdjustment(longitude=-117, time=Time.now()):
+def calcSiderealAdjustment(longitude=None, time=None):
     '''
         Calculate the sidereal adjustmet time for a specific time and place. 
-        By default calculates for the current time at longitude -117.
-        The sidereal adjustment time is the difference between 
-        the RA of a star and the HA of it on that day.  
+        By default calculates for the current time at the longitude in the
+        preferences (in degrees east, so west is negative).
+        The sidereal adjustment time is the difference between the local 
+        sidereal time (the RA of a star on the meridian) and the local 
+        (mean solar) clock time, in hhmmss.s. Adding it to a clock time 
+        gives the RA which is on the meridian at that time.
         
-        This function cannot fulll  work until 
-        https://github.com/astropy/astropy/issues/3275
-        has been resolved. 
-        For now, the function approximates future sidereal
-        times by adjusting by 4 minutes each day. 
+        Uses WDS_Sidereal, so it is good to about a second, needs no
+        IERS downloads, and works for an array of times as well.
     ''' 
-    
-    # Sidereal time on Nov 26, 2015 at 0-oclock is 4:16:00 ish 
-    startTime = Time('2015-11-26 00:00:00', scale='utc')
-    startSidereal = 041600.0 # hhmmss '04:16:00'
-    
-    # If the sidereal time we are trying to calculate is after this, then we can 
-    # calculate it by adjusting the sidereal time by 4 minutes for each day after
-    elapsedDays = time - startTime # float of days 
-    adjustment = float(str(elapsedDays)) * 4 # in minutes
-    
-    # if the adjustment is greater than 24 h = 1440 min, then we need to 'wrap around'
-    adjustment = adjustment % 1440
-
-    # if the adjustment is greater than 60, then we need to account for this when 
-    # converting into hhmmss
-    hours = 0
-    mins = adjustment
-    while mins >= 60:
-        mins = mins - 60
-        hours = hours + 1
-        
-    sidereal = startSidereal + mins*100 + hours*10000
-    
-    return sidereal
-    
+    if longitude is None:
+        longitude = WDS_Sexagesimal.colonToDecimal(loadPreferences()['longitude'])
+    if time is None:
+        from astropy.time import Time
+        time = Time.now()
+
+    lst = WDS_Sidereal.localSiderealTime(time, longitude)
+    clock = WDS_Sidereal.localMeanSolarTime(time, longitude)
+    adjustment = (lst - clock) % 24.0
+
+    return WDS_Sexagesimal.decimalToHhmmss(adjustment)
+
+
+def observingLocation(preferences=None):
+    '''
+        Creates an EarthLocation for the telescope from the latitude and
+        longitude in the preferences. If no preferences are given they are
+        loaded from the preferences file.
+    '''
+    from astropy.coordinates import EarthLocation
+    if preferences is None:
+        preferences = loadPreferences()
+    return EarthLocation(lat=preferences['latitude'], lon=preferences['longitude'])
+
+
+def parseTimeInput(time):
+    '''
+        Converts a time typed in by the user to a hhmmss.s float.
+        Three possible types of input are handled:
+         - Regular hh:mm:ss.s
+         - No seconds, hh:mm
+         - Just the hour, hh
+         - (hhmmss.s with no colons is possible too)
+    '''
+    # Check if the input format is colon-separated 
+    if ":" in time:
+        # Check if there is one colon or two:
+        #  - One colon is assumed to be hh:mm
+        #  - Two colons is assumed to be hh:mm:ss.s
+        if time.count(':') == 1:
+            # split the string at the colons
+            hhmm = time.split(":")
+            # and convert each of the resulting numbers to a float
+            hhmm = [float(i) for i in hhmm]
+            # Then merge them back together as a single hhmmss float
+            time = hhmm[0]*10000 + hhmm[1]*100
+        else:
+            # split the string at the colons
+            hhmmss = time.split(":")
+            # and convert each of the resulting numbers to a float
+            hhmmss = [float(i) for i in hhmmss]
+            # Then merge them back together as a single hhmmss float
+            time = hhmmss[0]*10000 + hhmmss[1]*100 + hhmmss[2]
+    else:
+        # If it's just an hour multiply by 10000
+        time = float(time)
+        if time == time % 100:
+            time = time * 10000
+        # If it's non-colon-separated hhmmss.s leave it as-is
+    return time
+
+def preferenceToHhmmss(value):
+    '''
+        Converts a hh:mm:ss.s (or dd:mm:ss.s) string from the preferences
+        to a hhmmss.s float. Strings without colons are taken to already
+        be hhmmss.s.
+    '''
+    # Check if the input format is colon-separated 
+    if ":" in value:
+        # split the string at the colons
+        hhmmss = value.split(":")
+        # and convert each of the resulting numbers to a float
+        hhmmss = [float(i) for i in hhmmss]
+        # Then merge them back together as a single hhmmss float
+        return hhmmss[0]*10000 + hhmmss[1]*100 + hhmmss[2]
+    return float(value)
+
+def dateRange(start, stop, every=1):
+    '''
+        Makes a list of the dates (yyyy-mm-dd) from start to stop,
+        including both, every days apart.
+    '''
+    day = datetime.datetime.strptime(start, '%Y-%m-%d').date()
+    last = datetime.datetime.strptime(stop, '%Y-%m-%d').date()
+    dates = []
+    while day <= last:
+        dates.append(day.isoformat())
+        day = day + datetime.timedelta(days=every)
+    return dates
+
+def clockDescription(preferences=None):
+    '''
+        Describes the clock the start and stop times of a night are on
+        (see nightInputs), e.g. 'Local Mean Solar Time' or 'UTC-7:00'.
+    '''
+    if preferences is None:
+        preferences = loadPreferences()
+    utcOffset = preferences.get('utcOffset')
+    if utcOffset is None:
+        return "Local Mean Solar Time"
+    hhmmss = WDS_Sexagesimal.decimalToHhmmss(WDS_Sexagesimal.colonToDecimal(utcOffset))
+    # Only hours and minutes, with the sign always shown
+    offset = WDS_Sexagesimal.hhmmssToColonString(hhmmss).lstrip('-')[:5].lstrip('0')
+    if offset.startswith(':'):
+        offset = '0' + offset
+    return "UTC" + ('-' if hhmmss < 0 else '+') + offset
+
+def nightInputs(dateString, startTime, stopTime, preferences=None):
+    '''
+        Works out the time and location constraints of an observing night
+        the way the GUI does, from the date of the night ('yyyy-mm-dd'),
+        the start and stop times (in any format parseTimeInput takes) and
+        the telescope preferences (loaded from the preferences file if not
+        given). The times are local mean solar time at the telescope, or
+        if the preferences have a 'utcOffset' (e.g. '-7:00' for PDT), the
+        clock time of that time zone (see clockDescription).
+        The start and stop times it returns are always local mean solar 
+        time, which is what the constraints use.
+        Returns a dictionary with the startHA and stopHA, startTime and
+        stopTime (hhmmss.s), date and endDate (the start and end of the 
+        night as astropy Times, in UTC), latitude and decWidth (ddmmss.s).
+        See CatalogSession.setInputs.
+    '''
+    from astropy.time import Time
+    from astropy import units as u
+    if preferences is None:
+        preferences = loadPreferences()
+
+    # The times are clock times, so shift them to UTC
+    longitude = WDS_Sexagesimal.colonToDecimal(preferences['longitude'])
+    utcOffset = preferences.get('utcOffset')
+    if utcOffset is not None:
+        utcOffset = WDS_Sexagesimal.colonToDecimal(utcOffset)
+    date = WDS_Sidereal.clockTimeToUtc(Time(dateString + ' ' + startTime, format='iso', scale='utc'),
+                                       longitude, utcOffset)
+
+    # The end of the night is the stop time on the same date, or on the 
+    # next day if the stop time is before the start time
+    midnight = Time(dateString, format='iso', scale='utc')
+    startHours = WDS_Sexagesimal.hhmmssToDecimal(parseTimeInput(startTime))
+    stopHours = WDS_Sexagesimal.hhmmssToDecimal(parseTimeInput(stopTime))
+    if stopHours <= startHours:
+        stopHours = stopHours + 24.0
+    endDate = WDS_Sidereal.clockTimeToUtc(midnight + float(stopHours) * u.hour, longitude, utcOffset)
+
+    # The constraints work in local mean solar time, so time zone clock
+    # times are moved to it
+    startTime = parseTimeInput(startTime)
+    stopTime = parseTimeInput(stopTime)
+    if utcOffset is not None:
+        shift = longitude / 15.0 - utcOffset
+        startTime = WDS_Sexagesimal.decimalToHhmmss((WDS_Sexagesimal.hhmmssToDecimal(startTime) + shift) % 24.0)
+        stopTime = WDS_Sexagesimal.decimalToHhmmss((WDS_Sexagesimal.hhmmssToDecimal(stopTime) + shift) % 24.0)
+
+    # Hour Angle start and stop
+    startHA = startTime - preferenceToHhmmss(preferences['eastHA']) # TODO fix hhmmss arithmetic
+    stopHA = stopTime + preferenceToHhmmss(preferences['westHA'])
+
+    # Location (dec) constraints
+    # TODO Make asymmetric dec width
+    return {'startHA': startHA, 'stopHA': stopHA,
+            'startTime': startTime, 'stopTime': stopTime,
+            'date': date, 'endDate': endDate,
+            'latitude': preferenceToHhmmss(preferences['latitude']),
+            'decWidth': preferenceToHhmmss(preferences['+dec'])}
+
+
+def calcAirmasses(ra, dec, date, preferences=None, chunkSize=5000, progress=None):
+    '''
+        Calculates the airmass (secz) of many stars at once, at the 
+        telescope's location (from the preferences) at the time date.
+        Takes arrays of RA and Dec in decimal degrees, and returns 
+        an array of secz. 
+        All of the stars are converted to one SkyCoord and transformed to a
+        single AltAz frame, in chunks of chunkSize stars. After each chunk
+        progress(done, total) is called, if given.
+        For stars with Dec >= 0 this agrees with the old one-star-at-a-time 
+        calculation to better than 1e-9 in secz. For Dec < 0 the old 
+        calculation got the sign of the Dec wrong; this one doesn't.
+    '''
+    from astropy import units as u
+    from astropy.coordinates import SkyCoord, AltAz
+    ra = np.ravel(ra)
+    dec = np.ravel(dec)
+    secz = np.zeros(len(ra))
+
+    # Everything that is the same for all stars is only made once
+    frame = AltAz(location=observingLocation(preferences), obstime=date)
+
+    for start in range(0, len(ra), chunkSize):
+        stop = min(start + chunkSize, len(ra))
+        starPos = SkyCoord(ra[start:stop], dec[start:stop], unit=(u.deg, u.deg))
+        secz[start:stop] = starPos.transform_to(frame).secz.value
+        if progress is not None:
+            progress(stop, len(ra))
+
+    return secz
+
+
+class QueryCancelled(Exception):
+    '''
+        Raised by CatalogSession.constrain when it is cancelled part way
+        through (see its cancel argument).
+    '''
+    pass
+
+
+def checkCancelled(cancel, stage):
+    '''
+        Raises QueryCancelled if the threading.Event cancel (if there is
+        one) has been set, before the step of a query called stage.
+    '''
+    if cancel is not None and cancel.is_set():
+        raise QueryCancelled("The query was cancelled before " + stage)
+
+
+def progressStep(stage, progress=None, cancel=None):
+    '''
+        Makes a progress(done, total) function for one slow step of a 
+        query (e.g. the airmasses) called stage. It passes the progress on
+        as progress(stage, done, total), if progress is given, and raises 
+        QueryCancelled if the threading.Event cancel has been set.
+        If neither is given, shows a progress bar in the terminal instead
+        (if the progress package is installed).
+        Returns the function, and a function to call when the step is done.
+    '''
+    global progressInstalled
+    if progress is None and cancel is None:
+        if not progressInstalled:
+            return None, lambda: None
+        try:
+            from progress.bar import Bar
+        except ImportError:
+            print("Install 'progress' for helpful loading bars!")
+            progressInstalled = False
+            return None, lambda: None
+        bar = {}
+        def step(done, total):
+            if 'bar' not in bar and total > 0:
+                bar['bar'] = Bar(stage, max=total)
+            if 'bar' in bar:
+                bar['bar'].goto(done)
+        def finish():
+            if 'bar' in bar:
+                bar['bar'].finish()
+        return step, finish
+
+    def step(done, total):
+        if cancel is not None and cancel.is_set():
+            raise QueryCancelled(stage + " was cancelled")
+        if progress is not None:
+            progress(stage, done, total)
+    return step, lambda: None
+
+
+class ResultSet(object):
+    '''
+        The result of a query: the row numbers of the matching stars in the
+        catalog table (master), plus any columns calculated just for those
+        stars (e.g. secz), by name. 
+        Nothing is copied out of the catalog until it's asked for, so a
+        result costs a few bytes per matching star rather than a copy of
+        every column. Looking up a column name gives the values of that 
+        column for the matching stars; table() makes an astropy Table of
+        them, e.g. to show or save.
+        The arrays of a ResultSet are never changed in place (sorting makes
+        new ones), so they can be shared, e.g. with the result cache.
+    '''
+
+    def __init__(self, master, rows=None, columns=None):
+        self.master = master
+        if rows is None:
+            rows = np.arange(len(master))
+        self.rows = np.asarray(rows, dtype=np.intp)
+        # Calculated columns, in the order they were added
+        self.columns = OrderedDict()
+        for name in (columns or {}):
+            self.addColumn(name, columns[name])
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, name):
+        return name in self.columns or name in self.master.colnames
+
+    def __getitem__(self, name):
+        if name in self.columns:
+            return self.columns[name]
+        return self.master[name][self.rows]
+
+    def __str__(self):
+        return str(self.table())
+
+    @property
+    def colnames(self):
+        '''
+            The names of the catalog columns followed by the calculated ones.
+        '''
+        return self.master.colnames + list(self.columns)
+
+    def addColumn(self, name, data):
+        '''
+            Adds (or replaces) a calculated column, with one value per 
+            matching star.
+        '''
+        data = np.asarray(data)
+        if len(data) != len(self.rows):
+            raise ValueError("Column " + name + " has " + str(len(data)) + " values for "
+                             + str(len(self.rows)) + " rows")
+        self.columns[name] = data
+
+    def sort(self, colName):
+        '''
+            Sorts the matching stars by the values of a column (catalog or
+            calculated). Stars with equal values keep their order.
+        '''
+        order = np.argsort(self[colName], kind='mergesort')
+        self.rows = self.rows[order]
+        for name in self.columns:
+            self.columns[name] = self.columns[name][order]
+
+    def table(self, names=None, start=None, stop=None):
+        '''
+            Makes an astropy Table of the matching stars, with the columns
+            in names (all of them, catalog and calculated, by default).
+            Optionally only of the matching stars start to stop, e.g. to 
+            save a big result a chunk at a time (see WDS_Export).
+        '''
+        import astropy.table
+        if names is None:
+            names = self.colnames
+        rows = self.rows[start:stop]
+        columns = []
+        for name in names:
+            if name in self.columns:
+                columns.append(astropy.table.Column(data=self.columns[name][start:stop], name=name))
+            else:
+                columns.append(self.master[name][rows])
+        return astropy.table.Table(columns, masked=self.master.masked)
+
+    def nbytes(self):
+        '''
+            Gets the memory used by the row numbers and calculated columns.
+        '''
+        return self.rows.nbytes + sum(self.columns[name].nbytes for name in self.columns)
+
+
+class Catalog(object):
+    '''
+        The WDS catalog, and the indexes of it that queries use, shared by
+        any number of CatalogSessions.
+        The table is loaded from filename the first time it is needed
+        (unless it is given), or in the background with prefetch. It is 
+        never modified after it is loaded: sessions only read it, and pick
+        their results out of it as new tables. The indexes are made the 
+        first time they are needed, under a lock, so sessions in different
+        threads can share one catalog.
+    '''
+
+    def __init__(self, filename='WDS_CSV_cat.txt', table=None):
+        self.filename = filename
+        self._table = table
+        # Held while the table is loading, so anything else which needs it
+        # waits for that load instead of starting another
+        self.loadLock = threading.Lock()
+        self.lock = threading.RLock()
+        # Range indexes on the columns of the table, by constraint name
+        self.rangeIndexes = {}
+        # Spatial index of the positions in the table
+        self.zoneIndex = None
+        # KD-tree of the positions in the table, for cone searches
+        self.skyTree = None
+        # Visibility indexes of the table that have been loaded, by preferences
+        self.visibilityIndexes = {}
+        # Recent results of constrain, so asking again is instant
+        self.resultCache = WDS_Cache.ResultCache()
+
+    @property
+    def table(self):
+        '''
+            The catalog table. Loads it if it isn't loaded yet, or waits 
+            for it if it is loading on another thread (see prefetch).
+        '''
+        if self._table is None:
+            self.load()
+        return self._table
+
+    def isLoaded(self):
+        '''
+            Checks whether the table has been loaded yet.
+        '''
+        return self._table is not None
+
+    def load(self):
+        '''
+            Loads the table from the catalog file (or the cache of it, see
+            loadWds), unless it is already loaded, and returns it.
+        '''
+        with self.loadLock:
+            if self._table is None:
+                self._table = loadWds(self.filename)
+        return self._table
+
+    def prefetch(self, done=None):
+        '''
+            Starts loading the table on a background thread, so it's ready
+            (or closer to it) by the time it is needed. Anything which 
+            needs it sooner waits for the load to finish.
+            If done is given, it is called on that thread when the load 
+            finishes, with the error if there was one (None if not).
+        '''
+        def prefetchWorker():
+            error = None
+            try:
+                self.load()
+            except Exception as loadError:
+                error = loadError
+            if done is not None:
+                done(error)
+
+        thread = threading.Thread(target=prefetchWorker)
+        # Don't keep the program open just to finish loading
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def getRangeIndexes(self):
+        '''
+            Gets the range indexes (see WDS_Index.RangeIndex) on the columns
+            of the table which constrain uses, by constraint name.
+        '''
+        with self.lock:
+            if not self.rangeIndexes:
+                rangeIndexes = {}
+                rangeIndexes['separation'] = WDS_Index.RangeIndex(self.table[sepFirst])
+                rangeIndexes['magnitude'] = WDS_Index.RangeIndex(self.table[priMag])
+                rangeIndexes['delta magnitude'] = WDS_Index.RangeIndex(calcDeltaMags(self.table))
+                self.rangeIndexes = rangeIndexes
+            return self.rangeIndexes
+
+    def getZoneIndex(self):
+        '''
+            Gets the spatial index (see WDS_Index.ZoneIndex) of the RA and
+            Dec of the table, for finding the stars in a region of the sky.
+        '''
+        with self.lock:
+            if self.zoneIndex is None:
+                self.zoneIndex = WDS_Index.ZoneIndex(self.table[raDegrees], self.table[decDegrees])
+            return self.zoneIndex
+
+    def getSkyTree(self):
+        '''
+            Gets the KD-tree (see WDS_Index.SkyTree) of the RA and Dec of
+            the table, for cone searches and nearest neighbours.
+        '''
+        with self.lock:
+            if self.skyTree is None:
+                self.skyTree = WDS_Index.SkyTree(self.table[raDegrees], self.table[decDegrees])
+            return self.skyTree
+
+    def getVisibilityIndex(self, preferences):
+        '''
+            Gets the rise/transit/set visibility index of the table for the
+            telescope in the preferences (see WDS_Visibility.calcVisibilityIndex).
+            Uses the latitude, the viewing range in Dec and HA, and the lowest
+            altitude to observe at ('minAltitude', 30 degrees if not set).
+            The index is cached next to the catalog for each set of preferences,
+            and rebuilt if the catalog has changed since.
+        '''
+        # Only the preferences the index depends on go in the key
+        key = {}
+        for name in ['latitude', '+dec', '-dec', 'eastHA', 'westHA']:
+            key[name] = preferences[name]
+        key['minAltitude'] = preferences.get('minAltitude', '30:00:00.0')
+        keyString = json.dumps(key, sort_keys=True)
+
+        # Load the table first, which also checks the catalog's cache is up
+        # to date, so an index of an older catalog is never used
+        table = self.table
+        with self.lock:
+            index = self.visibilityIndexes.get(keyString)
+            if index is None or len(index['transit']) != len(table):
+                latitude = WDS_Sexagesimal.colonToDecimal(key['latitude'])
+                def buildIndex():
+                    return WDS_Visibility.calcVisibilityIndex(np.asarray(table[raDegrees]) / 15.0,
+                                                              np.asarray(table[decDegrees]),
+                                                              latitude,
+                                                              WDS_Sexagesimal.colonToDecimal(key['minAltitude']),
+                                                              WDS_Sexagesimal.colonToDecimal(key['eastHA']),
+                                                              WDS_Sexagesimal.colonToDecimal(key['westHA']),
+                                                              latitude + WDS_Sexagesimal.colonToDecimal(key['+dec']),
+                                                              latitude - WDS_Sexagesimal.colonToDecimal(key['-dec']))
+                index = WDS_Cache.loadCachedArrays(self.filename, 'visibility', key, buildIndex, len(table))
+                self.visibilityIndexes[keyString] = index
+            return index
+
+
+class CatalogSession(object):
+    '''
+        One query of a Catalog: its own constraints, observing date,
+        telescope preferences, and results (interesting and interestingHere).
+        Sessions never change the catalog or each other, so several (e.g.
+        for different nights or telescopes) can be used at once, each from
+        its own thread. A single session is locked while it constrains.
+        If preferences is None they are loaded from the preferences file
+        whenever they are needed.
+    '''
+
+    def __init__(self, catalog, preferences=None):
+        self.catalog = catalog
+        self.preferences = preferences
+        self.lock = threading.RLock()
+        # Constraints is the actual numbers -- upper and lower bounds for
+        # different properties.
+        self.constraints = {}
+        # The observing date (the start of the run), now if it isn't set
+        # (see observingDate)
+        self._observingDate = None
+        # The end of the observing night, used for the whole-night visibility
+        self.observingEndDate = None
+        # The sub-catalog we want (narrowed down by constrain) and the
+        # sub-sub catalog of the interesting stars that we can view, 
+        # as ResultSets of the catalog table. None means the whole catalog
+        # (see interesting), so a session can be made before it's loaded.
+        self._interesting = None
+        self._interestingHere = None
+        # Remembers the rows matching each constraint, so constrain only
+        # redoes the constraints which changed
+        self.engine = None
+
+    @property
+    def observingDate(self):
+        '''
+            The observing date (the start of the run) used for the 
+            airmass, as an astropy Time. Until it is set, this is the time
+            it was first asked for.
+        '''
+        if self._observingDate is None:
+            from astropy.time import Time
+            self._observingDate = Time.now()
+        return self._observingDate
+
+    @observingDate.setter
+    def observingDate(self, date):
+        self._observingDate = date
+
+    @property
+    def interesting(self):
+        '''
+            The stars which match the star constraints, as a ResultSet.
+            Before constrain is run this is all of the catalog, which is 
+            only made (loading the catalog) when it's asked for.
+        '''
+        if self._interesting is None:
+            self._interesting = ResultSet(self.catalog.table)
+        return self._interesting
+
+    @interesting.setter
+    def interesting(self, results):
+        self._interesting = results
+
+    @property
+    def interestingHere(self):
+        '''
+            The interesting stars which can be seen, as a ResultSet.
+            Before constrain is run this is all of the catalog (see 
+            interesting).
+        '''
+        if self._interestingHere is None:
+            self._interestingHere = ResultSet(self.catalog.table)
+        return self._interestingHere
+
+    @interestingHere.setter
+    def interestingHere(self, results):
+        self._interestingHere = results
+
+    def setInputs(self, inputs):
+        '''
+            Sets all of the constraints at once from a dictionary of inputs,
+            like the ones nightInputs makes (with separation, magnitude and
+            deltaMag added to it for the star constraints, which are left 
+            as they are if they aren't in it).
+        '''
+        self.setTimeConstraints(startHA=inputs['startHA'], stopHA=inputs['stopHA'], date=inputs['date'])
+        self.setLocationConstraints(latitude=inputs['latitude'], viewWidth=inputs['decWidth'])
+        self.setVisibilityConstraints(startTime=inputs['startTime'], stopTime=inputs['stopTime'], date=inputs['date'])
+        if 'separation' in inputs:
+            self.setStarConstraints(separation=inputs['separation'], magnitude=inputs['magnitude'], deltaMag=inputs['deltaMag'])
+        self.setDate(inputs['date'], inputs['endDate'])
+
+    def getPreferences(self):
+        '''
+            Gets the telescope preferences of this session.
+        '''
+        if self.preferences is None:
+            return loadPreferences()
+        return self.preferences
+
+    def getLongitude(self):
+        '''
+            Gets the telescope's longitude in degrees east from the preferences.
+        '''
+        return WDS_Sexagesimal.colonToDecimal(self.getPreferences()['longitude'])
+
+    def getSmallerWdsInterestingHereString(self, colWidth = 20, colonSeparated = True):
+        '''
+            Gets a string of the  WDS table constrained to what stars
+            are both interesting and viewable. Returns only the columns with
+            specified names. (Those are assumed to be the columns of
+            interest.)
+        '''
+        with WDS_Timing.span('getSmallerWdsInterestingHereString', rows=len(self.interestingHere)):
+            # Only these columns are taken out of the catalog
+            return tableToString(self.interestingHere.table(self.getDisplayColumns()),
+                                 colWidth, colonSeparated)
+
+    def getDisplayColumns(self):
+        '''
+            Gets the names of the columns of interestingHere which are 
+            shown (see displayColNames), with secz if it has been calculated.
+        '''
+        if 'secz' in self.interestingHere.colnames:
+            return displayColNames + ['secz']
+        return list(displayColNames)
+
+    def setStarConstraints(self, separation=(2.0, 0.5), magnitude=(7.0, -10.0), deltaMag=(2.0, -2.0)):
+        '''
+            Set the upper and lower bounds for the constraints which
+            are relevant to star properties. (Does not constrain the wds list.)
+            Takes tuples in the format of and (upper, lower) pair of bounds.
+            The constraining properties are separation, magnitude, and deltaMag.
+        '''
+        self.constraints['separation'] = separation
+        self.constraints['magnitude'] = magnitude
+        self.constraints['delta magnitude'] = deltaMag
+
+    def setTimeConstraints(self, startHA=190000.0, stopHA=240000.0, date=None):
+        '''
+            Set the upper and lower bounds for the constraints which
+            are relevant to viewing time. (Does not constrain the wds list.)
+            Takes floats for startHA, stopHA. Takes an astropy Time object
+            for the date (now if not given).
+        '''
+        if date is None:
+            from astropy.time import Time
+            date = Time.now()
+        siderealAdjust = calcSiderealAdjustment(longitude = self.getLongitude(), time = date)
+
+        #startRA = startHA + siderealAdjust # TODO check math
+        #stopRA = stopHA + siderealAdjust
+        startRA = hhmmssAdd(startHA, siderealAdjust) # TODO check math
+        stopRA = hhmmssAdd(stopHA, siderealAdjust)
+
+        # Account for the 24 hour clock, and roll over if we pass midnight on either
+        if startRA > 240000.0:
+            startRA = startRA - 240000.0
+        if stopRA > 240000.0:
+            stopRA = stopRA - 240000.0
+
+        # If the inputs are negative, also roll over those
+        if startRA < 0:
+            startRA = 240000.0 + startRA
+        if stopRA < 0:
+            stopRA = 240000.0 + stopRA
+
+        # the stop time is the "upper bound", so it's first in the tuple
+        self.constraints['ra'] = (stopRA, startRA)
+
+    def setLocationConstraints(self, latitude=340000.0, viewWidth=350000.0):
+        '''
+            Set the upper and lower bounds for the constraints which
+            are relevant to viewing location. (Does not constrain the wds list.)
+            Takes floats for laitude and viewWidth. Both are in deg:min:sec format.
+            The videWidth is how much +- you want to give to the laitude for stars.
+        '''
+        # Limit the declination to within 3 h = 35 deg of overhead
+        # Using JPL's latitude, 34.2 deg = 34 deg
+        northDec = latitude + viewWidth
+        southDec = latitude - viewWidth
+
+        # Check rollover for dec constraints
+        if northDec > 900000:
+            northDec = 900000
+        if southDec < -900000:
+            southDec = -900000
+
+        # the north dec is the "upper bound", so it's first in the tuple
+        self.constraints['dec'] = (northDec, southDec)
+
+    def setVisibilityConstraints(self, startTime=180000.0, stopTime=240000.0, date=None):
+        '''
+            Set the start and stop of the observing run for the visibility
+            index (see Catalog.getVisibilityIndex). (Does not constrain the
+            wds list.) Takes floats for startTime and stopTime, in hhmmss.s.
+            Takes an astropy Time object for the date (now if not given).
+            When these are set, constrain uses the visibility index instead of
+            the ra and dec constraints: a star is kept if it is above the
+            lowest altitude, and inside the telescope's limits, at some time
+            between startTime and stopTime.
+        '''
+        if date is None:
+            from astropy.time import Time
+            date = Time.now()
+        siderealAdjust = calcSiderealAdjustment(longitude = self.getLongitude(), time = date)
+        startLST = hhmmssAdd(startTime, siderealAdjust)
+        stopLST = hhmmssAdd(stopTime, siderealAdjust)
+
+        # the stop time is the "upper bound", so it's first in the tuple
+        self.constraints['visibility'] = (stopLST % 240000.0, startLST % 240000.0)
+
+    def setDate(self, date, endDate=None):
+        '''
+            Sets the observing date (the start of the run) used for the
+            airmass, and optionally the end of the night, which is needed for
+            the whole-night visibility columns. Both are astropy Time objects.
+        '''
+        self.observingDate = date
+        self.observingEndDate = endDate
+
+    def addAirmassCol(self, progress=None, cancel=None):
+        '''
+            Add a columns to the WDS table which is the calculated airmass for
+            each object based off of its RA Dec and the location and time of
+            the constrain.
+            Reports its progress, and can be cancelled between chunks of
+            stars, see progressStep.
+        '''
+        with WDS_Timing.span('addAirmassCol', rows=len(self.interestingHere)):
+            # These calculations may take some time depending on how long the catalog is,
+            # so show the progress (by default with a progress bar if the program 
+            # imported the progess package)
+            step, finish = progressStep('Calculating airmasses', progress, cancel)
+            if step is not None:
+                step(0, len(self.interestingHere))
+            print("Airmass calculated with date ", self.observingDate)
+
+            secz = calcAirmasses(self.interestingHere[raDegrees], self.interestingHere[decDegrees],
+                                 self.observingDate, self.getPreferences(), progress=step)
+
+            # Add the array as new column to the result
+            self.interestingHere.addColumn('secz', secz)
+            finish()
+
+        return self.interestingHere
+
+    def getVisibilityIndex(self):
+        '''
+            Gets the visibility index of the catalog for this session's
+            telescope (see Catalog.getVisibilityIndex).
+        '''
+        return self.catalog.getVisibilityIndex(self.getPreferences())
+
+    def getConstraintEngine(self):
+        '''
+            Gets the constraint engine (see WDS_Index.ConstraintEngine) that
+            constrain uses, with the range indexes of the star properties and
+            the spatial index of the catalog as its predicates.
+            Each session has its own, since it remembers the last query.
+        '''
+        if self.engine is None:
+            predicates = dict(self.catalog.getRangeIndexes())
+            predicates['box'] = self.catalog.getZoneIndex()
+            self.engine = WDS_Index.ConstraintEngine(predicates)
+        return self.engine
+
+    def starConstraintFilter(self):
+        '''
+            Makes a function which takes an array of row numbers of the
+            catalog and returns which of them match the star constraints
+            (separation, magnitude and delta magnitude) that have been set.
+            Returns None if none of them are set.
+        '''
+        indexes = self.catalog.getRangeIndexes()
+        bounds = dict((name, self.constraints[name]) for name in indexes if name in self.constraints)
+        if not bounds:
+            return None
+
+        def allowed(rows):
+            inside = np.ones(len(rows), dtype=bool)
+            for name in bounds:
+                inside &= indexes[name].contains(rows, *bounds[name])
+            return inside
+        return allowed
+
+    def coneSearch(self, ra, dec, radius=None, k=None, useConstraints=True):
+        '''
+            Finds the stars around a pointing at ra, dec (in decimal degrees).
+            Gives the stars within radius degrees, or the k nearest stars, or
+            the k nearest within radius degrees if both are given.
+            If useConstraints is True only stars which match the star
+            constraints (see setStarConstraints) are included.
+            Returns the stars as a ResultSet, sorted by angular distance 
+            from the pointing, with the distance in degrees added as a 
+            column.
+        '''
+        if radius is None and k is None:
+            raise ValueError("coneSearch needs a radius, a number of stars (k), or both")
+
+        allowed = self.starConstraintFilter() if useConstraints else None
+        tree = self.catalog.getSkyTree()
+        if k is None:
+            rows, distances = tree.cone(ra, dec, radius, allowed=allowed)
+        else:
+            rows, distances = tree.nearest(ra, dec, k, radius=180.0 if radius is None else radius, allowed=allowed)
+
+        return ResultSet(self.catalog.table, rows, {distanceCol: distances})
+
+    def calcNightVisibility(self, step=10, airmassCap=2.0, progress=None):
+        '''
+            Calculates the altitude, airmass and hour angle of every star in
+            interestingHere every step minutes between the observing date
+            and the end of the night (see setDate).
+            Returns the grid and its per-star summary as a tuple of two
+            dictionaries (see WDS_Visibility.calcVisibilityGrid and
+            WDS_Visibility.summarizeGrid).
+        '''
+        if self.observingEndDate is None:
+            raise ValueError("The end of the night is not set, use setDate(date, endDate)")
+
+        times = WDS_Visibility.nightTimes(self.observingDate, self.observingEndDate, step)
+        grid = WDS_Visibility.calcVisibilityGrid(np.asarray(self.interestingHere[raDegrees]) / 15.0,
+                                                 np.asarray(self.interestingHere[decDegrees]),
+                                                 times, observingLocation(self.getPreferences()),
+                                                 progress=progress)
+        return grid, WDS_Visibility.summarizeGrid(grid, airmassCap)
+
+    def addVisibilityCols(self, step=10, airmassCap=2.0, progress=None, cancel=None):
+        '''
+            Add columns to the WDS table with the whole-night visibility of
+            each object: its best airmass of the night (MinSecz), when that is
+            (BestTime), and for how many minutes it is below an airmass of
+            airmassCap (MinsObservable). The night is sampled every step minutes.
+            Reports its progress, and can be cancelled between chunks of
+            stars, see progressStep.
+        '''
+        with WDS_Timing.span('addVisibilityCols', rows=len(self.interestingHere)):
+            print("Visibility calculated from ", self.observingDate, " to ", self.observingEndDate)
+            chunkStep = None
+            if progress is not None or cancel is not None:
+                chunkStep, finish = progressStep('Calculating visibility', progress, cancel)
+                chunkStep(0, len(self.interestingHere))
+            grid, summary = self.calcNightVisibility(step, airmassCap, progress=chunkStep)
+
+            for name in ['MinSecz', 'BestTime', 'MinsObservable']:
+                self.interestingHere.addColumn(name, summary[name])
+
+        return self.interestingHere
+
+    def constrainKey(self, airmass=False, visibility=False):
+        '''
+            Makes the catalog's resultCache key for constraining with this
+            session's constraints and preferences. The observing date and
+            end of the night are only part of the key if the airmass or
+            visibility columns need them.
+        '''
+        key = {'constraints': self.constraints, 'preferences': self.getPreferences(),
+               'airmass': airmass, 'visibility': visibility}
+        if airmass or visibility:
+            key['date'] = self.observingDate.utc.isot
+        if visibility:
+            key['endDate'] = None if self.observingEndDate is None else self.observingEndDate.utc.isot
+        return WDS_Cache.normalizeKey(key)
+
+    def constrain(self, airmass = False, visibility = False, progress=None, cancel=None):
+        '''
+            Limits the WDS table to only stars that match our criteria.
+            Creates interesting and interestingHere ResultSets which have been
+            constrained by star properties or by star properties and
+            star location (in time).
+            Does not modify the catalog.
+            Has no returns, instead sets interesting and interestingHere.
+            The matching rows and any airmass/visibility columns are kept in
+            the catalog's resultCache, so constraining the same way again
+            (in any session) is instant.
+            If progress is given, it is called as progress(stage, done, total)
+            during the slow steps. If cancel (a threading.Event) is set while
+            constraining, QueryCancelled is raised and the results are left
+            as they were.
+            Each step is timed, with the number of rows it left (see 
+            WDS_Timing.span).
+        '''
+        with WDS_Timing.span('constrain', airmass=airmass, visibility=visibility) as stage:
+            with self.lock:
+                previous = (self.interesting, self.interestingHere)
+                try:
+                    self._constrain(airmass, visibility, progress, cancel)
+                except QueryCancelled:
+                    self.interesting, self.interestingHere = previous
+                    raise
+                stage['rows'] = len(self.interestingHere)
+
+    def _constrain(self, airmass, visibility, progress, cancel):
+        '''
+            Does the work of constrain, with the session locked.
+        '''
+        checkCancelled(cancel, "it started")
+        master = self.catalog.table
+        constraints = self.constraints
+
+        # Print what we are constraining with so it seems a bit responsive before
+        # the long processing
+        print("Constraining WDS with: ", constraints)
+
+        key = self.constrainKey(airmass, visibility)
+        with WDS_Timing.span('result cache') as stage:
+            cached = self.catalog.resultCache.get(key)
+            stage['hit'] = cached is not None
+        if cached is not None:
+            print("Using the saved result of the same constraints")
+            # ResultSets share the saved arrays, but never change them 
+            # (e.g. sorting makes new ones), so they can't change the cache
+            self.interesting = ResultSet(master, cached['generalRows'])
+            self.interestingHere = ResultSet(master, cached['hereRows'])
+            for name in ['secz', 'MinSecz', 'BestTime', 'MinsObservable']:
+                if name in cached:
+                    self.interestingHere.addColumn(name, cached[name])
+            return
+
+        with WDS_Timing.span('star constraints') as stage:
+            # Make a dictionary of the bounds for each of the star properties.
+            # Each one is looked up in the range index of its column, by the
+            # constraint engine, which only redoes the ones that changed.
+            engine = self.getConstraintEngine()
+            bounds = {}
+            bounds['separation'] = constraints['separation']
+            bounds['magnitude'] = constraints['magnitude']
+            ## TODO Add color of stars as a thing
+            bounds['delta magnitude'] = constraints['delta magnitude']
+
+            generalRows = engine.query(bounds)
+            stage['rows'] = len(generalRows)
+
+        # (the visibility index may have to be made, which takes a while)
+        checkCancelled(cancel, "the position constraints")
+        with WDS_Timing.span('position constraints') as stage:
+            # If we know the start and stop of the run, use the visibility index
+            # for where the stars are rather than the ra and dec windows
+            if 'visibility' in constraints:
+                stopLST, startLST = WDS_Sexagesimal.hhmmssToDecimal(constraints['visibility'])
+                index = self.getVisibilityIndex()
+                # A different index (e.g. new preferences) starts the rows over
+                if 'visibility' not in engine.predicates or engine.predicates['visibility'].index is not index:
+                    engine.setPredicate('visibility', WDS_Visibility.VisibilityPredicate(index))
+                bounds['visibility'] = (startLST, stopLST)
+            else:
+                # The constraints are in hhmmss.s, so convert them (not the
+                # table) to decimal degrees to compare with the RA and Dec
+                raUpper, raLower = WDS_Sexagesimal.hhmmssToDecimal(constraints['ra']) * 15.0
+                decUpper, decLower = WDS_Sexagesimal.hhmmssToDecimal(constraints['dec'])
+
+                # Limit the viewing to times/HA/RA that are acceptable, and the
+                # declination to within 3 h = 35 deg of overhead, by looking up
+                # that box of the sky in the spatial index.
+                # If the stop time is less than the start, we have crossed over the
+                # midnight mark, and the box wraps around through RA 0.
+                bounds['box'] = (raLower, raUpper, decLower, decUpper)
+
+            hereRows = engine.query(bounds)
+            stage['rows'] = len(hereRows)
+
+        # Apply the limits to the catalog, which only keeps the row numbers
+        self.interesting = ResultSet(master, generalRows)
+        self.interestingHere = ResultSet(master, hereRows)
+
+        checkCancelled(cancel, "the airmasses")
+        # If we are told to do so, make an airmass column for the table
+        if airmass:
+            self.addAirmassCol(progress, cancel)
+        # and the whole-night visibility columns
+        if visibility:
+            self.addVisibilityCols(progress=progress, cancel=cancel)
+
+        # Save the result for next time
+        result = {'generalRows': generalRows, 'hereRows': hereRows}
+        for name in ['secz', 'MinSecz', 'BestTime', 'MinsObservable']:
+            if name in self.interestingHere.columns:
+                result[name] = self.interestingHere.columns[name]
+        self.catalog.resultCache.put(key, result)
+
+    def sortWdsInterestingHere(self, colName=raCoors):
+        '''
+            Sorts the interestingHere table based on a column.
+            The default column to sort by is the RA coordinates.
+        '''
+        print(self.interestingHere)
+        print(colName)
+        self.interestingHere.sort(colName)
+        print(self.interestingHere)
+
+    def export(self, target, format=None, names=None, here=True, **options):
+        '''
+            Saves the results to target, a filename or an open file, in
+            one of the WDS_Export.exportFormats (by default the one the 
+            extension of the filename is for, e.g. .csv). Saves 
+            interestingHere, or interesting if here is False, with the 
+            columns in names (all of them by default). Any other options 
+            (chunkSize, colWidth, colonSeparated) go to WDS_Export.export.
+        '''
+        if here:
+            results = self.interestingHere
+        else:
+            results = self.interesting
+        WDS_Export.export(results, target, format, names, **options)
+
+    def write(self, filename='object_list.txt', format=None):
+        '''
+            Writes the contents of interesting to a file, with every
+            column. The format comes from the extension of the filename
+            (see export); the default filename is object_list.txt, which
+            is a text table.
+        '''
+        self.export(filename, format, here=False)
+
+
+# The module functions below work on a default session of the default
+# catalog (made at the end of this file), which the GUI uses. Its state
+# is mirrored in the module globals wdsMaster, wdsInteresting,
+# wdsInterestingHere, constraints, observing_date and observing_end_date,
+# so older scripts which use (or set) those directly keep working.
+# The catalog isn't loaded when this file is imported, so the tables are
+# None until it is (see getWdsMaster).
+
+def _toDefaultSession():
+    '''
+        Copies the module globals into the default session.
+    '''
+    defaultSession.constraints = constraints
+    # (not the observingDate property, which would make None into now)
+    defaultSession._observingDate = observing_date
+    defaultSession.observingEndDate = observing_end_date
+    defaultSession.interesting = wdsInteresting
+    defaultSession.interestingHere = wdsInterestingHere
+
+def _fromDefaultSession():
+    '''
+        Copies the default session back into the module globals.
+    '''
+    global constraints
+    global observing_date
+    global observing_end_date
+    global wdsInteresting
+    global wdsInterestingHere
+    global wdsMaster
+    constraints = defaultSession.constraints
+    # None until it is set, so reading it doesn't import astropy and fix
+    # "now" before the query runs
+    observing_date = defaultSession._observingDate
+    observing_end_date = defaultSession.observingEndDate
+    # Only once the catalog is loaded, so just setting constraints 
+    # doesn't load it
+    if catalog.isLoaded():
+        wdsMaster = catalog.table
+        wdsInteresting = defaultSession.interesting
+        wdsInterestingHere = defaultSession.interestingHere
+
+def newSession(preferences=None):
+    '''
+        Makes a new CatalogSession of the default catalog, with its own
+        constraints, date and results.
+    '''
+    return CatalogSession(catalog, preferences)
+
+def getWdsInterestingHere():
+    '''
+        Gets the WDS table constrained to what stars are both
+        interesting and viewable.
+    '''
+    global wdsInterestingHere
+    getWdsMaster()
+    return wdsInterestingHere
+
+def getWdsInteresting():
+    '''
+        Gets the WDS table constrained to what stars are interesting.
+    '''
+    global wdsInteresting
+    getWdsMaster()
+    return wdsInteresting
+
+def getWdsMaster():
+    '''
+        Gets the master WDS table, loading it if it isn't loaded yet.
+    '''
+    global wdsMaster
+    if wdsMaster is None:
+        _toDefaultSession()
+        catalog.load()
+        _fromDefaultSession()
+    return wdsMaster
+
+def prefetchCatalog(done=None):
+    '''
+        Starts loading the WDS catalog in the background (see 
+        Catalog.prefetch). Anything which needs it waits for it.
+    '''
+    return catalog.prefetch(done)
+
+# Added by shale 2017-01-30: Same default colWidth as tableToString, but changeable
+def getSmallerWdsInterestingHereString(colWidth = 20, colonSeparated = True):
+    '''
+        Gets a string of the  WDS table constrained to what stars
+        are both interesting and viewable. Returns only the columns with
+        specified names. (Those are assumed to be the columns of
+        interest.)
+    '''
+    _toDefaultSession()
+    return defaultSession.getSmallerWdsInterestingHereString(colWidth, colonSeparated)
+
 def setStarConstraints(separation=(2.0, 0.5), magnitude=(7.0, -10.0), deltaMag=(2.0, -2.0)):
     '''
-        Set the upper and lower bounds for the constraints which 
+        Set the upper and lower bounds for the constraints which
         are relevant to star properties. (Does not constrain the wds list.)
-        Takes tuples in the format of and (upper, lower) pair of bounds. 
-        The constraining properties are separation, magnitude, and deltaMag. 
+        See CatalogSession.setStarConstraints.
     '''
-    global constraints
-    
-    constraints['separation'] = separation
-    constraints['magnitude'] = magnitude
-    constraints['delta magnitude'] = deltaMag
-    
+    _toDefaultSession()
+    defaultSession.setStarConstraints(separation, magnitude, deltaMag)
+    _fromDefaultSession()
 
-def setTimeConstraints(startHA=190000.0, stopHA=240000.0, date=Time.now()):
+def setTimeConstraints(startHA=190000.0, stopHA=240000.0, date=None):
     '''
-        Set the upper and lower bounds for the constraints which 
+        Set the upper and lower bounds for the constraints which
         are relevant to viewing time. (Does not constrain the wds list.)
-        Takes floats for startHA, stopHA. Takes an astropy Time object 
-        for the date.  
+        See CatalogSession.setTimeConstraints.
     '''
-    global constraints
-    
-    siderealAdjust = calcSiderealAdjustment(time = date) # TODO check github
+    _toDefaultSession()
+    defaultSession.setTimeConstraints(startHA, stopHA, date)
+    _fromDefaultSession()
 
-    #startRA = startHA + siderealAdjust # TODO check math
-    #stopRA = stopHA + siderealAdjust
-    startRA = hhmmssAdd(startHA, siderealAdjust) # TODO check math
-    stopRA = hhmmssAdd(stopHA, siderealAdjust)
-    
-    # Account for the 24 hour clock, and roll over if we pass midnight on either
-    if startRA > 240000.0:
-        startRA = startRA - 240000.0
-    if stopRA > 240000.0:
-        stopRA = stopRA - 240000.0
-    
-    # If the inputs are negative, also roll over those 
-    if startRA < 0:
-        startRA = 240000.0 + startRA
-    if stopRA < 0:
-        stopRA = 240000.0 + stopRA
-    
-    # the stop time is the "upper bound", so it's first in the tuple
-    constraints['ra'] = (stopRA, startRA)
-    
-    
-def setLocationConstraints(latitude=340000.0, viewWidth=350000.0):#northDec=(340000.0 + 350000.0), southDec=(340000.0 - 350000.0)):
+def setLocationConstraints(latitude=340000.0, viewWidth=350000.0):
     '''
-        Set the upper and lower bounds for the constraints which 
+        Set the upper and lower bounds for the constraints which
         are relevant to viewing location. (Does not constrain the wds list.)
-        Takes floats for laitude and viewWidth. Both are in deg:min:sec format. 
-        The videWidth is how much +- you want to give to the laitude for stars.
+        See CatalogSession.setLocationConstraints.
     '''
-    
-    # Limit the declination to within 3 h = 35 deg of overhead
-    # Using JPL's latitude, 34.2 deg = 34 deg
-    northDec = latitude + viewWidth
-    southDec = latitude - viewWidth
-
-    # Check rollover for dec constraints
-    if northDec > 900000:
-        northDec = 900000
-    if southDec < -900000:
-        southDec = -900000
-    
-    # the north dec is the "upper bound", so it's first in the tuple
-    constraints['dec'] = (northDec, southDec)
-
+    _toDefaultSession()
+    defaultSession.setLocationConstraints(latitude, viewWidth)
+    _fromDefaultSession()
 
-def setDate(date):
-    global observing_date
-    observing_date = date
+def setVisibilityConstraints(startTime=180000.0, stopTime=240000.0, date=None):
+    '''
+        Set the start and stop of the observing run for the visibility
+        index. (Does not constrain the wds list.)
+        See CatalogSession.setVisibilityConstraints.
+    '''
+    _toDefaultSession()
+    defaultSession.setVisibilityConstraints(startTime, stopTime, date)
+    _fromDefaultSession()
 
+def setDate(date, endDate=None):
+    '''
+        Sets the observing date (the start of the run) used for the
+        airmass, and optionally the end of the night.
+        See CatalogSession.setDate.
+    '''
+    _toDefaultSession()
+    defaultSession.setDate(date, endDate)
+    _fromDefaultSession()
 
 def addAirmassCol():
     '''
         Add a columns to the WDS table which is the calculated airmass for
-        each object based off of its RA Dec and the location and time of
-        the constrain.
+        each object. See CatalogSession.addAirmassCol.
     '''
-    global observing_date
+    _toDefaultSession()
+    defaultSession.addAirmassCol()
+    _fromDefaultSession()
+    return wdsInterestingHere
 
-    # These calculations may take some time depending on how long the catalog is,
-    # so make a progress bar if the program imported the progess package
-    if progressInstalled:
-        progressBar = Bar('Calculating airmasses', max=len(wdsInterestingHere[raCoors]))
-    print("Airmass calculated with date ", observing_date)
-    
-    secz = []
-    # Loop over all the radec angles
-    for i  in range(0, len(wdsInterestingHere[raCoors])):
-        # Create a SkyCoord object from the RA and Dec
-        ra = ddmmssToDeg(wdsInterestingHere[raCoors][i])
-        dec = ddmmssToDeg(wdsInterestingHere[decCoors][i])
-        starPos = SkyCoord(ra, dec, unit=(u.hour, u.deg))
-
-        # Create an AltAz frame object
-        preferences = {}
-        with open('WDS_Preferences.json', 'r') as fp:
-            preferences = json.load(fp)        
-        observing_location = EarthLocation(lat=preferences['latitude'], lon=preferences['longitude'])
-        aa = AltAz(location=observing_location, obstime=observing_date)
-
-        # Calculate airmass
-        secz.append(starPos.transform_to(aa).secz)
-
-        if progressInstalled:
-            progressBar.next()
-    
-    # Add the list as new column to the wds table
-    seczCol = astropy.table.Column(data=secz, name='secz')
-    wdsInterestingHere.add_column(seczCol)
+def getVisibilityIndex(preferences=None):
+    '''
+        Gets the rise/transit/set visibility index of wdsMaster for the
+        telescope in the preferences (see Catalog.getVisibilityIndex).
+    '''
+    if preferences is None:
+        preferences = loadPreferences()
+    return catalog.getVisibilityIndex(preferences)
 
-    if progressInstalled:
-        progressBar.finish()
-    
-    return wdsInterestingHere
+def getRangeIndexes():
+    '''
+        Gets the range indexes on the columns of wdsMaster which constrain
+        uses, by constraint name (see Catalog.getRangeIndexes).
+    '''
+    return catalog.getRangeIndexes()
+
+def getZoneIndex():
+    '''
+        Gets the spatial index of the RA and Dec of wdsMaster
+        (see Catalog.getZoneIndex).
+    '''
+    return catalog.getZoneIndex()
+
+def getSkyTree():
+    '''
+        Gets the KD-tree of the RA and Dec of wdsMaster
+        (see Catalog.getSkyTree).
+    '''
+    return catalog.getSkyTree()
+
+def getConstraintEngine():
+    '''
+        Gets the constraint engine of the default session
+        (see CatalogSession.getConstraintEngine).
+    '''
+    return defaultSession.getConstraintEngine()
 
+def getResultCache():
+    '''
+        Gets the cache of recent constrain results (see
+        WDS_Cache.ResultCache). Its limits can be changed with its
+        maxEntries and maxBytes, and its hit and miss counts are in stats().
+    '''
+    return catalog.resultCache
 
-def constrain(airmass = False):
+def starConstraintFilter():
+    '''
+        Makes a function which checks which rows of wdsMaster match the
+        star constraints (see CatalogSession.starConstraintFilter).
+    '''
+    _toDefaultSession()
+    return defaultSession.starConstraintFilter()
+
+def coneSearch(ra, dec, radius=None, k=None, useConstraints=True):
+    '''
+        Finds the stars around a pointing at ra, dec (in decimal degrees),
+        sorted by angular distance (see CatalogSession.coneSearch).
+    '''
+    _toDefaultSession()
+    return defaultSession.coneSearch(ra, dec, radius, k, useConstraints)
+
+def calcNightVisibility(step=10, airmassCap=2.0, progress=None):
+    '''
+        Calculates the visibility of every star in wdsInterestingHere over
+        the night (see CatalogSession.calcNightVisibility).
+    '''
+    _toDefaultSession()
+    return defaultSession.calcNightVisibility(step, airmassCap, progress)
+
+def addVisibilityCols(step=10, airmassCap=2.0):
+    '''
+        Add columns to the WDS table with the whole-night visibility of
+        each object (see CatalogSession.addVisibilityCols).
+    '''
+    _toDefaultSession()
+    defaultSession.addVisibilityCols(step, airmassCap)
+    _fromDefaultSession()
+    return wdsInterestingHere
+
+def constrain(airmass = False, visibility = False, progress=None, cancel=None):
     '''
         Limits the WDS table to only stars that match our criteria.
-        Creates wdsInteresting and wdsInterestingHere tables which 
+        Creates wdsInteresting and wdsInterestingHere tables which
         have constrained by star properties or by star properties and
         star location (in time).
         Does not modify wdsMaster.
-        Has no returns, instead modifies the globals wdsInteresting 
-        and wdsInterestingHere.
-    ''' 
-    global wdsMaster
-    global wdsInteresting
-    global wdsInterestingHere
-    global constraints
-
-    # Print what we are constraining with so it seems a bit responsive before
-    # the long processing
-    print("Constraining WDS with: ", constraints)
-    
-    # Reset what wdsInteresting and wdsInterestingHere are so that we 
-    # can get stars which we previously constrained out 
-    wdsInteresting = wdsMaster
-    wdsInterestingHere = wdsMaster
-
-    # Make a dictionary of limits (just for compactness).
-    # Contains the boolean expressions with witch the wds table 
-    # will be compared to. 
-    limits = {}
-    
-    # Make a bunch of limits for a bunch of different things
-    limits['separation'] = (constraints['separation'][0] > wdsInteresting[sepFirst]) & (wdsInteresting[sepFirst] > constraints['separation'][1])
-    
-    limits['magnitude'] = (constraints['magnitude'][0] > wdsInteresting[priMag]) & (wdsInteresting[priMag] > constraints['magnitude'][1])
-    
-    ## TODO Add color of stars as a thing
-    
-    deltaMag = calcDeltaMags()
-    limits['delta magnitude'] = (constraints['delta magnitude'][0] > deltaMag) & (deltaMag > constraints['delta magnitude'][1])
-    
-    # Limit the viewing to times/HA/RA that are acceptable 
-    # If the stop time is less than the start, we have crossed over the 
-    # midnight mark and need to do weird calculations
-    if constraints['ra'][0] < constraints['ra'][1]:
-        limits['ra'] = (constraints['ra'][0] > wdsInteresting[raCoors]) | (wdsInteresting[raCoors] > constraints['ra'][1])
-    else:
-        limits['ra'] = (constraints['ra'][0] > wdsInteresting[raCoors]) & (wdsInteresting[raCoors] > constraints['ra'][1])
-    
-    
-    # Limit the declination to within 3 h = 35 deg of overhead
-    # Using JPL's latitude, 34.2 deg = 34 deg
-    limits['dec'] = (constraints['dec'][0] > wdsInteresting[decCoors]) & (wdsInteresting[decCoors] > constraints['dec'][1])
-    #limits['dec'] = (wdsInteresting[decCoors] > (340000.0 - 350000.0)) & (wdsInteresting[decCoors] < (340000.0 + 350000.0))
-    
-    # Combine all the limits together to get the full limits
-    generalLimits = limits['separation'] & limits['magnitude'] & limits['delta magnitude']
-    hereLimits = limits['separation'] & limits['magnitude'] & limits['delta magnitude'] & limits['dec'] & limits['ra']
-    
-    # Apply the limits to the catalog
-    wdsInteresting = wdsInteresting[np.argwhere(generalLimits)]
-    wdsInterestingHere = wdsInterestingHere[np.argwhere(hereLimits)]
-
-    # If we are told to do so, make an airmass column for the table
-    if airmass:
-        addAirmassCol()
-    
+        Has no returns, instead modifies the globals wdsInteresting
+        and wdsInterestingHere. See CatalogSession.constrain.
+    '''
+    _toDefaultSession()
+    try:
+        defaultSession.constrain(airmass, visibility, progress, cancel)
+    finally:
+        _fromDefaultSession()
 
 def sortWdsInterestingHere(colName=raCoors):
     '''
         Sorts the wdsInterestingHere table based on a column.
-        The default column to sort by is the RA coordinates. 
+        The default column to sort by is the RA coordinates.
     '''
-    global wdsInterestingHere
-    
-    print(wdsInterestingHere)
-    print(colName)
-    wdsInterestingHere.sort(colName)
-    print(wdsInterestingHere)
-    
+    _toDefaultSession()
+    defaultSession.sortWdsInterestingHere(colName)
+
+def export(target, format=None, names=None, here=True, **options):
+    '''
+        Saves wdsInterestingHere (or wdsInteresting if here is False) to
+        a file in one of the WDS_Export.exportFormats.
+        See CatalogSession.export.
+    '''
+    _toDefaultSession()
+    defaultSession.export(target, format, names, here, **options)
 
-def write(filename='object_list.txt'):
+def write(filename='object_list.txt', format=None):
     '''
-        Writes the contents of wdsInteresting to a file. 
+        Writes the contents of wdsInteresting to a file.
         The default filename is object_list.txt
+        See CatalogSession.write.
     '''
-    global wdsInteresting
-    
-    log = open(filename, "w")
-    print(wdsInteresting, file = log)
+    _toDefaultSession()
+    defaultSession.write(filename, format)
 
 
+# The WDS catalog, which is loaded the first time it's needed
+catalogFilename = 'WDS_CSV_cat.txt'
+catalog = Catalog(catalogFilename)
+wdsMaster = None
+# The session the module functions (and the GUI) use
+defaultSession = CatalogSession(catalog)
+# Create the sub-catalog we want (to be narrowed down by constrain function)
+# (all of the catalog once it's loaded)
+wdsInteresting = None
+# Create sub-sub catalog which has the interesting stars that we can view
+wdsInterestingHere = None
+
+# Constriant parameters
+# Constraints is the actual numbers -- upper and lower bounds for
+# different properties.
+constraints = defaultSession.constraints
+# (None means now, see CatalogSession.observingDate)
+observing_date = None
+# The end of the observing night, used for the whole-night visibility
+observing_end_date = defaultSession.observingEndDate
@@ -4,61 +4,108 @@
 # File name: WDS_GUI.py
 # Author: Sarah Hale
 # Email: shale@hmc.edu
-# Date last modified: 2016-02-18
+# Date last modified: 2026-10-18
 # Python Version: 2.7
 ####################################
 
 import pygtk
 pygtk.require('2.0')
 import gtk
+import gobject
 import pango
-from astropy.time import Time
 import WDS_Extraction_Tool as wdsExtractor
+import WDS_Export
+import WDS_Timing
 import json
+import threading
+import numpy as np
+import traceback
+
+# Let the worker threads run while GTK waits for events. This has to
+# happen before any widgets are made or threads are started. The worker
+# threads only hand their results to the GTK main thread (with
+# gobject.idle_add) and never touch widgets, so gtk.gdk.threads_init 
+# isn't needed.
+gobject.threads_init()
+
+# The timings of each query (see showTimings) are also saved here, one
+# JSON object per step
+timingLogFilename = 'WDS_Timing.log'
+
+class ResultsModel(gtk.GenericTreeModel):
+    '''
+        A list model of the results of a query, for the results TreeView.
+        Takes the names of the columns to show and their values (one array
+        per column, for the matching stars), and optionally the order to 
+        show the rows in (e.g. sorted by a column).
+        Only the rows the TreeView asks for, i.e. the ones on screen, are 
+        ever formatted into strings.
+    '''
+
+    def __init__(self, names, columns, order=None):
+        gtk.GenericTreeModel.__init__(self)
+        self.names = names
+        self.columns = columns
+        self.order = order
+        self.numRows = len(columns[0]) if columns else 0
+
+    def on_get_flags(self):
+        return gtk.TREE_MODEL_LIST_ONLY | gtk.TREE_MODEL_ITERS_PERSIST
+
+    def on_get_n_columns(self):
+        return len(self.names)
+
+    def on_get_column_type(self, index):
+        return str
+
+    def on_get_iter(self, path):
+        if path[0] < self.numRows:
+            return path[0]
+        return None
+
+    def on_get_path(self, rowref):
+        return (rowref,)
+
+    def on_get_value(self, rowref, column):
+        # Look up which star is shown in this row, then format its value
+        row = rowref if self.order is None else self.order[rowref]
+        return wdsExtractor.formatCell(self.columns[column][row], self.names[column])
+
+    def on_iter_next(self, rowref):
+        if rowref + 1 < self.numRows:
+            return rowref + 1
+        return None
+
+    def on_iter_children(self, parent):
+        if parent is None and self.numRows > 0:
+            return 0
+        return None
+
+    def on_iter_has_child(self, rowref):
+        return False
+
+    def on_iter_n_children(self, rowref):
+        if rowref is None:
+            return self.numRows
+        return 0
+
+    def on_iter_nth_child(self, parent, n):
+        if parent is None and n < self.numRows:
+            return n
+        return None
+
+    def on_iter_parent(self, child):
+        return None
+
 
 class WDSGUI:
 
-    # TODO This probably shouldn't be a class function
-    # This function is used for processing the user input for the
-    #  start and stop observing times.
-    def timeInputProcessing(self, time):
-        # Check if the input format is colon-separated 
-        if ":" in time:
-            # Check if there is one colon or two:
-            #  - One colon is assumed to be hh:mm
-            #  - Two colons is assumed to be hh:mm:ss.s
-            if time.count(':') == 1:
-                # split the string at the colons
-                hhmm = time.split(":")
-                # and convert each of the resulting numbers to a float
-                hhmm = [float(i) for i in hhmm]
-                # Then merge them back together as a single hhmmss float
-                time = hhmm[0]*10000 + hhmm[1]*100
-            else:
-                # split the string at the colons
-                hhmmss = time.split(":")
-                # and convert each of the resulting numbers to a float
-                hhmmss = [float(i) for i in hhmmss]
-                # Then merge them back together as a single hhmmss float
-                time = hhmmss[0]*10000 + hhmmss[1]*100 + hhmmss[2]
-        else:
-            # If it's just an hour multiply by 10000
-            time = float(time)
-            if time == time % 100:
-                time = time * 10000
-            # If it's non-colon-separated hhmmss.s leave it as-is
-        return time
-    
-    def constrain(self, widget, data=None):
+    def readInputs(self):
         '''
-            Constrains the WDS table according to user inputs. 
-            Ignores any arguments.
-            Uses the GUI user entry fields for time and star constraints. 
-            Calls functions from WDS_Extraction_Tool.
-            Sets the text buffer to the constrained wds after it is finished. 
-            This is a callback function for the "Contrain" button. 
+            Reads the user inputs (and the preferences) and works out the 
+            constraints from them. Returns them as a dictionary, ready for
+            constrainWorker. This has to be done on the GTK main thread.
         '''
-
         ## Load preferences from file
 
         # Have some default preferences
@@ -68,110 +115,324 @@ class WDSGUI:
             preferences = json.load(fp)
 
         
-        # Get the inputs from the user entry fields 
-        # Time constraints
-
-        
         # Date
         # the format of rawDate is a tuple, (year, month, day)
         rawDate = self.calendar.get_date()
         # note that for some reason the months go from 0 to 11 rather than 1 to 12
-        # use the start observation time in the date for now
-        dateString = str(rawDate[0]) + '-' + str(rawDate[1]+1) + '-' + str(rawDate[2]) + ' ' + self.startTimeInput.get_text()
-        astroDateInput = Time(dateString, format='iso', scale='utc')
-        
-        # Hour Angle start and stop
-        
-        # Three possible types of input we need to consider:
-        #  - Regular hh:mm:ss.s
-        #  - No seconds, hh:mm
-        #  - Just the hour, hh
-        #  - (hhmmss.s with no colons is possible too)
-
-        eastHAKey = 'eastHA' # TODO check this is right
-        if ":" in preferences[eastHAKey]:
-            # split the string at the colons
-            hhmmss = preferences[eastHAKey].split(":")
-            # and convert each of the resulting numbers to a float
-            hhmmss = [float(i) for i in hhmmss]
-            # Then merge them back together as a single hhmmss float
-            eastHARange = hhmmss[0]*10000 + hhmmss[1]*100 + hhmmss[2]
-        else:
-            eastHARange = float(preferences[eastHAKey])
-
-        startTimeInput = self.timeInputProcessing(self.startTimeInput.get_text())
-        startHAInput = startTimeInput - eastHARange # TODO fix hhmmss arithmetic
-        
-       
-        westHAKey = 'westHA' # TODO check this is right
-        if ":" in preferences[westHAKey]:
-            # split the string at the colons
-            hhmmss = preferences[westHAKey].split(":")
-            # and convert each of the resulting numbers to a float
-            hhmmss = [float(i) for i in hhmmss]
-            # Then merge them back together as a single hhmmss float
-            westHARange = hhmmss[0]*10000 + hhmmss[1]*100 + hhmmss[2]
-        else:
-            westHARange = float(preferences[westHAKey])
-
-        stopTimeInput = self.timeInputProcessing(self.stopTimeInput.get_text())
-        stopHAInput = stopTimeInput + westHARange
-         
-        # Location (dec) constraints
-        
-        # Shale 2017-02-08: Changed from taking GUI input here to preferences
-        # Check if the input format is colon-separated 
-        if ":" in preferences['latitude']:
-            # split the string at the colons
-            decmmss = preferences['latitude'].split(":")
-            # and convert each of the resulting numbers to a float
-            decmmss = [float(i) for i in decmmss]
-            # Then merge them back together as a single decmmss float
-            latitudeInput = decmmss[0]*10000 + decmmss[1]*100 + decmmss[2]
-        else:
-            latitudeInput = float(preferences['latitude'])
-        
-        # Shale 2017-02-08: Changed from taking GUI input here to preferences
-        # TODO Make asymmetric dec width
-        # Check if the input format is colon-separated 
-        if ":" in preferences['+dec']:
-            # split the string at the colons
-            decmmss = preferences['+dec'].split(":")
-            # and convert each of the resulting numbers to a float
-            decmmss = [float(i) for i in decmmss]
-            # Then merge them back together as a single decmmss float
-            decWidthInput = decmmss[0]*10000 + decmmss[1]*100 + decmmss[2]
-        else:
-            decWidthInput = float(preferences['+dec'])
+        dateString = str(rawDate[0]) + '-' + str(rawDate[1]+1) + '-' + str(rawDate[2])
+
+        # Work out the time and location constraints of the night from the
+        # start and stop times (see WDS_Extraction_Tool.nightInputs)
+        inputs = wdsExtractor.nightInputs(dateString, self.startTimeInput.get_text(), 
+                                          self.stopTimeInput.get_text(), preferences)
         
         # star contraints
         separationInput = (float(self.upperSeparationInput.get_text()), float(self.lowerSeparationInput.get_text()))
         magnitudeInput = (float(self.upperMagnitudeInput.get_text()), float(self.lowerMagnitudeInput.get_text()))
         deltaMagInput = (float(self.upperDeltaMagInput.get_text()), float(self.lowerDeltaMagInput.get_text()))
         
-        # Apply the user inputs as the constraints
-        wdsExtractor.setTimeConstraints(startHA=startHAInput, stopHA=stopHAInput, date=astroDateInput)
-        wdsExtractor.setLocationConstraints(latitude=latitudeInput, viewWidth=decWidthInput)
-        wdsExtractor.setStarConstraints(separation=separationInput, magnitude=magnitudeInput, deltaMag=deltaMagInput)
-        wdsExtractor.setDate(astroDateInput)
-        
-        # Constrain the wds table
-        wdsExtractor.constrain(airmass=True)
+        # What format to save the results in
+        exportFormatInput = self.exportFormatInput.get_active_text()
         
+        inputs['separation'] = separationInput
+        inputs['magnitude'] = magnitudeInput
+        inputs['deltaMag'] = deltaMagInput
+        inputs['exportFormat'] = exportFormatInput
+        return inputs
+
+    def constrain(self, widget, data=None):
+        '''
+            Constrains the WDS table according to user inputs. 
+            Ignores any arguments.
+            Calls functions from WDS_Extraction_Tool on a worker thread 
+            (see constrainWorker), so the window keeps working meanwhile.
+            A query which is still running is cancelled, so the newest
+            click always wins rather than waiting behind the old one.
+            Sets the text buffer to the constrained wds after it is finished. 
+            This is a callback function for the "Contrain" button. 
+        '''
+        inputs = self.readInputs()
+
+        # Stop the last query, and start this one
+        self.cancelQuery()
+        self.queryNumber += 1
+        self.cancelEvent = threading.Event()
+        worker = threading.Thread(target=self.constrainWorker, 
+                                  args=(inputs, self.queryNumber, self.cancelEvent))
+        # Don't keep the program open for a query when the window is closed
+        worker.daemon = True
+        worker.start()
+
+        self.cancelButton.set_sensitive(True)
+        self.progressBar.set_fraction(0.0)
+        self.progressBar.set_text("Constraining...")
+
+    def constrainWorker(self, inputs, queryNumber, cancelEvent):
+        '''
+            Does the constraining for constrain, on a worker thread.
+            Everything it shows in the window goes through the GTK main 
+            loop (gobject.idle_add), and only if it is still the newest 
+            query. Stops early if cancelEvent is set: between its steps, and
+            during the slow ones. Never waits behind an older query which
+            hasn't stopped yet.
+        '''
+        def progress(stage, done, total):
+            gobject.idle_add(self.showProgress, queryNumber, stage, done, total)
+
+        # The whole query is timed, step by step (see showTimings)
+        with WDS_Timing.span('WDSGUI.constrain', query=queryNumber) as query:
+            try:
+                # Wait for the catalog if it's still loading (see loadCatalog)
+                if not self.session.catalog.isLoaded():
+                    progress("Loading catalog", 0, 1)
+                    with WDS_Timing.span('load catalog'):
+                        self.session.catalog.load()
+                wdsExtractor.checkCancelled(cancelEvent, "constraining")
+
+                # The session is locked so an old query which hasn't noticed
+                # it was cancelled yet can't mix its constraints with these.
+                # If an old query still has it (e.g. while it makes an index,
+                # when it can't stop), this one doesn't wait for it but 
+                # gets a session of its own of the same catalog.
+                session = self.session
+                if not session.lock.acquire(False):
+                    session = wdsExtractor.CatalogSession(session.catalog, session.preferences)
+                    session.lock.acquire()
+                    self.session = session
+                try:
+                    # Apply the user inputs as the constraints
+                    session.setInputs(inputs)
+                    
+                    # Constrain the wds table
+                    session.constrain(airmass=True, visibility=True, progress=progress, cancel=cancelEvent)
+                    wdsExtractor.checkCancelled(cancelEvent, "showing the results")
+                    
+                    # Take the shown columns out of the catalog now, so the
+                    # window only has to format the rows it shows
+                    with WDS_Timing.span('take columns') as stage:
+                        results = session.interestingHere
+                        names = session.getDisplayColumns()
+                        columns = [results[name] for name in names]
+                        stage['rows'] = len(results)
+                        query['rows'] = len(results)
+                finally:
+                    session.lock.release()
+            except wdsExtractor.QueryCancelled:
+                gobject.idle_add(self.showStatus, queryNumber, "Cancelled")
+                return
+            except Exception as error:
+                traceback.print_exc()
+                gobject.idle_add(self.showStatus, queryNumber, "Failed: " + str(error))
+                return
+
+            # Save the results to a file here, off of the main thread
+            if queryNumber == self.queryNumber and not cancelEvent.is_set():
+                format = inputs['exportFormat']
+                filename = "WDS_Output" + WDS_Export.exportFormats[format]
+                try:
+                    with WDS_Timing.span('export', format=format, rows=len(results)):
+                        if format == 'text':
+                            # The same columns as the window
+                            WDS_Export.export(results, filename, format, names, colWidth=15)
+                        else:
+                            # Every column, for other programs to read
+                            WDS_Export.export(results, filename, format)
+                except Exception as error:
+                    traceback.print_exc()
+                    gobject.idle_add(self.showStatus, queryNumber, "Could not save " + filename + ": " + str(error))
+                    return
+
+        gobject.idle_add(self.showResults, queryNumber, names, columns)
+
+    def loadCatalog(self):
+        '''
+            Starts loading the catalog in the background, and shows that it
+            is loading in the progress bar until it's done. Queries started
+            before then wait for it.
+            Runs on the GTK main thread once the window is up, from 
+            gobject.idle_add.
+        '''
+        def done(error):
+            gobject.idle_add(self.showCatalogLoaded, error)
+
+        self.catalogLoading = True
+        self.progressBar.set_text("Loading catalog...")
+        self.session.catalog.prefetch(done)
+        gobject.timeout_add(100, self.pulseCatalogLoading)
+        return False
+
+    def pulseCatalogLoading(self):
+        '''
+            Moves the progress bar back and forth while the catalog loads,
+            unless a query is showing its own progress.
+            Runs on the GTK main thread, from gobject.timeout_add.
+        '''
+        if self.catalogLoading and self.queryNumber == 0:
+            self.progressBar.pulse()
+        # Returning True keeps the timeout going
+        return self.catalogLoading
+
+    def showCatalogLoaded(self, error):
+        '''
+            Shows that the catalog finished loading (or couldn't be loaded),
+            unless a query is already showing its progress.
+            Runs on the GTK main thread, from gobject.idle_add.
+        '''
+        self.catalogLoading = False
+        if self.queryNumber == 0:
+            self.progressBar.set_fraction(0.0)
+            if error is None:
+                self.progressBar.set_text("Catalog loaded")
+            else:
+                self.progressBar.set_text("Could not load catalog: " + str(error))
+        return False
+
+    def timingsFinished(self, spans):
+        '''
+            Passes the spans of a finished trace (see WDS_Timing.Tracer) on
+            to showTimings on the GTK main thread. Called on the thread the
+            trace ran on.
+        '''
+        gobject.idle_add(self.showTimings, spans)
+
+    def showTimings(self, spans):
+        '''
+            Shows how long each step of the last query took in the 
+            performance panel, with the cProfile output if profiling is on.
+            A new query (WDSGUI.constrain) replaces what is shown; anything
+            else timed after it (e.g. showing its results) is added on.
+            Runs on the GTK main thread, from gobject.idle_add.
+        '''
+        if spans[0]['name'] == 'WDSGUI.constrain':
+            self.timingTraces = []
+        self.timingTraces.append(spans)
+
+        text = '\n'.join(WDS_Timing.spansToString(trace) for trace in self.timingTraces)
+        for trace in self.timingTraces:
+            if 'profile' in trace[0]:
+                text += '\n\n' + trace[0]['name'] + ' profile:\n' + trace[0]['profile']
+        self.timingBuffer.set_text(text)
+        return False
+
+    def toggleProfiling(self, widget, data=None):
+        '''
+            Turns profiling the queries with cProfile on or off.
+            This is a callback function for the "Profile queries" check box.
+        '''
+        WDS_Timing.tracer.profile = widget.get_active()
+
+    def cancelQuery(self, widget=None, data=None):
+        '''
+            Cancels the query which is running, if there is one. It stops
+            at the next chunk of stars. 
+            This is a callback function for the "Cancel" button.
+        '''
+        if self.cancelEvent is not None:
+            self.cancelEvent.set()
+
+    def showProgress(self, queryNumber, stage, done, total):
+        '''
+            Shows how far along a query is in the progress bar.
+            Runs on the GTK main thread, from gobject.idle_add.
+        '''
+        if queryNumber == self.queryNumber and not self.cancelEvent.is_set():
+            self.progressBar.set_fraction(float(done) / max(total, 1))
+            self.progressBar.set_text(stage + " (" + str(done) + " of " + str(total) + ")")
+        # Returning False means idle_add only calls this once
+        return False
+
+    def showStatus(self, queryNumber, status):
+        '''
+            Shows that a query stopped (e.g. it was cancelled).
+            Runs on the GTK main thread, from gobject.idle_add.
+        '''
+        if queryNumber == self.queryNumber:
+            self.progressBar.set_text(status)
+            self.cancelButton.set_sensitive(False)
+        return False
+
+    def showResults(self, queryNumber, names, columns):
+        '''
+            Shows the results of a query in the results table, unless a 
+            newer query has started. Takes the names of the columns to show
+            and their values.
+            Runs on the GTK main thread, from gobject.idle_add.
+        '''
+        if queryNumber != self.queryNumber:
+            return False
+
         # Display the new wds table
-        #self.text.set_text(str(wdsExtractor.getWdsInterestingHere()))
-        wdsOutput = wdsExtractor.getSmallerWdsInterestingHereString(15)
-        self.text.set_text(wdsOutput)
-        with open("WDS_Output.txt", "w") as text_file:
-            text_file.write(wdsOutput)
+        with WDS_Timing.span('WDSGUI.showResults', query=queryNumber, rows=len(columns[0]) if columns else 0):
+            self.resultNames = names
+            self.resultColumns = columns
+            # Sort orders are only worked out once per column per result
+            self.sortOrders = {}
+            self.sortColumn = None
+            self.makeResultColumns(names)
+            self.resultsView.set_model(ResultsModel(names, columns))
 
         # Determine the number of results
-        nlines = wdsOutput.count('\n')
-        numResults = nlines - 1
+        numResults = len(columns[0]) if columns else 0
         resultString = str(numResults) + " Results"
         self.resultsNumLabel.set_text(resultString)
 
-        
+        self.progressBar.set_fraction(1.0)
+        self.progressBar.set_text("Done")
+        self.cancelButton.set_sensitive(False)
+        return False
+
+    def makeResultColumns(self, names):
+        '''
+            Sets up the columns of the results table with the column names.
+            The columns have a fixed size so the table never has to look at
+            rows which aren't on screen.
+        '''
+        for column in self.resultsView.get_columns():
+            self.resultsView.remove_column(column)
+
+        for index, name in enumerate(names):
+            renderer = gtk.CellRendererText()
+            renderer.set_property('font', 'mono')
+            column = gtk.TreeViewColumn(name, renderer, text=index)
+            column.set_sizing(gtk.TREE_VIEW_COLUMN_FIXED)
+            column.set_fixed_width(self.resultColWidth)
+            column.set_resizable(True)
+            # Clicking on the header sorts by the column
+            column.set_clickable(True)
+            column.connect("clicked", self.sortResults, index)
+            self.resultsView.append_column(column)
+
+    def sortResults(self, column, index):
+        '''
+            Sorts the results table by the column number index, or reverses
+            the order if it is already sorted by it.
+            The order is worked out once per column and then kept, so 
+            sorting again just swaps in a new model with that order.
+            This is a callback function for the column headers.
+        '''
+        if self.sortColumn == index:
+            descending = not self.sortDescending
+        else:
+            descending = False
+
+        if index not in self.sortOrders:
+            self.sortOrders[index] = np.argsort(self.resultColumns[index], kind='mergesort')
+        order = self.sortOrders[index]
+        if descending:
+            order = order[::-1]
+
+        self.sortColumn = index
+        self.sortDescending = descending
+        self.resultsView.set_model(ResultsModel(self.resultNames, self.resultColumns, order))
+
+        # Show which way it is sorted in the header
+        for other in self.resultsView.get_columns():
+            other.set_sort_indicator(other is column)
+        if descending:
+            column.set_sort_order(gtk.SORT_DESCENDING)
+        else:
+            column.set_sort_order(gtk.SORT_ASCENDING)
+
         
     def delete_event(self, widget, event, data=None):
         # If you return FALSE in the "delete_event" signal handler,
@@ -219,6 +480,16 @@ class WDSGUI:
         # Make the window visible
         self.window.show()
         
+        # The queries run on worker threads (see constrain), in a session
+        # of their own. Each click gets a new query number, and only the 
+        # newest query shows its results.
+        self.session = wdsExtractor.newSession()
+        self.queryNumber = 0
+        self.cancelEvent = None
+        # The catalog is loaded in the background once the window is up
+        # (see loadCatalog and main)
+        self.catalogLoading = False
+        
 
         
         ########### HBOX
@@ -248,7 +519,7 @@ class WDSGUI:
         
         # TODO find the best options for the filling of the table params
         # Make a table to contain all the input fields 
-        self.inputsTable = gtk.Table(rows=7, columns=6, homogeneous=False)
+        self.inputsTable = gtk.Table(rows=8, columns=6, homogeneous=False)
         # Add the inputs table to the wds vbox container 
         self.wdsVBox.pack_start(self.inputsTable, False, True, False)#, expand, fill, padding)
         self.inputsTable.show()
@@ -283,7 +554,9 @@ class WDSGUI:
         ######## TIME CONSTRAINTS
         
         # Make title for time constraints section 
-        self.timeConstrainLabel = gtk.Label("Time constraints:  (Local Solar Time, military)")
+        # (saying which clock the times are on, see WDS_Extraction_Tool.nightInputs)
+        self.timeConstrainLabel = gtk.Label("Time constraints:  (" + wdsExtractor.clockDescription(preferences)
+                                            + ", military)")
         
         # Attach it to the top row of the table
         self.inputsTable.attach(self.timeConstrainLabel, left_attach=0, right_attach=3, top_attach=0, bottom_attach=1)
@@ -413,48 +686,128 @@ class WDSGUI:
         self.inputsTable.attach(self.resultsNumLabel, left_attach=1, right_attach=2, top_attach=6, bottom_attach=7)
         self.resultsNumLabel.show()
         
-        ############# TEXTBUFFER
-        ####### Contains the actual text for the WDS table 
+        ######## PROGRESS AND CANCEL
+
+        # Make a progress bar for the query which is running
+        self.progressBar = gtk.ProgressBar()
+        self.progressBar.set_text("")
+
+        # Attach it to the 7th row of the table, after the number of results
+        self.inputsTable.attach(self.progressBar, left_attach=2, right_attach=5, top_attach=6, bottom_attach=7)
+        self.progressBar.show()
+
+        # Make a button to stop the query which is running
+        self.cancelButton = gtk.Button("Cancel")
+        self.cancelButton.set_sensitive(False)
+
+        # Attach it to the end of the 7th row of the table
+        self.inputsTable.attach(self.cancelButton, left_attach=5, right_attach=6, top_attach=6, bottom_attach=7)
+        self.cancelButton.show()
+
+        # When the button receives the "clicked" signal, it will call the
+        # function cancelQuery() passing it None as its argument.
+        self.cancelButton.connect("clicked", self.cancelQuery, None)
         
-        # Make a text buffer, which contains the actual text to 
-        # go into the text view
-        self.text = gtk.TextBuffer()
-        starterText = "    \n" * 5
-        self.text.set_text(starterText)
+        ######## SAVE FORMAT
+
+        # Make label for the format the results are saved in
+        self.exportFormatLabel = gtk.Label("Save results as")
+
+        # Attach it to the 8th row of the table
+        self.inputsTable.attach(self.exportFormatLabel, left_attach=0, right_attach=1, top_attach=7, bottom_attach=8)
+        self.exportFormatLabel.show()
+
+        # Make a drop down list of the formats (see WDS_Export). The 
+        # results are saved to WDS_Output with the format's extension.
+        self.exportFormatInput = gtk.combo_box_new_text()
+        for format in WDS_Export.exportFormats:
+            self.exportFormatInput.append_text(format)
+        self.exportFormatInput.set_active(0)
+
+        # Attach it to the 8th row of the table, next to its label
+        self.inputsTable.attach(self.exportFormatInput, left_attach=1, right_attach=2, top_attach=7, bottom_attach=8)
+        self.exportFormatInput.show()
         
-        ############# TEXTVIEW
+        ############# TREEVIEW
         ####### Displays the produced WDS table
         
-        # Make a text view, which is used to view the text buffer 
-        # containing the WDS table
-        self.textview = gtk.TextView(buffer = self.text)#None)
+        # Make a tree view, which shows the rows of the WDS table that are
+        # on screen (see ResultsModel)
+        self.resultsView = gtk.TreeView()
         
-        # Make text uneditable 
-        self.textview.set_editable(False)
-        
-        # Change the font to be monospaced 
-        self.textview.modify_font(pango.FontDescription('mono'))
+        # All of the rows are the same height, so the tree view doesn't 
+        # have to measure all of them
+        self.resultsView.set_fixed_height_mode(True)
+        # Width of each column of the table, in pixels
+        self.resultColWidth = 110
+        self.resultNames = []
+        self.resultColumns = []
+        self.sortOrders = {}
+        self.sortColumn = None
+        self.sortDescending = False
         
         
         ############# SCROLL
-        ####### Contains the textview and makes it scrollable
+        ####### Contains the tree view and makes it scrollable
         
         # Make the scroll window 
         self.wdsScroller = gtk.ScrolledWindow(hadjustment=None, vadjustment=None)
         
         # Set when the horiz and vertical scrollbars appear 
-        self.wdsScroller.set_policy(hscrollbar_policy=gtk.POLICY_NEVER, vscrollbar_policy=gtk.POLICY_AUTOMATIC)
+        self.wdsScroller.set_policy(hscrollbar_policy=gtk.POLICY_AUTOMATIC, vscrollbar_policy=gtk.POLICY_AUTOMATIC)
         
-        # Add the textview to the scroll window
-        self.wdsScroller.add(self.textview)
-        self.textview.show()
+        # Add the tree view to the scroll window
+        self.wdsScroller.add(self.resultsView)
+        self.resultsView.show()
         
         # Add the scroller to the wds vbox container 
         self.wdsVBox.pack_start(self.wdsScroller, True, True, False)#, expand, fill, padding)
         self.wdsScroller.show()
         
         
+        ############# PERFORMANCE
+        ####### Shows how long each step of the last query took
+        
+        # Make a panel which can be opened and closed, closed to start with
+        self.timingExpander = gtk.Expander("Performance")
+        self.timingExpander.set_expanded(False)
+        self.wdsVBox.pack_start(self.timingExpander, False, True, False)#, expand, fill, padding)
+        self.timingExpander.show()
+        
+        # Make a box for the inside of the panel
+        self.timingVBox = gtk.VBox(False, True)#(homogeneous, spacing)
+        self.timingExpander.add(self.timingVBox)
+        self.timingVBox.show()
+        
+        # Make a check box to profile the queries with cProfile
+        self.profileCheck = gtk.CheckButton("Profile queries with cProfile")
+        self.profileCheck.connect("toggled", self.toggleProfiling, None)
+        self.timingVBox.pack_start(self.profileCheck, False, False, False)#, expand, fill, padding)
+        self.profileCheck.show()
+        
+        # Make a text view for the timings, in a scroll window
+        self.timingBuffer = gtk.TextBuffer()
+        self.timingView = gtk.TextView(self.timingBuffer)
+        self.timingView.set_editable(False)
+        self.timingView.modify_font(pango.FontDescription('mono'))
+        self.timingScroller = gtk.ScrolledWindow(hadjustment=None, vadjustment=None)
+        self.timingScroller.set_policy(hscrollbar_policy=gtk.POLICY_AUTOMATIC, vscrollbar_policy=gtk.POLICY_AUTOMATIC)
+        self.timingScroller.set_size_request(-1, 150)
+        self.timingScroller.add(self.timingView)
+        self.timingView.show()
+        self.timingVBox.pack_start(self.timingScroller, True, True, False)#, expand, fill, padding)
+        self.timingScroller.show()
+        
+        # The timings of the last query, as lists of spans (see showTimings),
+        # which are also saved to the timing log
+        self.timingTraces = []
+        WDS_Timing.tracer.logFilename = timingLogFilename
+        WDS_Timing.tracer.addListener(self.timingsFinished)
+        
+        
     def main(self):
+        # Start loading the catalog as soon as the window is showing
+        gobject.idle_add(self.loadCatalog)
         # All PyGTK applications must have a gtk.main(). Control ends here
         # and waits for an event to occur (like a key press or mouse event).
         gtk.main()
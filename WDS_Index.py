@@ -0,0 +1,571 @@
+#!/usr/bin/env python
+
+####################################
+# File name: WDS_Index.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import numpy as np
+scipyInstalled = True
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    print("Install 'scipy' for faster cone searches!")
+    scipyInstalled = False
+
+
+class RangeIndex(object):
+    '''
+        An index on one column of a table, for finding the rows with values
+        between two bounds without looking at the whole column.
+        The row numbers are kept sorted by value (order), along with the
+        sorted values themselves and each row's position in that order
+        (rank). Rows with no value (masked or NaN) are left out of the order
+        and get a rank past the end, so they never match.
+        If circular is True (e.g. for RA), a lower bound above the upper
+        bound means the range wraps around.
+    '''
+
+    def __init__(self, values, circular=False):
+        data = np.asarray(np.ma.getdata(values), dtype=float)
+        valid = ~np.ma.getmaskarray(values) & ~np.isnan(data)
+
+        rows = np.flatnonzero(valid)
+        self.order = rows[np.argsort(data[rows], kind='mergesort')]
+        self.sortedValues = data[self.order]
+        self.rank = np.full(len(data), len(self.order), dtype=np.intp)
+        self.rank[self.order] = np.arange(len(self.order))
+        self.circular = circular
+
+    def spans(self, upper, lower):
+        '''
+            Gets the positions in the order of the values strictly between
+            lower and upper, as a list of (start, stop) pairs.
+            There are two pairs if the range wraps around.
+        '''
+        if self.circular and upper < lower:
+            return self.spans(np.inf, lower) + self.spans(upper, -np.inf)
+        start = np.searchsorted(self.sortedValues, lower, side='right')
+        stop = np.searchsorted(self.sortedValues, upper, side='left')
+        return [(start, max(start, stop))]
+
+    def count(self, upper, lower):
+        '''
+            Counts the rows with values strictly between lower and upper.
+            Only needs a couple of binary searches.
+        '''
+        return sum(stop - start for start, stop in self.spans(upper, lower))
+
+    def rows(self, upper, lower):
+        '''
+            Gets the row numbers with values strictly between lower and upper
+            (in order of value, not of row number).
+        '''
+        return np.concatenate([self.order[start:stop] for start, stop in self.spans(upper, lower)])
+
+    def contains(self, rows, upper, lower):
+        '''
+            Checks which of the row numbers rows have values strictly between
+            lower and upper. Returns a boolean array the length of rows.
+        '''
+        rank = self.rank[rows]
+        inside = np.zeros(len(rows), dtype=bool)
+        for start, stop in self.spans(upper, lower):
+            inside |= (rank >= start) & (rank < stop)
+        return inside
+
+    def within(self, inner, outer):
+        '''
+            Checks if the (upper, lower) bounds inner are inside the bounds
+            outer, so the rows matching inner are some of those matching
+            outer. Wrapped ranges are only compared when they are the same.
+        '''
+        if self.circular and (inner[0] < inner[1] or outer[0] < outer[1]):
+            return tuple(inner) == tuple(outer)
+        return inner[0] <= outer[0] and inner[1] >= outer[1]
+
+
+def rangeQuery(indexes, bounds):
+    '''
+        Finds the rows which are inside all of the bounds.
+        Takes a dictionary of RangeIndex objects, and a dictionary with
+        the same keys of (upper, lower) bounds.
+        The bound with the fewest matching rows is looked up first, and only
+        those rows are checked against the other bounds, so a narrow query
+        only ever touches the rows it could match.
+        Returns the matching row numbers, sorted.
+    '''
+    names = sorted(bounds, key=lambda name: indexes[name].count(*bounds[name]))
+    if not names:
+        raise ValueError("rangeQuery needs at least one bound")
+
+    rows = indexes[names[0]].rows(*bounds[names[0]])
+    for name in names[1:]:
+        if len(rows) == 0:
+            break
+        rows = rows[indexes[name].contains(rows, *bounds[name])]
+
+    return np.sort(rows)
+
+
+def angularDistance(ra1, dec1, ra2, dec2):
+    '''
+        Calculates the angle between two positions on the sky (or arrays of 
+        them), all in degrees. Uses the haversine formula, which is 
+        accurate for small angles too.
+    '''
+    ra1, dec1, ra2, dec2 = [np.radians(x) for x in (ra1, dec1, ra2, dec2)]
+    a = np.sin((dec2 - dec1) / 2.0)**2 + np.cos(dec1) * np.cos(dec2) * np.sin((ra2 - ra1) / 2.0)**2
+    return np.degrees(2.0 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0))))
+
+
+class ZoneIndex(object):
+    '''
+        A spatial index of positions on the sky, for finding the stars in a
+        region without looking at every star.
+        The sky is cut into zones of declination zoneHeight degrees high,
+        and the stars are sorted by zone and then by RA, so the stars of a
+        zone between two RAs are a slice found by binary search.
+        Queries only visit the zones (and the RA slices of those zones) 
+        which overlap the region. Takes arrays of RA and Dec in degrees;
+        stars with no position (masked or NaN) are left out.
+    '''
+
+    def __init__(self, ra, dec, zoneHeight=1.0):
+        raData = np.asarray(np.ma.getdata(ra), dtype=float)
+        decData = np.asarray(np.ma.getdata(dec), dtype=float)
+        with np.errstate(invalid='ignore'):
+            valid = (~np.ma.getmaskarray(ra) & ~np.ma.getmaskarray(dec) 
+                     & ~np.isnan(raData) & ~np.isnan(decData))
+        rows = np.flatnonzero(valid)
+
+        self.zoneHeight = zoneHeight
+        self.numZones = int(np.ceil(180.0 / zoneHeight))
+        zones = self.zoneOf(decData[rows])
+
+        # Sort by zone, then by RA within each zone
+        sort = np.lexsort((raData[rows] % 360.0, zones))
+        self.order = rows[sort]
+        self.ra = raData[self.order] % 360.0
+        self.dec = decData[self.order]
+        self.zoneStarts = np.searchsorted(zones[sort], np.arange(self.numZones + 1))
+        # Where each row is in the order (past the end if it has no position)
+        self.rank = np.full(len(raData), len(self.order), dtype=np.intp)
+        self.rank[self.order] = np.arange(len(self.order))
+
+    def zoneOf(self, dec):
+        '''
+            Gets the zone number(s) of a Dec (or an array of them).
+        '''
+        return np.clip(np.floor((np.asarray(dec) + 90.0) / self.zoneHeight).astype(int), 0, self.numZones - 1)
+
+    def wrapRa(self, ra):
+        '''
+            Brings an RA bound back into 0 to 360 degrees, but only if it's
+            outside of it, so a box up to exactly 360 doesn't turn into one 
+            up to 0.
+        '''
+        if np.isfinite(ra) and not 0.0 <= ra <= 360.0:
+            return ra % 360.0
+        return ra
+
+    def _candidates(self, raMin, raMax, decMin, decMax):
+        '''
+            Gets the positions (in order) of the stars in the zones which
+            overlap decMin to decMax, with RA strictly between raMin and raMax
+            (wrapping through 0 if raMin > raMax). The Dec still has to be 
+            checked for the stars in the zones at the edges.
+        '''
+        if raMin > raMax:
+            raRanges = [(raMin, np.inf), (-np.inf, raMax)]
+        else:
+            raRanges = [(raMin, raMax)]
+
+        slices = []
+        for zone in range(self.zoneOf(decMin), self.zoneOf(decMax) + 1):
+            zoneStart = self.zoneStarts[zone]
+            zoneRa = self.ra[zoneStart:self.zoneStarts[zone + 1]]
+            for low, high in raRanges:
+                start = np.searchsorted(zoneRa, low, side='right')
+                stop = np.searchsorted(zoneRa, high, side='left')
+                if stop > start:
+                    slices.append(np.arange(zoneStart + start, zoneStart + stop))
+        if not slices:
+            return np.zeros(0, dtype=np.intp)
+        return np.concatenate(slices)
+
+    def box(self, raMin, raMax, decMin, decMax):
+        '''
+            Finds the stars strictly inside an RA/Dec box, in degrees.
+            If raMin > raMax the box wraps around through RA 0.
+            Returns the row numbers, sorted.
+        '''
+        raMin = self.wrapRa(raMin)
+        raMax = self.wrapRa(raMax)
+        positions = self._candidates(raMin, raMax, decMin, decMax)
+        dec = self.dec[positions]
+        positions = positions[(dec > decMin) & (dec < decMax)]
+        return np.sort(self.order[positions])
+
+    def rows(self, raMin, raMax, decMin, decMax):
+        '''
+            The same as box, so a ZoneIndex can be used as a ConstraintEngine
+            predicate with (raMin, raMax, decMin, decMax) bounds.
+        '''
+        return self.box(raMin, raMax, decMin, decMax)
+
+    def contains(self, rows, raMin, raMax, decMin, decMax):
+        '''
+            Checks which of the row numbers rows are strictly inside an 
+            RA/Dec box, in degrees (see box). Returns a boolean array the 
+            length of rows.
+        '''
+        raMin = self.wrapRa(raMin)
+        raMax = self.wrapRa(raMax)
+
+        inside = np.zeros(len(rows), dtype=bool)
+        have = np.flatnonzero(self.rank[rows] < len(self.order))
+        positions = self.rank[rows][have]
+        ra = self.ra[positions]
+        dec = self.dec[positions]
+        if raMin > raMax:
+            inRa = (ra > raMin) | (ra < raMax)
+        else:
+            inRa = (ra > raMin) & (ra < raMax)
+        inside[have] = inRa & (dec > decMin) & (dec < decMax)
+        return inside
+
+    def within(self, inner, outer):
+        '''
+            Checks if the (raMin, raMax, decMin, decMax) box inner is inside
+            the box outer. Boxes which wrap around RA 0 are only compared
+            with other boxes which wrap.
+        '''
+        innerRaMin, innerRaMax, innerDecMin, innerDecMax = inner
+        outerRaMin, outerRaMax, outerDecMin, outerDecMax = outer
+        innerRaMin, innerRaMax = self.wrapRa(innerRaMin), self.wrapRa(innerRaMax)
+        outerRaMin, outerRaMax = self.wrapRa(outerRaMin), self.wrapRa(outerRaMax)
+        if innerDecMin < outerDecMin or innerDecMax > outerDecMax:
+            return False
+        if (innerRaMin > innerRaMax) != (outerRaMin > outerRaMax):
+            return False
+        return innerRaMin >= outerRaMin and innerRaMax <= outerRaMax
+
+    def cone(self, ra, dec, radius):
+        '''
+            Finds the stars within radius degrees of (ra, dec), in degrees.
+            Returns the row numbers and the distances in degrees, both sorted 
+            by distance.
+        '''
+        decMin = dec - radius
+        decMax = dec + radius
+        # The widest the circle gets in RA is asin(sin(radius) / cos(dec)),
+        # unless it goes over a pole, then it's all of them
+        sinHalfWidth = np.sin(np.radians(radius)) / max(np.cos(np.radians(dec)), 1e-12)
+        if decMin <= -90.0 or decMax >= 90.0 or sinHalfWidth >= 1.0:
+            raMin, raMax = -np.inf, np.inf
+        else:
+            halfWidth = np.degrees(np.arcsin(sinHalfWidth))
+            raMin, raMax = (ra - halfWidth) % 360.0, (ra + halfWidth) % 360.0
+
+        positions = self._candidates(raMin, raMax, decMin, decMax)
+        distance = angularDistance(ra, dec, self.ra[positions], self.dec[positions])
+        inside = distance <= radius
+        positions = positions[inside]
+        distance = distance[inside]
+
+        sort = np.argsort(distance, kind='mergesort')
+        return self.order[positions[sort]], distance[sort]
+
+    def polygon(self, ras, decs):
+        '''
+            Finds the stars inside a polygon on the sky, given by arrays of 
+            the RAs and Decs (in degrees) of its corners, in order.
+            The edges are taken to be straight lines in RA and Dec, which
+            is close enough for regions of a few degrees away from the poles.
+            The polygon may cross RA 0. 
+            Returns the row numbers, sorted.
+        '''
+        ras = np.asarray(ras, dtype=float) % 360.0
+        decs = np.asarray(decs, dtype=float)
+
+        # Unwrap the RAs around the first corner so an edge over 0h
+        # doesn't go the long way around
+        ras = ras[0] + (ras - ras[0] + 180.0) % 360.0 - 180.0
+        # Only the stars in the bounding box can be inside
+        # (the corners themselves are on the edge, so the box isn't strict)
+        raMin = np.nextafter(ras.min(), -np.inf) % 360.0
+        raMax = np.nextafter(ras.max(), np.inf) % 360.0
+        positions = self._candidates(raMin, raMax, decs.min(), decs.max())
+
+        x = ras[0] + (self.ra[positions] - ras[0] + 180.0) % 360.0 - 180.0
+        y = self.dec[positions]
+
+        # Ray casting: count how many edges a line from the star crosses
+        inside = np.zeros(len(positions), dtype=bool)
+        for i in range(len(ras)):
+            x1, y1 = ras[i - 1], decs[i - 1]
+            x2, y2 = ras[i], decs[i]
+            crosses = (y1 > y) != (y2 > y)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                xCross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+            inside ^= crosses & (x < xCross)
+
+        return np.sort(self.order[positions[inside]])
+
+
+class ConstraintEngine(object):
+    '''
+        Finds the rows matching a set of constraints, remembering the rows
+        matching each constraint (predicate) and each combination of them
+        so that changing one bound only costs as much as the change.
+        When a query comes in:
+         - a predicate whose bounds haven't changed reuses its rows
+         - a predicate whose bounds only got tighter checks its old rows 
+           against the new bounds, rather than starting over
+         - anything else looks its rows up again
+        and the combination is narrowed from its last result in the same
+        way, or made again from the predicate with the fewest rows.
+        Predicates are objects (e.g. RangeIndex, ZoneIndex) with methods
+        rows(*bounds), contains(rows, *bounds) and within(inner, outer).
+    '''
+
+    def __init__(self, predicates=None):
+        self.predicates = dict(predicates or {})
+        # Last bounds and matching rows of each predicate
+        self.lastBounds = {}
+        self.lastRows = {}
+        # Last bounds and matching rows of each combination of predicates
+        self.results = {}
+        # What happened to each predicate in the last query, by name:
+        # 'same', 'narrowed' or 'new'
+        self.changes = {}
+
+    def setPredicate(self, name, predicate):
+        '''
+            Adds (or replaces) the predicate name, forgetting anything 
+            remembered about the old one.
+        '''
+        self.predicates[name] = predicate
+        self.lastBounds.pop(name, None)
+        self.lastRows.pop(name, None)
+        for names in list(self.results):
+            if name in names:
+                del self.results[names]
+
+    def reset(self):
+        '''
+            Forgets all of the remembered rows.
+        '''
+        self.lastBounds.clear()
+        self.lastRows.clear()
+        self.results.clear()
+        self.changes.clear()
+
+    def _relation(self, name, bounds, oldBounds):
+        '''
+            Compares new bounds of the predicate name to old ones.
+            Returns 'same', 'narrowed' (inside the old ones) or 'new'.
+        '''
+        if oldBounds is None:
+            return 'new'
+        if tuple(bounds) == tuple(oldBounds):
+            return 'same'
+        if self.predicates[name].within(bounds, oldBounds):
+            return 'narrowed'
+        return 'new'
+
+    def predicateRows(self, name, bounds):
+        '''
+            Gets the rows matching the predicate name with bounds, 
+            using the rows it matched last time if it can.
+        '''
+        bounds = tuple(bounds)
+        predicate = self.predicates[name]
+        change = self._relation(name, bounds, self.lastBounds.get(name))
+        if change == 'narrowed':
+            rows = self.lastRows[name]
+            rows = rows[predicate.contains(rows, *bounds)]
+        elif change == 'new':
+            rows = np.asarray(predicate.rows(*bounds), dtype=np.intp)
+        else:
+            rows = self.lastRows[name]
+
+        self.changes[name] = change
+        self.lastBounds[name] = bounds
+        self.lastRows[name] = rows
+        return rows
+
+    def query(self, bounds):
+        '''
+            Finds the rows which are inside all of the bounds, a dictionary
+            of bounds (tuples) by predicate name.
+            Returns the matching row numbers, sorted.
+        '''
+        if not bounds:
+            raise ValueError("ConstraintEngine.query needs at least one bound")
+        names = tuple(sorted(bounds))
+        bounds = dict((name, tuple(bounds[name])) for name in names)
+        self.changes = {}
+        for name in names:
+            self.predicateRows(name, bounds[name])
+
+        # Narrow the last result of this combination if all of the bounds
+        # are the same or tighter than they were for it
+        last = self.results.get(names)
+        if last is not None:
+            lastBounds, rows = last
+            relations = [(name, self._relation(name, bounds[name], lastBounds[name])) for name in names]
+            if all(relation != 'new' for name, relation in relations):
+                for name, relation in relations:
+                    if relation == 'narrowed' and len(rows) > 0:
+                        rows = rows[self.predicates[name].contains(rows, *bounds[name])]
+                self.results[names] = (bounds, rows)
+                return rows
+
+        # Otherwise start from the predicate with the fewest rows
+        ordered = sorted(names, key=lambda name: len(self.lastRows[name]))
+        rows = self.lastRows[ordered[0]]
+        for name in ordered[1:]:
+            if len(rows) == 0:
+                break
+            rows = rows[self.predicates[name].contains(rows, *bounds[name])]
+        rows = np.sort(rows)
+
+        self.results[names] = (bounds, rows)
+        return rows
+
+
+def unitVectors(ra, dec):
+    '''
+        Converts RA and Dec in degrees (or arrays of them) to unit vectors
+        (x, y, z) on the sphere, as an (n x 3) array.
+    '''
+    ra = np.radians(np.atleast_1d(ra))
+    dec = np.radians(np.atleast_1d(dec))
+    return np.column_stack((np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)))
+
+
+def chordToAngle(chord):
+    '''
+        Converts the straight line distance between two unit vectors to the
+        angle between them, in degrees.
+    '''
+    return np.degrees(2.0 * np.arcsin(np.clip(np.asarray(chord) / 2.0, 0.0, 1.0)))
+
+
+def angleToChord(angle):
+    '''
+        Converts an angle in degrees to the straight line distance between
+        two unit vectors that far apart.
+    '''
+    return 2.0 * np.sin(np.radians(min(angle, 180.0)) / 2.0)
+
+
+class SkyTree(object):
+    '''
+        A KD-tree of the positions of the stars as unit vectors, for cone
+        searches and nearest neighbours around any pointing. 
+        Straight line (chord) distance between unit vectors grows with the
+        angle between them, so the nearest in the tree are the nearest on
+        the sky. Uses scipy's cKDTree if it is installed, otherwise falls
+        back to comparing against every star (still vectorized).
+        Takes arrays of RA and Dec in degrees; stars with no position
+        (masked or NaN) are left out.
+    '''
+
+    def __init__(self, ra, dec):
+        raData = np.asarray(np.ma.getdata(ra), dtype=float)
+        decData = np.asarray(np.ma.getdata(dec), dtype=float)
+        valid = (~np.ma.getmaskarray(ra) & ~np.ma.getmaskarray(dec) 
+                 & ~np.isnan(raData) & ~np.isnan(decData))
+
+        self.rows = np.flatnonzero(valid)
+        self.vectors = unitVectors(raData[self.rows], decData[self.rows])
+        self.tree = cKDTree(self.vectors) if scipyInstalled else None
+
+    def _chordDistances(self, vector, positions=None):
+        '''
+            Gets the chord distances from vector to the stars at positions
+            (or all the stars), for when there is no KD-tree.
+        '''
+        vectors = self.vectors if positions is None else self.vectors[positions]
+        return np.sqrt(np.sum((vectors - vector)**2, axis=1))
+
+    def cone(self, ra, dec, radius, allowed=None):
+        '''
+            Finds the stars within radius degrees of (ra, dec), in degrees.
+            If allowed is given it is called with an array of row numbers,
+            and should return which of them to keep (e.g. star constraints).
+            Returns the row numbers and the distances in degrees, both sorted
+            by distance.
+        '''
+        vector = unitVectors(ra, dec)[0]
+        chord = angleToChord(radius)
+        if self.tree is not None:
+            positions = np.asarray(self.tree.query_ball_point(vector, chord), dtype=np.intp)
+            distance = self._chordDistances(vector, positions)
+        else:
+            distance = self._chordDistances(vector)
+            positions = np.flatnonzero(distance <= chord)
+            distance = distance[positions]
+
+        rows = self.rows[positions]
+        if allowed is not None and len(rows) > 0:
+            keep = allowed(rows)
+            rows = rows[keep]
+            distance = distance[keep]
+
+        sort = np.argsort(distance, kind='mergesort')
+        return rows[sort], chordToAngle(distance[sort])
+
+    def nearest(self, ra, dec, k, radius=180.0, allowed=None):
+        '''
+            Finds the k stars nearest to (ra, dec), in degrees, which are no 
+            more than radius degrees away. If allowed is given it is called 
+            with an array of row numbers, and should return which of them to
+            keep (e.g. star constraints); the k nearest allowed stars are found.
+            Returns the row numbers and the distances in degrees, both sorted
+            by distance.
+        '''
+        vector = unitVectors(ra, dec)[0]
+        chord = angleToChord(radius)
+        numStars = len(self.rows)
+        if k <= 0 or numStars == 0:
+            return np.zeros(0, dtype=np.intp), np.zeros(0)
+
+        if self.tree is None:
+            distance = self._chordDistances(vector)
+            positions = np.flatnonzero(distance <= chord)
+            positions = positions[np.argsort(distance[positions], kind='mergesort')]
+            rows = self.rows[positions]
+            distance = distance[positions]
+            if allowed is not None and len(rows) > 0:
+                keep = allowed(rows)
+                rows = rows[keep]
+                distance = distance[keep]
+            return rows[:k], chordToAngle(distance[:k])
+
+        # Ask the tree for more neighbours than we need, and keep asking for
+        # more until there are k allowed ones (or there are no more)
+        ask = min(numStars, k if allowed is None else 4 * k)
+        while True:
+            distance, positions = self.tree.query(vector, k=ask, distance_upper_bound=chord)
+            distance = np.atleast_1d(distance)
+            positions = np.atleast_1d(positions)
+            found = np.isfinite(distance)
+            distance = distance[found]
+            rows = self.rows[positions[found]]
+            if allowed is not None and len(rows) > 0:
+                keep = allowed(rows)
+                rows = rows[keep]
+                distance = distance[keep]
+            if len(rows) >= k or ask >= numStars or not found.all():
+                return rows[:k], chordToAngle(distance[:k])
+            ask = min(numStars, 4 * ask)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+
+####################################
+# File name: WDS_Planner.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import os
+import sys
+import argparse
+import numpy as np
+import WDS_Extraction_Tool as wdsExtractor
+import WDS_Sexagesimal
+import WDS_Sidereal
+import WDS_Visibility
+import WDS_Index
+import WDS_Export
+
+# Plans many observing nights at once, e.g. to find the nights of a
+# semester with the most doubles in a separation range:
+#
+#     python WDS_Planner.py 2017-02-01 2017-07-31 --separation 2.0 0.5
+#
+# Nothing about the stars depends on the date, so which stars match the
+# star constraints, and when each of them can be seen from the site (the
+# visibility index), are worked out once. Each night only needs the
+# sidereal time of its start and stop.
+
+# The columns each night's results get (see NightPlanner.planNight)
+planColNames = ['WindowStart', 'WindowStop', 'BestTime', 'MinSecz', 'MinsObservable']
+
+
+class NightPlanner(object):
+    '''
+        Plans any number of observing nights with the same star
+        constraints and telescope, for a catalog (the default one if not
+        given). If preferences is None they are loaded from the
+        preferences file. The star constraints are (upper, lower) bounds,
+        like CatalogSession.setStarConstraints takes.
+    '''
+
+    def __init__(self, catalog=None, preferences=None, separation=(2.0, 0.5), magnitude=(7.0, -10.0),
+                 deltaMag=(2.0, -2.0)):
+        if catalog is None:
+            catalog = wdsExtractor.catalog
+        if preferences is None:
+            preferences = wdsExtractor.loadPreferences()
+        self.catalog = catalog
+        self.preferences = preferences
+        # Only used for its constraint math, so the nights are worked out
+        # exactly the way constrain does them
+        self.session = wdsExtractor.CatalogSession(catalog, preferences)
+        self.session.setStarConstraints(separation, magnitude, deltaMag)
+
+        # The stars which match the star constraints
+        bounds = dict((name, self.session.constraints[name])
+                      for name in ['separation', 'magnitude', 'delta magnitude'])
+        rows = WDS_Index.rangeQuery(catalog.getRangeIndexes(), bounds)
+
+        # and when each of them can be seen from the site, leaving out the
+        # ones which never can
+        index = catalog.getVisibilityIndex(preferences)
+        rows = rows[index['east'][rows] >= 0.0]
+        self.rows = rows
+        self.index = dict((name, index[name][rows]) for name in ['transit', 'east', 'west'])
+        self.dec = np.asarray(catalog.table[wdsExtractor.decDegrees])[rows]
+        self.latitude = WDS_Sexagesimal.colonToDecimal(preferences['latitude'])
+
+    def planNight(self, dateString, startTime='18:00', stopTime='24:00'):
+        '''
+            Plans the night of dateString ('yyyy-mm-dd'), from startTime to
+            stopTime (as typed into the GUI, see 
+            WDS_Extraction_Tool.nightInputs).
+            Returns a dictionary with
+             - 'date': dateString
+             - 'start', 'stop': the start and end of the night, as astropy
+               Times in UTC
+             - 'startLST', 'stopLST': the same, as local sidereal times in hours
+             - 'results': the stars which can be observed during the night,
+               as a ResultSet of the catalog with the columns:
+                - WindowStart, WindowStop: when the star can be observed
+                  (above the lowest altitude and inside the telescope's
+                  limits), in UTC 'yyyy-mm-dd hh:mm'
+                - BestTime: the time in that window with the lowest airmass
+                - MinSecz: the airmass then
+                - MinsObservable: how many minutes long the window is
+            These are the same stars constrain finds for the night with
+            the visibility index (see CatalogSession.setVisibilityConstraints).
+        '''
+        from astropy import units as u
+        inputs = wdsExtractor.nightInputs(dateString, startTime, stopTime, self.preferences)
+        self.session.setVisibilityConstraints(inputs['startTime'], inputs['stopTime'], inputs['date'])
+        stopLST, startLST = WDS_Sexagesimal.hhmmssToDecimal(self.session.constraints['visibility'])
+
+        observable = WDS_Visibility.observableBetween(self.index, startLST, stopLST)
+        subset = dict((name, self.index[name][observable]) for name in self.index)
+        windows = WDS_Visibility.observableWindows(subset, self.dec[observable], self.latitude,
+                                                   startLST, stopLST)
+
+        # The windows are in sidereal hours after the start of the night, so
+        # turn them into solar hours to get the times
+        columns = {}
+        for colName, name in [('WindowStart', 'start'), ('WindowStop', 'stop'), ('BestTime', 'best')]:
+            columns[colName] = self.timeStrings(inputs['date'], windows[name] / WDS_Sidereal.siderealRate * u.hour)
+        columns['MinSecz'] = windows['secz']
+        columns['MinsObservable'] = (windows['stop'] - windows['start']) / WDS_Sidereal.siderealRate * 60.0
+
+        results = wdsExtractor.ResultSet(self.catalog.table, self.rows[observable])
+        for colName in planColNames:
+            results.addColumn(colName, columns[colName])
+
+        return {'date': dateString, 'start': inputs['date'], 'stop': inputs['endDate'],
+                'startLST': startLST, 'stopLST': stopLST, 'results': results}
+
+    def timeStrings(self, start, offsets):
+        '''
+            Makes 'yyyy-mm-dd hh:mm' UTC strings of the times offsets (an
+            astropy Quantity array) after the astropy Time start.
+        '''
+        if len(offsets) == 0:
+            return np.zeros(0, dtype=str)
+        # Cut the iso times down to the minute by shortening the string type
+        times = np.asarray((start + offsets).iso)
+        return times.astype(times.dtype.kind + '16')
+
+    def planNights(self, dates, startTime='18:00', stopTime='24:00', progress=None):
+        '''
+            Plans each of the nights in dates (a list of 'yyyy-mm-dd', see
+            WDS_Extraction_Tool.dateRange), all from startTime to stopTime.
+            Returns a list of plans (see planNight), in the same order.
+            After each night progress(done, total) is called, if given.
+        '''
+        plans = []
+        for dateString in dates:
+            plans.append(self.planNight(dateString, startTime, stopTime))
+            if progress is not None:
+                progress(len(plans), len(dates))
+        return plans
+
+
+def bestNights(plans, count=None):
+    '''
+        Sorts plans (see NightPlanner.planNights) from the most stars that
+        can be observed to the fewest, earliest first when they are tied,
+        and returns the first count of them (all of them by default).
+    '''
+    ranked = sorted(plans, key=lambda plan: (-len(plan['results']), plan['date']))
+    if count is None:
+        return ranked
+    return ranked[:count]
+
+def plansToString(plans):
+    '''
+        Makes a table of plans: the date, the start and end of the night
+        in UTC, the number of stars which can be observed and their median
+        best airmass.
+    '''
+    lines = ['%-12s %-17s %-17s %8s %12s' % ('date', 'start (UTC)', 'stop (UTC)', 'stars', 'median secz')]
+    for plan in plans:
+        if len(plan['results']) > 0:
+            medianSecz = '%12.3f' % np.median(plan['results']['MinSecz'])
+        else:
+            medianSecz = '%12s' % '-'
+        lines.append('%-12s %-17s %-17s %8d %s' % (plan['date'], plan['start'].iso[:16], plan['stop'].iso[:16],
+                                                   len(plan['results']), medianSecz))
+    return '\n'.join(lines)
+
+def main(argv=None):
+    '''
+        Plans every night in a range of dates, and prints the nights with
+        the most stars which can be observed.
+    '''
+    parser = argparse.ArgumentParser(description="Finds the best nights to observe WDS doubles in a range of dates.")
+    parser.add_argument('first', help="first night, yyyy-mm-dd")
+    parser.add_argument('last', help="last night, yyyy-mm-dd")
+    parser.add_argument('--every', type=int, default=1, help="days between nights (default %(default)s)")
+    parser.add_argument('--start', default='18:00', help="local start time of each night (default %(default)s)")
+    parser.add_argument('--stop', default='24:00', help="local stop time of each night (default %(default)s)")
+    parser.add_argument('--separation', type=float, nargs=2, default=[2.0, 0.5], metavar=('UPPER', 'LOWER'),
+                        help="separation bounds in arcseconds (default 2.0 0.5)")
+    parser.add_argument('--magnitude', type=float, nargs=2, default=[7.0, -10.0], metavar=('UPPER', 'LOWER'),
+                        help="primary magnitude bounds (default 7.0 -10.0)")
+    parser.add_argument('--delta-mag', type=float, nargs=2, default=[2.0, -2.0], metavar=('UPPER', 'LOWER'),
+                        help="magnitude difference bounds (default 2.0 -2.0)")
+    parser.add_argument('--preferences', default='WDS_Preferences.json',
+                        help="telescope preferences file (default %(default)s)")
+    parser.add_argument('--catalog', default=wdsExtractor.catalogFilename,
+                        help="WDS catalog file (default %(default)s)")
+    parser.add_argument('--top', type=int, default=10,
+                        help="how many of the best nights to show (default %(default)s, 0 for all in date order)")
+    parser.add_argument('--output-dir', default=None,
+                        help="also save each night's stars here, as <date>.csv")
+    args = parser.parse_args(argv)
+
+    planner = NightPlanner(wdsExtractor.Catalog(args.catalog), wdsExtractor.loadPreferences(args.preferences),
+                           tuple(args.separation), tuple(args.magnitude), tuple(args.delta_mag))
+    plans = planner.planNights(wdsExtractor.dateRange(args.first, args.last, args.every), args.start, args.stop)
+
+    if args.output_dir is not None:
+        if not os.path.isdir(args.output_dir):
+            os.makedirs(args.output_dir)
+        for plan in plans:
+            WDS_Export.export(plan['results'], os.path.join(args.output_dir, plan['date'] + '.csv'))
+
+    if args.top > 0:
+        plans = bestNights(plans, args.top)
+    print(plansToString(plans))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
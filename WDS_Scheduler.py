@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+
+####################################
+# File name: WDS_Scheduler.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import time
+import numpy as np
+import WDS_Extraction_Tool as wdsExtractor
+import WDS_Sexagesimal
+import WDS_Visibility
+import WDS_Index
+
+# Orders the stars of a constrained session into an observing sequence
+# for the night: when to start each one, so that each is observed close
+# to its best airmass without spending the night slewing. E.g.
+#
+#     session.constrain()
+#     schedule = WDS_Scheduler.scheduleSession(session, exposure=5.0)
+#     print(schedule['results'])
+#
+# The night is cut into time slots, and the airmass of every star in
+# every slot is worked out at once (see WDS_Visibility). The sequence is
+# built greedily (always observing next the star which costs the least
+# from where the telescope is now), then improved by reversing and
+# moving short runs of it while that lowers the total cost, then topped
+# up with any stars that still fit in the time that saved.
+# The cost of observing a star, in minutes, is the time spent slewing to
+# it and waiting for it to be observable, plus airmassWeight minutes for
+# each unit of airmass it is observed at above its best of the night.
+
+# How fast the telescope slews, in degrees per second
+defaultSlewRate = 1.0
+# Minutes of cost for each unit of airmass above a star's best
+defaultAirmassWeight = 100.0
+
+# The columns the scheduled stars get (see scheduleSession)
+scheduleColNames = ['StartTime', 'StopTime', 'ScheduledSecz', 'MinSecz', 'SlewDeg']
+
+
+class NightScheduler(object):
+    '''
+        Schedules a night of observing for a set of stars. Takes the RA
+        and Dec of the stars in decimal degrees, a visibility grid of them
+        over the night (see WDS_Visibility.calcVisibilityGrid, with the
+        times every step minutes from the start of the night), and how
+        many minutes each star takes to observe (its exposure plus
+        overhead; one number for all of them, or one per star).
+        A star can be started in a slot if its airmass is at most
+        airmassCap at both the start and the end of its observation, and
+        the observation ends before the night does.
+    '''
+
+    def __init__(self, ra, dec, grid, duration, step, slewRate=defaultSlewRate,
+                 airmassWeight=defaultAirmassWeight, airmassCap=2.0):
+        self.ra = np.ravel(np.asarray(ra, dtype=float))
+        self.dec = np.ravel(np.asarray(dec, dtype=float))
+        numStars = len(self.ra)
+        self.duration = np.ones(numStars) * duration
+        self.step = float(step)
+        self.slewRate = slewRate
+        self.airmassWeight = airmassWeight
+
+        secz = grid['secz']
+        numTimes = secz.shape[1]
+        self.numTimes = numTimes
+        observable = (grid['alt'] > 0) & (secz <= airmassCap)
+
+        # The slot each observation would end in, if it started in each slot
+        lengths = np.ceil(self.duration / self.step - 1e-9).astype(int)
+        endSlots = np.arange(numTimes)[np.newaxis, :] + lengths[:, np.newaxis]
+        endObservable = observable[np.arange(numStars)[:, np.newaxis], np.minimum(endSlots, numTimes - 1)]
+        canStart = observable & endObservable & (endSlots < numTimes)
+
+        # The first slot from each slot on that each star can be started in
+        # (numTimes if there isn't one), so waiting for a star is a lookup
+        slots = np.where(canStart, np.arange(numTimes)[np.newaxis, :], numTimes)
+        self.nextStart = np.minimum.accumulate(slots[:, ::-1], axis=1)[:, ::-1]
+
+        # How much worse than its best of the night each star is in each slot
+        with np.errstate(invalid='ignore'):
+            self.minSecz = np.min(np.where(observable, secz, np.inf), axis=1)
+            self.excess = np.where(observable, secz - self.minSecz[:, np.newaxis], np.inf)
+        self.secz = secz
+
+    def nextCosts(self, candidates, finish, previous):
+        '''
+            Works out what observing each of the stars candidates (an array
+            of star numbers) would cost, if it is the next star after
+            previous (None for the first star of the night), which finishes
+            finish minutes into the night.
+            Returns arrays of the start time of each (in minutes), the slot
+            it starts in, its cost and the slew to it in degrees. Stars
+            which can't be observed any more cost inf.
+        '''
+        if previous is None:
+            slew = np.zeros(len(candidates))
+        else:
+            slew = WDS_Index.angularDistance(self.ra[previous], self.dec[previous],
+                                             self.ra[candidates], self.dec[candidates])
+        slewMinutes = slew / self.slewRate / 60.0
+        arrival = finish + slewMinutes
+
+        # Wait for the first slot each star can be started in
+        firstSlot = np.ceil(arrival / self.step - 1e-9).astype(int)
+        inNight = firstSlot < self.numTimes
+        slot = self.nextStart[candidates, np.minimum(firstSlot, self.numTimes - 1)]
+        possible = inNight & (slot < self.numTimes)
+        slot = np.minimum(slot, self.numTimes - 1)
+        start = np.where(slot == firstSlot, arrival, slot * self.step)
+
+        cost = slewMinutes + (start - arrival) + self.airmassWeight * self.excess[candidates, slot]
+        cost[~possible] = np.inf
+        return start, slot, cost, slew
+
+    def greedy(self, order=None):
+        '''
+            Builds a sequence by always picking the cheapest star to
+            observe next (see nextCosts), until no more can be observed.
+            If order (a list of star numbers) is given, it carries on from
+            the end of that sequence instead of the start of the night.
+            Returns the sequence as a list of star numbers.
+        '''
+        order = list(order or [])
+        remaining = np.isfinite(self.minSecz)
+        remaining[order] = False
+        finish, previous = 0.0, None
+        if order:
+            finish = self.timings(order)['stop'][-1]
+            previous = order[-1]
+
+        while remaining.any():
+            candidates = np.flatnonzero(remaining)
+            start, slot, cost, slew = self.nextCosts(candidates, finish, previous)
+            best = np.argmin(cost)
+            if not np.isfinite(cost[best]):
+                break
+            previous = candidates[best]
+            order.append(previous)
+            remaining[previous] = False
+            finish = start[best] + self.duration[previous]
+        return order
+
+    def timings(self, order):
+        '''
+            Works out when each star of a sequence (a list of star numbers)
+            is observed. Returns a dictionary of arrays, one value per star
+            in the sequence: 'start' and 'stop' in minutes into the night,
+            'slot', 'cost' and 'slew' (see nextCosts). A star which can't
+            be observed any more costs inf.
+        '''
+        columns = dict((name, np.zeros(len(order))) for name in ['start', 'stop', 'cost', 'slew'])
+        columns['slot'] = np.zeros(len(order), dtype=int)
+        finish, previous = 0.0, None
+        for number, star in enumerate(order):
+            start, slot, cost, slew = self.nextCosts(np.array([star]), finish, previous)
+            columns['start'][number] = start[0]
+            columns['slot'][number] = slot[0]
+            columns['cost'][number] = cost[0]
+            columns['slew'][number] = slew[0]
+            finish = start[0] + self.duration[star]
+            columns['stop'][number] = finish
+            previous = star
+        return columns
+
+    def improve(self, order, timeLimit=1.0, maxRun=8):
+        '''
+            Improves a sequence with local search: reverses, or moves one
+            star along, runs of up to maxRun stars, whenever that lowers
+            the total cost (and every star can still be observed), until
+            no move does or timeLimit seconds have passed.
+            Returns the improved sequence.
+        '''
+        numOrder = len(order)
+        if numOrder < 2:
+            return list(order)
+        deadline = time.time() + timeLimit
+
+        # Everything the search looks up, for just the stars in the sequence,
+        # as plain lists (which are much faster than numpy one at a time)
+        stars = np.asarray(order)
+        slewMinutes = (WDS_Index.angularDistance(self.ra[stars][:, np.newaxis], self.dec[stars][:, np.newaxis],
+                                                 self.ra[stars][np.newaxis, :], self.dec[stars][np.newaxis, :])
+                       / self.slewRate / 60.0).tolist()
+        nextStart = self.nextStart[stars].tolist()
+        excess = (self.airmassWeight * self.excess[stars]).tolist()
+        duration = self.duration[stars].tolist()
+        step, numTimes = self.step, self.numTimes
+
+        def walk(sequence, first, last):
+            # Works out the finish time and running total cost after each
+            # position of sequence (a list of positions in order), which is
+            # the same as the current one before first and after last.
+            # Once it is back in step with the current one after last, the
+            # rest is the same. Returns None if a star can't be observed.
+            finishes = oldFinishes[:first]
+            totals = oldTotals[:first]
+            finish = finishes[-1] if first > 0 else 0.0
+            total = totals[-1] if first > 0 else 0.0
+            previous = sequence[first - 1] if first > 0 else None
+            for number in range(first, numOrder):
+                star = sequence[number]
+                slew = slewMinutes[previous][star] if previous is not None else 0.0
+                arrival = finish + slew
+                firstSlot = int(np.ceil(arrival / step - 1e-9))
+                if firstSlot >= numTimes:
+                    return None
+                slot = nextStart[star][firstSlot]
+                if slot >= numTimes:
+                    return None
+                start = arrival if slot == firstSlot else slot * step
+                total += slew + (start - arrival) + excess[star][slot]
+                finish = start + duration[star]
+                finishes.append(finish)
+                totals.append(total)
+                previous = star
+                if number > last and finish == oldFinishes[number]:
+                    offset = total - oldTotals[number]
+                    return (finishes + oldFinishes[number + 1:],
+                            totals + [oldTotal + offset for oldTotal in oldTotals[number + 1:]])
+            return finishes, totals
+
+        # The sequence as positions in order, with the finish time and the
+        # running total cost after each position
+        current = list(range(numOrder))
+        oldFinishes, oldTotals = [], []
+        oldFinishes, oldTotals = walk(current, 0, numOrder)
+
+        improved = True
+        while improved and time.time() < deadline:
+            improved = False
+            for first in range(numOrder - 1):
+                if time.time() > deadline:
+                    break
+                for last in range(first + 1, min(numOrder, first + maxRun)):
+                    run = current[first:last + 1]
+                    # Reverse the run, or move its first or last star to
+                    # the other end of it
+                    moves = [run[::-1], run[1:] + run[:1], run[-1:] + run[:-1]]
+                    for move in moves:
+                        candidate = current[:first] + move + current[last + 1:]
+                        result = walk(candidate, first, last)
+                        if result is not None and result[1][-1] < oldTotals[-1] - 1e-9:
+                            current = candidate
+                            oldFinishes, oldTotals = result
+                            improved = True
+                            break
+
+        return [order[position] for position in current]
+
+    def schedule(self, timeLimit=1.0):
+        '''
+            Makes the sequence for the night: greedily, then improved (see
+            improve), then topped up with any stars that fit in the time
+            the improvement saved. Returns the sequence as a list of star
+            numbers.
+        '''
+        order = self.greedy()
+        order = self.improve(order, timeLimit)
+        return self.greedy(order)
+
+
+def scheduleSession(session, exposure=5.0, overhead=2.0, slewRate=defaultSlewRate,
+                    airmassWeight=defaultAirmassWeight, airmassCap=2.0, step=2, timeLimit=1.0,
+                    accurate=False):
+    '''
+        Schedules the stars of a constrained session (its interestingHere)
+        for its night, from the observing date to the end of the night
+        (see CatalogSession.setDate). exposure and overhead (e.g. for
+        acquisition) are in minutes, either one number for all the stars
+        or one per star. The night is cut into slots of step minutes.
+        The airmasses come from WDS_Visibility.calcGeometricGrid, or from
+        the full astropy transformation (calcVisibilityGrid, much slower)
+        if accurate is True.
+        Returns a dictionary with
+         - 'results': the scheduled stars in the order to observe them, as
+           a ResultSet with the columns
+            - StartTime, StopTime: when to observe the star, in UTC
+              'yyyy-mm-dd hh:mm'
+            - ScheduledSecz: the airmass at the start
+            - MinSecz: the star's best airmass of the night
+            - SlewDeg: the slew to it from the star before, in degrees
+         - 'slew': the total slew, in degrees
+         - 'idle': the minutes spent waiting for stars to be observable
+         - 'unscheduled': how many of the stars weren't scheduled
+    '''
+    from astropy import units as u
+    if session.observingEndDate is None:
+        raise ValueError("The end of the night is not set, use setDate(date, endDate)")
+    stars = session.interestingHere
+    preferences = session.getPreferences()
+
+    times = WDS_Visibility.nightTimes(session.observingDate, session.observingEndDate, step)
+    ra = np.asarray(stars[wdsExtractor.raDegrees], dtype=float)
+    dec = np.asarray(stars[wdsExtractor.decDegrees], dtype=float)
+    if accurate:
+        grid = WDS_Visibility.calcVisibilityGrid(ra / 15.0, dec, times, wdsExtractor.observingLocation(preferences))
+    else:
+        grid = WDS_Visibility.calcGeometricGrid(ra / 15.0, dec, times,
+                                                WDS_Sexagesimal.colonToDecimal(preferences['latitude']),
+                                                WDS_Sexagesimal.colonToDecimal(preferences['longitude']))
+
+    scheduler = NightScheduler(ra, dec, grid, np.asarray(exposure) + np.asarray(overhead), step,
+                               slewRate, airmassWeight, airmassCap)
+    order = scheduler.schedule(timeLimit)
+    timings = scheduler.timings(order)
+
+    columns = {}
+    for colName, name in [('StartTime', 'start'), ('StopTime', 'stop')]:
+        if len(order) > 0:
+            utc = np.asarray((session.observingDate + timings[name] * u.min).iso)
+            # Cut the iso times down to the minute by shortening the string type
+            columns[colName] = utc.astype(utc.dtype.kind + '16')
+        else:
+            columns[colName] = np.zeros(0, dtype=str)
+    columns['ScheduledSecz'] = scheduler.secz[order, timings['slot']] if order else np.zeros(0)
+    columns['MinSecz'] = scheduler.minSecz[order]
+    columns['SlewDeg'] = timings['slew']
+
+    results = wdsExtractor.ResultSet(stars.master, stars.rows[order])
+    for colName in scheduleColNames:
+        results.addColumn(colName, columns[colName])
+
+    slewMinutes = timings['slew'] / slewRate / 60.0
+    if len(order) > 0:
+        previousStops = np.concatenate([[0.0], timings['stop'][:-1]])
+        idle = np.sum(np.maximum(timings['start'] - previousStops - slewMinutes, 0.0))
+    else:
+        idle = 0.0
+    return {'results': results, 'slew': np.sum(timings['slew']), 'idle': idle,
+            'unscheduled': len(stars) - len(order)}
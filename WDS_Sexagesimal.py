@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+####################################
+# File name: WDS_Sexagesimal.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import numpy as np
+
+# Conversions between the ways coordinates and times are written in the
+# WDS tool. All of these take single numbers or arrays, and give back the
+# same. The formats are:
+#  - hhmmss.s floats (or ddmmss.s for degrees), like the WDS RA and Dec,
+#    e.g. 123456.7 is 12:34:56.7. Negative numbers are negative coordinates.
+#  - decimal hours (or degrees), e.g. 12.58
+#  - colon separated strings, like in the preferences, e.g. '12:34:56.7'
+
+
+def _scalarOrArray(values):
+    '''
+        Returns a 0-d array as a float, so single numbers stay single numbers.
+    '''
+    if np.ndim(values) == 0:
+        return float(values)
+    return values
+
+
+def hhmmssToDecimal(hhmmss):
+    '''
+        Converts hhmmss.s (or ddmmss.s) floats to decimal hours (or degrees).
+        The sign is taken from the number itself. Minutes and seconds of 60
+        or more (e.g. from adding hhmmss floats directly) carry over.
+    '''
+    data = np.asarray(hhmmss, dtype=float)
+    sign = np.where(data < 0, -1.0, 1.0)
+    data = np.abs(data)
+
+    # Split the float into hh, mm, and ss
+    seconds = data % 100
+    minutes = (data % 10000 - seconds) / 100
+    hours = (data - data % 10000) / 10000
+
+    return _scalarOrArray(sign * (hours + minutes / 60.0 + seconds / 3600.0))
+
+
+def decimalToHhmmss(decimal):
+    '''
+        Converts decimal hours (or degrees) to hhmmss.s (or ddmmss.s) floats.
+        The seconds are rounded to a microsecond first, so that e.g.
+        16.1666666667 comes out as 161000.0 and not 160959.9999.
+    '''
+    data = np.asarray(decimal, dtype=float)
+    sign = np.where(data < 0, -1.0, 1.0)
+    totalSeconds = np.round(np.abs(data) * 3600.0, 6)
+
+    hours = np.floor(totalSeconds / 3600.0)
+    minutes = np.floor((totalSeconds - hours * 3600.0) / 60.0)
+    seconds = totalSeconds - hours * 3600.0 - minutes * 60.0
+
+    return _scalarOrArray(sign * (hours * 10000 + minutes * 100 + seconds))
+
+
+def hhmmssAdd(first, second):
+    '''
+        Adds hhmmss.s floats, first + second, rolling over at 60 seconds
+        and 60 minutes. Hours are not wrapped at 24.
+    '''
+    return decimalToHhmmss(hhmmssToDecimal(first) + hhmmssToDecimal(second))
+
+
+def hhmmssSubtract(first, second):
+    '''
+        Subtracts hhmmss.s floats, first - second, borrowing at 60 seconds
+        and 60 minutes. Hours are not wrapped at 24.
+    '''
+    return decimalToHhmmss(hhmmssToDecimal(first) - hhmmssToDecimal(second))
+
+
+def colonToDecimal(strings):
+    '''
+        Converts colon separated strings, hh:mm:ss.s (or dd:mm:ss.s), to
+        decimal hours (or degrees). hh:mm and plain numbers work too.
+        A leading - makes the whole coordinate negative.
+    '''
+    strings = np.char.strip(np.asarray(strings, dtype=str))
+    negative = np.char.startswith(strings, '-')
+    strings = np.char.lstrip(strings, '+-')
+
+    decimal = np.zeros(strings.shape)
+    rest = strings
+    for power in range(3):
+        split = np.char.partition(rest, ':')
+        part = split[..., 0]
+        have = np.char.str_len(part) > 0
+        decimal[have] += part[have].astype(float) / 60.0**power
+        rest = split[..., 2]
+
+    return _scalarOrArray(np.where(negative, -decimal, decimal))
+
+
+def hhmmssToColonString(hhmmss):
+    '''
+        Converts hhmmss.s (or ddmmss.s) floats to colon separated strings,
+        hh:mm:ss.s, with leading zeros and the seconds rounded to 2 decimal
+        places (e.g. 12:04:05.5, 12:34:56.79). Negative numbers get a
+        leading -. Gives an array of strings (or a single string).
+    '''
+    data = np.asarray(hhmmss, dtype=float)
+    sign = np.where(data < 0, '-', '')
+    data = np.abs(data)
+
+    # Casting hours and minutes into int so there are no trailing
+    # decimal points, except seconds are rounded to 2 decimal points
+    seconds = np.char.mod('%s', np.round(data % 100, 2))
+    minutes = np.char.mod('%02d', ((data % 10000 - data % 100) / 100).astype(int))
+    hours = np.char.mod('%02d', ((data % 1000000 - data % 10000) / 10000).astype(int))
+
+    # Make sure there are leading zeros when the seconds are <10
+    seconds = np.where(np.char.find(seconds, '.') < 2, np.char.add('0', seconds), seconds)
+
+    strings = np.char.add(np.char.add(np.char.add(np.char.add(np.char.add(sign, hours), ':'), minutes), ':'), seconds)
+    if strings.ndim == 0:
+        return str(strings)
+    return strings
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+####################################
+# File name: WDS_Sidereal.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Julian date of J2000.0
+j2000 = 2451545.0
+# Sidereal hours per solar hour
+siderealRate = 1.00273790935
+
+# Memoized sidereal time at 0h UTC of each day (by MJD and longitude),
+# see localSiderealTime. Only the dayTableSize days used last are kept
+# (a few years of nights), and it is locked so threads can share it.
+dayTableSize = 2048
+_dayTable = OrderedDict()
+_dayTableLock = threading.Lock()
+
+
+def greenwichSiderealTime(jd1, jd2):
+    '''
+        Calculates the Greenwich mean sidereal time in hours for arrays of
+        (two part) Julian dates, jd1 + jd2.
+        Uses the IAU 1982 expression (Meeus, Astronomical Algorithms 12.4)
+        with UTC standing in for UT1. That needs no IERS tables, so it
+        works offline for any date; the price is an error of at most
+        |UT1 - UTC| < 0.9 s of time.
+    '''
+    # Keep the big and small parts apart as long as possible for precision
+    days = (np.asarray(jd1, dtype=float) - j2000) + np.asarray(jd2, dtype=float)
+    centuries = days / 36525.0
+    degrees = (280.46061837 + 360.98564736629 * days
+               + 0.000387933 * centuries**2 - centuries**3 / 38710000.0)
+    return (degrees % 360.0) / 15.0
+
+
+def localSiderealTime(times, longitude):
+    '''
+        Calculates the local mean sidereal time in hours (0 to 24) for an
+        astropy Time (a single time or an array of them) at longitude,
+        in degrees east (west is negative).
+        The sidereal time at 0h UTC of each day is worked out once and
+        remembered, so evaluating many times on the same nights (or the
+        same nights again) only costs a multiply and an add per time.
+    '''
+    mjd = np.atleast_1d(times.utc.mjd)
+    days = np.floor(mjd)
+
+    # Fill in the table for any days we haven't seen yet, all in one go
+    uniqueDays, inverse = np.unique(days, return_inverse=True)
+    keys = [(day, longitude) for day in uniqueDays]
+    with _dayTableLock:
+        known = [_dayTable.pop(key, None) for key in keys]
+        missing = [i for i in range(len(keys)) if known[i] is None]
+        if missing:
+            starts = greenwichSiderealTime(uniqueDays[missing] + 2400000.5, 0.0) + longitude / 15.0
+            for i, start in zip(missing, starts):
+                known[i] = start
+        # Put them (back) at the end as the most recently used, and drop
+        # the ones used longest ago
+        for key, start in zip(keys, known):
+            _dayTable[key] = start
+        while len(_dayTable) > dayTableSize:
+            _dayTable.popitem(last=False)
+    dayStarts = np.array(known)
+
+    lst = (dayStarts[inverse] + (mjd - days) * 24.0 * siderealRate) % 24.0
+    if np.ndim(times.jd1) == 0:
+        return lst[0]
+    return lst.reshape(np.shape(times.jd1))
+
+
+def localMeanSolarTime(times, longitude):
+    '''
+        Gets the local mean solar (clock) time in hours (0 to 24) of an
+        astropy Time at longitude, in degrees east (west is negative).
+    '''
+    mjd = times.utc.mjd
+    return ((mjd - np.floor(mjd)) * 24.0 + longitude / 15.0) % 24.0
+
+
+def localTimeToUtc(time, longitude):
+    '''
+        Takes an astropy Time which was made from a local mean solar time
+        (like the times typed into the GUI) as if it were UTC, and returns
+        the actual UTC time at longitude, in degrees east (west is negative).
+    '''
+    # (astropy is slow to import, so it's only imported when it's needed)
+    from astropy import units as u
+    return time - (longitude / 15.0) * u.hour
+
+
+def clockTimeToUtc(time, longitude, utcOffset=None):
+    '''
+        Takes an astropy Time which was made from a clock time (like the
+        times typed into the GUI) as if it were UTC, and returns the actual
+        UTC time. The clock is local mean solar time at longitude (see
+        localTimeToUtc), or if utcOffset is given, the civil time of a time
+        zone utcOffset hours ahead of UTC (e.g. -7 for PDT).
+    '''
+    if utcOffset is None:
+        return localTimeToUtc(time, longitude)
+    from astropy import units as u
+    return time - utcOffset * u.hour
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+####################################
+# File name: WDS_Synthetic.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import sys
+import argparse
+import numpy as np
+
+# Makes fake WDS catalogs in the same CSV format as WDS_CSV_cat.txt, of
+# any size, e.g. to benchmark the tool (see WDS_Benchmark) without the
+# real catalog:
+#
+#     python WDS_Synthetic.py 1000000 WDS_fake_cat.txt
+#
+# The stars are spread evenly over the sky, with made up but plausible
+# names, separations, magnitudes, etc. Like the real catalog, some rows
+# have a malformed RADec (two signs, no sign, a typo, or nothing) and
+# some have blank (or '.') magnitudes.
+
+# Discoverer codes the names are made from
+discovererCodes = ['STF', 'STT', 'A', 'HU', 'BU', 'COU', 'KUI', 'RST', 'HDS', 'B', 'J', 'ES']
+# The other text columns, picked at random
+componentChoices = ['', '', 'AB', 'AC', 'BC', 'AB-C']
+spectralTypeChoices = ['', 'G5', 'K0III', 'A0', 'F8V', 'B9', 'M2III', 'K2']
+durchmusterungChoices = ['', '+74 1082', '-12 4523', '+38 2285', '-45 1732']
+noteChoices = ['', '', 'N', 'O', 'C']
+
+
+def syntheticLines(numRows, seed=0, malformedFraction=0.02, blankMagFraction=0.05, chunkSize=100000):
+    '''
+        Makes the rows of a fake WDS catalog, chunkSize rows at a time.
+        Yields lists of CSV lines (without the newlines).
+        A fraction malformedFraction of the rows get a malformed RADec,
+        and a fraction blankMagFraction of the primary and secondary
+        magnitudes are blank. The same seed always makes the same catalog.
+    '''
+    random = np.random.RandomState(seed)
+    for chunkStart in range(0, numRows, chunkSize):
+        count = min(chunkSize, numRows - chunkStart)
+
+        # Even over the sky: uniform in RA and in sin(Dec)
+        # RA in hundredths of a second of time
+        raTotal = random.randint(0, 24 * 3600 * 100, count)
+        raH, raRest = np.divmod(raTotal, 3600 * 100)
+        raM, raS = np.divmod(raRest, 60 * 100)
+        # Dec in tenths of an arcsecond
+        dec = np.degrees(np.arcsin(random.uniform(-1.0, 1.0, count)))
+        decTotal = np.minimum((np.abs(dec) * 36000).astype(int), 90 * 36000 - 1)
+        decD, decRest = np.divmod(decTotal, 36000)
+        decM, decS = np.divmod(decRest, 600)
+        signs = np.where(dec >= 0, '+', '-')
+
+        # Separations are spread over orders of magnitude
+        sepFirst = 10.0 ** random.uniform(-1.0, 2.3, count)
+        sepLast = sepFirst * random.uniform(0.5, 1.5, count)
+        priMags = random.normal(9.5, 2.5, count)
+        secMags = priMags + random.exponential(1.5, count)
+        firstYears = random.randint(1780, 2010, count)
+        lastYears = np.minimum(firstYears + random.randint(0, 100, count), 2016)
+
+        codes = random.randint(0, len(discovererCodes), count)
+        numbers = random.randint(1, 9999, count)
+        components = random.randint(0, len(componentChoices), count)
+        spectralTypes = random.randint(0, len(spectralTypeChoices), count)
+        durchmusterungs = random.randint(0, len(durchmusterungChoices), count)
+        notes = random.randint(0, len(noteChoices), count)
+        observations = random.randint(1, 200, count)
+        posAngles = random.randint(0, 360, (count, 2))
+        properMotions = random.randint(-300, 300, (count, 2))
+
+        blankPri = random.uniform(size=count) < blankMagFraction
+        blankSec = random.uniform(size=count) < blankMagFraction
+        # How each malformed RADec is broken (0 to 3), if it is
+        malformed = random.uniform(size=count) < malformedFraction
+        howMalformed = random.randint(0, 4, count)
+
+        # Each column is made as a list of strings all at once, and only the
+        # broken rows are fixed up one at a time
+        raStrings = ['%02d%02d%05.2f' % values for values in zip(raH.tolist(), raM.tolist(), (raS / 100.0).tolist())]
+        decStrings = ['%02d%02d%04.1f' % values for values in zip(decD.tolist(), decM.tolist(), (decS / 10.0).tolist())]
+        signList = signs.tolist()
+        radecs = [ra + sign + dec for ra, sign, dec in zip(raStrings, signList, decStrings)]
+        for row in np.flatnonzero(malformed):
+            how = howMalformed[row]
+            if how == 0:
+                radecs[row] = radecs[row] + '-01'
+            elif how == 1:
+                radecs[row] = raStrings[row] + decStrings[row]
+            elif how == 2:
+                radecs[row] = radecs[row].replace('.', 'x', 1)
+            else:
+                radecs[row] = ''
+
+        # The WDS id is the position rounded to 0.1 min of RA and 1' of Dec
+        wdsIds = ['%02d%03d%s%02d%02d' % values
+                  for values in zip(raH.tolist(), ((raM * 60 + raS // 100) // 6).tolist(), signList,
+                                    decD.tolist(), decM.tolist())]
+        names = [code + str(number).rjust(7 - len(code))
+                 for code, number in zip(np.array(discovererCodes)[codes].tolist(), numbers.tolist())]
+
+        priStrings = ['%.2f' % value for value in priMags.tolist()]
+        secStrings = ['%.2f' % value for value in secMags.tolist()]
+        for row in np.flatnonzero(blankPri):
+            priStrings[row] = ''
+        for row in np.flatnonzero(blankSec):
+            secStrings[row] = '.' if row % 5 == 0 else ''
+
+        columns = [wdsIds, names, np.array(componentChoices)[components].tolist(),
+                   [str(year) for year in firstYears.tolist()], [str(year) for year in lastYears.tolist()],
+                   [str(number) for number in observations.tolist()],
+                   [str(angle) for angle in posAngles[:, 0].tolist()], [str(angle) for angle in posAngles[:, 1].tolist()],
+                   ['%.1f' % sep for sep in sepFirst.tolist()], ['%.1f' % sep for sep in sepLast.tolist()],
+                   priStrings, secStrings, np.array(spectralTypeChoices)[spectralTypes].tolist(),
+                   [str(motion) for motion in properMotions[:, 0].tolist()],
+                   [str(motion) for motion in properMotions[:, 1].tolist()], [''] * count, [''] * count,
+                   np.array(durchmusterungChoices)[durchmusterungs].tolist(), np.array(noteChoices)[notes].tolist(),
+                   [''] * count, radecs]
+        lines = [','.join(fields) for fields in zip(*columns)]
+        yield lines
+
+def writeSyntheticCatalog(filename, numRows, seed=0, malformedFraction=0.02, blankMagFraction=0.05,
+                          chunkSize=100000):
+    '''
+        Writes a fake WDS catalog of numRows rows to filename (see
+        syntheticLines), a chunk at a time so any size fits in memory.
+    '''
+    with open(filename, 'w') as fp:
+        for lines in syntheticLines(numRows, seed, malformedFraction, blankMagFraction, chunkSize):
+            fp.write('\n'.join(lines))
+            fp.write('\n')
+
+def main(argv=None):
+    '''
+        Writes a fake WDS catalog of the size given on the command line.
+    '''
+    parser = argparse.ArgumentParser(description="Makes a fake WDS catalog for testing and benchmarks.")
+    parser.add_argument('rows', type=int, help="number of rows")
+    parser.add_argument('filename', help="file to write it to")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default %(default)s)")
+    parser.add_argument('--malformed', type=float, default=0.02,
+                        help="fraction of rows with a malformed RADec (default %(default)s)")
+    parser.add_argument('--blank-mags', type=float, default=0.05,
+                        help="fraction of blank magnitudes (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    writeSyntheticCatalog(args.filename, args.rows, args.seed, args.malformed, args.blank_mags)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+
+####################################
+# File name: WDS_Timing.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import sys
+import json
+import time
+import argparse
+import threading
+import contextlib
+try:
+    import __builtin__ as builtins
+except ImportError:
+    import builtins
+
+# How long starting the GUI may spend importing modules, in seconds
+defaultImportBudget = 1.0
+# How many of the slowest functions a profiled trace keeps (see Tracer)
+profileLimit = 30
+
+
+class Tracer(object):
+    '''
+        Times the stages of the tool as "spans", e.g. constrain and the
+        steps inside it (see span). Each span records its name, how many
+        seconds it took, how deep it is inside other spans ('depth'), and
+        any other fields it is given or that are set on it while it runs
+        (e.g. the number of 'rows'). A span which fails gets the name of
+        the exception as 'error'.
+        A span which isn't inside another one on the same thread starts a
+        trace. When the trace finishes, the list of its spans (in the order
+        they started) is passed to each of the listeners, and written to 
+        logFilename, if it is set, as one JSON object per line.
+        If profile is True, each trace is also run under cProfile, and the
+        slowest functions are added to its first span as 'profile'.
+    '''
+
+    def __init__(self, logFilename=None):
+        self.logFilename = logFilename
+        self.profile = False
+        self.listeners = []
+        self.lock = threading.Lock()
+        # The spans running on each thread, and the spans of its trace
+        self.local = threading.local()
+        self.traceNumber = 0
+
+    def addListener(self, listener):
+        '''
+            Calls listener(spans) with the spans of every trace which
+            finishes from now on. It's called on the thread the trace ran on.
+        '''
+        self.listeners.append(listener)
+
+    @contextlib.contextmanager
+    def span(self, name, **fields):
+        '''
+            Times the code in a with block as a span called name, e.g.
+                with tracer.span('constrain') as stage:
+                    ...
+                    stage['rows'] = len(results)
+        '''
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        record = dict(fields)
+        record['name'] = name
+        record['depth'] = len(stack)
+
+        profiler = None
+        if not stack:
+            with self.lock:
+                self.traceNumber += 1
+                record['trace'] = self.traceNumber
+            self.local.spans = []
+            if self.profile:
+                import cProfile
+                profiler = cProfile.Profile()
+        else:
+            record['trace'] = stack[0]['trace']
+        self.local.spans.append(record)
+        stack.append(record)
+
+        if profiler is not None:
+            profiler.enable()
+        record['start'] = time.time()
+        try:
+            yield record
+        except BaseException as error:
+            record['error'] = error.__class__.__name__
+            raise
+        finally:
+            record['seconds'] = time.time() - record['start']
+            if profiler is not None:
+                profiler.disable()
+                record['profile'] = profileToString(profiler)
+            stack.pop()
+            if not stack:
+                self.finishTrace(self.local.spans)
+
+    def finishTrace(self, spans):
+        '''
+            Logs the spans of a finished trace, and passes them on to the
+            listeners.
+        '''
+        if self.logFilename is not None:
+            # numpy numbers become plain ones
+            lines = [json.dumps(record, sort_keys=True,
+                                default=lambda value: value.item() if hasattr(value, 'item') else str(value))
+                     for record in spans]
+            with self.lock:
+                try:
+                    with open(self.logFilename, 'a') as fp:
+                        fp.write('\n'.join(lines) + '\n')
+                except (IOError, OSError) as error:
+                    print("Could not write the timing log: ", error)
+        for listener in list(self.listeners):
+            listener(list(spans))
+
+
+def profileToString(profiler, limit=profileLimit):
+    '''
+        Makes a table of the limit functions which took the longest
+        (including what they called) in a cProfile.Profile.
+    '''
+    import pstats
+    try:
+        from StringIO import StringIO
+    except ImportError:
+        from io import StringIO
+    stream = StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats('cumulative').print_stats(limit)
+    return stream.getvalue()
+
+def spansToString(spans):
+    '''
+        Makes a table of the spans of a trace (see Tracer), indented by how
+        deep they are, with their times in milliseconds and their other
+        fields (but not the profile).
+    '''
+    lines = []
+    for record in spans:
+        fields = ['%s=%s' % (key, record[key]) for key in sorted(record)
+                  if key not in ('name', 'depth', 'trace', 'start', 'seconds', 'profile')]
+        lines.append('%10.1f ms  %s%s  %s' % (record.get('seconds', 0.0) * 1000.0, '  ' * record['depth'],
+                                               record['name'], ' '.join(fields)))
+    return '\n'.join(lines)
+
+# The tracer the tool's stages are timed with (see span)
+tracer = Tracer()
+
+def span(name, **fields):
+    '''
+        Times a stage of the tool with the default tracer (see Tracer.span).
+    '''
+    return tracer.span(name, **fields)
+
+
+
+def profileImports(moduleName):
+    '''
+        Imports the module moduleName (e.g. WDS_GUI) and times every module
+        which is imported for the first time along the way.
+        Returns the total time, and a list of (name, total, self) for each
+        of those modules, slowest first, where total includes the modules
+        it imported and self doesn't.
+        Only modules which haven't been imported yet are timed, so run it
+        in a fresh python to see what a cold start costs.
+    '''
+    originalImport = builtins.__import__
+    times = {}
+    # The time spent in the imports of each import which is running
+    childTimes = []
+
+    def timedImport(name, *args, **kwargs):
+        new = name not in sys.modules
+        childTimes.append(0.0)
+        start = time.time()
+        try:
+            return originalImport(name, *args, **kwargs)
+        finally:
+            elapsed = time.time() - start
+            children = childTimes.pop()
+            if childTimes:
+                childTimes[-1] += elapsed
+            if new and name in sys.modules and name not in times:
+                times[name] = (elapsed, elapsed - children)
+
+    builtins.__import__ = timedImport
+    start = time.time()
+    try:
+        __import__(moduleName)
+    finally:
+        builtins.__import__ = originalImport
+    total = time.time() - start
+
+    importTimes = [(name, times[name][0], times[name][1]) for name in times]
+    importTimes.sort(key=lambda entry: -entry[1])
+    return total, importTimes
+
+def importTimesToString(total, importTimes, limit=25):
+    '''
+        Makes a table of the slowest limit imports from profileImports,
+        in milliseconds.
+    '''
+    lines = ['%10s %10s  %s' % ('total ms', 'self ms', 'module')]
+    for name, inclusive, own in importTimes[:limit]:
+        lines.append('%10.1f %10.1f  %s' % (inclusive * 1000.0, own * 1000.0, name))
+    lines.append('%10.1f %10s  %s' % (total * 1000.0, '', 'all imports'))
+    return '\n'.join(lines)
+
+def main(argv=None):
+    '''
+        Prints how long importing a module (the GUI by default) takes,
+        module by module. Exits with an error if it takes longer than
+        the budget, so a slow start can be caught before it is released.
+    '''
+    parser = argparse.ArgumentParser(description="Times the imports made when starting the WDS tool.")
+    parser.add_argument('module', nargs='?', default='WDS_GUI',
+                        help="module to import (default WDS_GUI)")
+    parser.add_argument('--budget', type=float, default=defaultImportBudget,
+                        help="most seconds the imports may take (default %(default)s)")
+    parser.add_argument('--limit', type=int, default=25,
+                        help="how many of the slowest imports to show (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    total, importTimes = profileImports(args.module)
+    print(importTimesToString(total, importTimes, args.limit))
+
+    if total > args.budget:
+        print("Importing " + args.module + " took " + str(round(total, 3)) + " s, over the budget of "
+              + str(args.budget) + " s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+
+####################################
+# File name: WDS_Visibility.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import numpy as np
+import WDS_Sidereal
+# astropy is imported in the functions which use it, since it is slow
+# to import (see WDS_Timing)
+
+
+def nightTimes(start, stop, step=10):
+    '''
+        Makes a regular grid of times across the night, from the astropy
+        Time start to the astropy Time stop, every step minutes.
+        The grid starts exactly at start and never goes past stop.
+    '''
+    from astropy import units as u
+    minutes = (stop - start).to(u.min).value
+    if minutes < 0:
+        raise ValueError("The stop time of the night is before the start time")
+    return start + np.arange(0.0, minutes + 1e-6, step) * u.min
+
+
+def calcVisibilityGrid(ra, dec, times, location, chunkSize=2000, progress=None):
+    '''
+        Calculates the altitude, airmass and hour angle of every star at
+        every time of a time grid (see nightTimes).
+        Takes arrays of RA in decimal hours and Dec in decimal degrees, an
+        astropy Time array and an EarthLocation.
+        Returns a dictionary of (number of stars x number of times) arrays:
+         - 'alt': altitude in degrees
+         - 'secz': airmass (negative when below the horizon)
+         - 'ha': hour angle in hours, between -12 and 12
+        plus the time grid itself as 'times'.
+        The stars are broadcast against the times, so each chunk of
+        chunkSize stars is a single transformation. After each chunk
+        progress(done, total) is called, if given.
+    '''
+    from astropy import units as u
+    from astropy.coordinates import SkyCoord, AltAz
+    ra = np.ravel(ra)
+    dec = np.ravel(dec)
+    numStars = len(ra)
+    numTimes = len(times)
+
+    alt = np.zeros((numStars, numTimes))
+    az = np.zeros((numStars, numTimes))
+
+    # One frame with the times along the second axis, for all the chunks
+    frame = AltAz(location=location, obstime=times[np.newaxis, :])
+
+    for start in range(0, numStars, chunkSize):
+        stop = min(start + chunkSize, numStars)
+        starPos = SkyCoord(ra[start:stop, np.newaxis], dec[start:stop, np.newaxis], unit=(u.hour, u.deg))
+        altaz = starPos.transform_to(frame)
+        alt[start:stop] = altaz.alt.deg
+        az[start:stop] = altaz.az.deg
+        if progress is not None:
+            progress(stop, numStars)
+
+    # The hour angle comes straight from the alt/az, so it doesn't need
+    # a sidereal time (and it is for the same apparent position)
+    lat = location.lat.rad
+    altRad = np.radians(alt)
+    azRad = np.radians(az)
+    ha = np.degrees(np.arctan2(-np.sin(azRad) * np.cos(altRad),
+                               np.cos(lat) * np.sin(altRad) - np.sin(lat) * np.cos(altRad) * np.cos(azRad))) / 15.0
+
+    # secz is 1 / cos(zenith angle) = 1 / sin(alt)
+    with np.errstate(divide='ignore'):
+        secz = 1.0 / np.sin(altRad)
+
+    return {'alt': alt, 'secz': secz, 'ha': ha, 'times': times}
+
+
+def calcGeometricGrid(ra, dec, times, latitude, longitude):
+    '''
+        Calculates the same grid as calcVisibilityGrid (the altitude, 
+        airmass and hour angle of every star at every time), from the mean
+        sidereal time and the catalog positions alone. There is no
+        precession, nutation, aberration or refraction, so the altitude is
+        only good to a few tenths of a degree, but it is all plain numpy:
+        thousands of stars over a whole night take a fraction of a second.
+        Takes arrays of RA in decimal hours and Dec in decimal degrees, an
+        astropy Time array, and the site latitude and longitude in degrees
+        (east, so west is negative).
+    '''
+    ra = np.ravel(np.asarray(ra, dtype=float))
+    dec = np.ravel(np.asarray(dec, dtype=float))
+    lst = np.atleast_1d(WDS_Sidereal.localSiderealTime(times, longitude))
+
+    ha = (lst[np.newaxis, :] - ra[:, np.newaxis] + 12.0) % 24.0 - 12.0
+
+    # sin(alt) = sin(lat) sin(dec) + cos(lat) cos(dec) cos(HA)
+    lat = np.radians(latitude)
+    decRad = np.radians(dec)[:, np.newaxis]
+    sinAlt = np.sin(lat) * np.sin(decRad) + np.cos(lat) * np.cos(decRad) * np.cos(np.radians(ha * 15.0))
+    alt = np.degrees(np.arcsin(np.clip(sinAlt, -1.0, 1.0)))
+    with np.errstate(divide='ignore'):
+        secz = 1.0 / sinAlt
+
+    return {'alt': alt, 'secz': secz, 'ha': ha, 'times': times}
+
+
+def summarizeGrid(grid, airmassCap=2.0):
+    '''
+        Reduces a visibility grid (see calcVisibilityGrid) to a few numbers
+        per star. Returns a dictionary of arrays, one value per star:
+         - 'MinSecz': the best (lowest) airmass of the night, i.e. the
+           airmass at the highest altitude. Negative if the star never rises.
+         - 'BestTime': the time of the best airmass, as 'yyyy-mm-dd hh:mm'
+         - 'MinsObservable': how many minutes of the night the star is
+           above the horizon with an airmass of at most airmassCap
+    '''
+    from astropy import units as u
+    alt = grid['alt']
+    secz = grid['secz']
+    times = grid['times']
+    numStars = alt.shape[0]
+
+    # Best airmass is at the highest altitude
+    best = np.argmax(alt, axis=1)
+    minSecz = secz[np.arange(numStars), best]
+
+    # Cut the iso times down to the minute by shortening the string type
+    if numStars > 0:
+        bestTime = np.asarray(times[best].iso)
+        bestTime = bestTime.astype(bestTime.dtype.kind + '16')
+    else:
+        bestTime = np.zeros(0, dtype=str)
+
+    # The grid is regular, so count the grid points and scale by the step
+    if len(times) > 1:
+        step = (times[1] - times[0]).to(u.min).value
+    else:
+        step = 0.0
+    observable = (alt > 0) & (secz <= airmassCap)
+    minsObservable = np.sum(observable, axis=1) * step
+
+    return {'MinSecz': minSecz, 'BestTime': bestTime, 'MinsObservable': minsObservable}
+
+
+def calcVisibilityIndex(ra, dec, latitude, minAltitude=30.0, eastHA=12.0, westHA=12.0,
+                        northDec=90.0, southDec=-90.0):
+    '''
+        Calculates when each star can be seen from a site, independent of
+        the date. Takes arrays of RA in decimal hours and Dec in decimal 
+        degrees, the site latitude in degrees, the lowest altitude to 
+        observe at in degrees, the telescope's hour angle limits to the 
+        east and west in hours, and its Dec limits in degrees.
+        Returns a dictionary of arrays, one value per star:
+         - 'transit': the local sidereal time of transit (the RA), in hours
+         - 'east': how many hours before transit the star can be observed
+         - 'west': how many hours after transit the star can be observed
+        So the star is observable for local sidereal times between 
+        transit - east and transit + west. Stars which can never be observed
+        have east = west = -1.
+    '''
+    ra = np.ravel(np.asarray(ra, dtype=float))
+    dec = np.ravel(np.asarray(dec, dtype=float))
+    lat = np.radians(latitude)
+    decRad = np.radians(dec)
+
+    # Hour angle at which the star crosses minAltitude:
+    #  sin(alt) = sin(lat) sin(dec) + cos(lat) cos(dec) cos(HA)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cosHalfWidth = (np.sin(np.radians(minAltitude)) - np.sin(lat) * np.sin(decRad)) / (np.cos(lat) * np.cos(decRad))
+    # cos >= 1 means it never gets that high, cos <= -1 means it never sets
+    halfWidth = np.degrees(np.arccos(np.clip(np.nan_to_num(cosHalfWidth), -1.0, 1.0))) / 15.0
+
+    east = np.minimum(halfWidth, eastHA)
+    west = np.minimum(halfWidth, westHA)
+
+    # Stars outside of the telescope's Dec range (or without a real position,
+    # i.e. NaN) can never be observed
+    with np.errstate(invalid='ignore'):
+        never = ~(cosHalfWidth < 1.0) | ~((dec <= northDec) & (dec >= southDec) & (ra >= 0.0) & (ra < 24.0))
+    east[never] = -1.0
+    west[never] = -1.0
+
+    return {'transit': ra % 24.0, 'east': east, 'west': west}
+
+
+def observableBetween(index, startLST, stopLST):
+    '''
+        Finds the stars in a visibility index (see calcVisibilityIndex) 
+        which are observable at some point between the local sidereal 
+        times startLST and stopLST (in hours). If stopLST is before 
+        startLST the interval is taken to go through 0h.
+        Returns a boolean array, one value per star.
+    '''
+    # Both intervals are on a 24 h circle:
+    #  the star's is [transit - east, transit + west]
+    #  the night's is [startLST, stopLST]
+    starStart = index['transit'] - index['east']
+    starLength = index['east'] + index['west']
+    nightLength = (stopLST - startLST) % 24.0
+
+    # Two intervals on a circle overlap if either one starts inside the other
+    with np.errstate(invalid='ignore'):
+        overlap = (((startLST - starStart) % 24.0) <= starLength) | (((starStart - startLST) % 24.0) <= nightLength)
+        # Always observable stars, and never observable ones
+        overlap = (overlap | (starLength >= 24.0)) & (index['east'] >= 0.0)
+    return overlap
+
+
+def observableWindows(index, dec, latitude, startLST, stopLST):
+    '''
+        Finds when during a night each star in a visibility index (see
+        calcVisibilityIndex) can be observed, and when it is best. Takes
+        the Dec of the stars in degrees, the site latitude in degrees, and
+        the local sidereal times of the start and stop of the night (see
+        observableBetween).
+        Returns a dictionary of arrays, one value per star, with the times
+        in sidereal hours after startLST:
+         - 'start', 'stop': the part of the night the star can be observed
+           in (if there are two, e.g. it sets and rises again, the one
+           closest to transit)
+         - 'best': the time in that window closest to transit, which is
+           when the airmass is lowest
+         - 'secz': the airmass at best
+        Stars which can't be observed during the night are NaN.
+        Everything comes from the index, so no coordinates are transformed;
+        the airmass is geometric (no refraction).
+    '''
+    dec = np.ravel(np.asarray(dec, dtype=float))
+    nightLength = (stopLST - startLST) % 24.0
+    starLength = index['east'] + index['west']
+    # When the star's interval and its transit are, in hours after the start
+    # of the night
+    starStart = (index['transit'] - index['east'] - startLST) % 24.0
+    transit = (index['transit'] - startLST) % 24.0
+
+    numStars = len(dec)
+    start = np.full(numStars, np.nan)
+    stop = np.full(numStars, np.nan)
+    best = np.full(numStars, np.nan)
+    bestHA = np.full(numStars, np.inf)
+
+    # The star's interval comes round every 24 h, so both the one starting
+    # at starStart and the one before it can overlap the night
+    with np.errstate(invalid='ignore'):
+        for offset in [0.0, -24.0]:
+            pieceStart = np.maximum(starStart + offset, 0.0)
+            pieceStop = np.minimum(starStart + offset + starLength, nightLength)
+            # Always observable stars are observable all night
+            pieceStart[starLength >= 24.0] = 0.0
+            pieceStop[starLength >= 24.0] = nightLength
+            valid = (pieceStart <= pieceStop) & (index['east'] >= 0.0)
+
+            # The point of the piece closest to transit (which is either
+            # this transit or the one 24 h before it)
+            for transitOffset in [0.0, -24.0]:
+                point = np.clip(transit + transitOffset, pieceStart, pieceStop)
+                ha = np.abs((point - transit + 12.0) % 24.0 - 12.0)
+                closer = valid & (ha < bestHA)
+                start[closer] = pieceStart[closer]
+                stop[closer] = pieceStop[closer]
+                best[closer] = point[closer]
+                bestHA[closer] = ha[closer]
+
+    # sin(alt) = sin(lat) sin(dec) + cos(lat) cos(dec) cos(HA)
+    lat = np.radians(latitude)
+    decRad = np.radians(dec)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sinAlt = np.sin(lat) * np.sin(decRad) + np.cos(lat) * np.cos(decRad) * np.cos(np.radians(bestHA * 15.0))
+        secz = np.where(np.isfinite(bestHA), 1.0 / sinAlt, np.nan)
+
+    return {'start': start, 'stop': stop, 'best': best, 'secz': secz}
+
+
+class VisibilityPredicate(object):
+    '''
+        Wraps a visibility index (see calcVisibilityIndex) so it can be used
+        as a WDS_Index.ConstraintEngine predicate. The bounds are the 
+        (startLST, stopLST) of the night, in hours.
+    '''
+
+    def __init__(self, index):
+        self.index = index
+
+    def rows(self, startLST, stopLST):
+        '''
+            Gets the row numbers of the stars observable between startLST 
+            and stopLST (see observableBetween).
+        '''
+        return np.flatnonzero(observableBetween(self.index, startLST, stopLST))
+
+    def contains(self, rows, startLST, stopLST):
+        '''
+            Checks which of the row numbers rows are observable between 
+            startLST and stopLST. Returns a boolean array the length of rows.
+        '''
+        subset = dict((name, self.index[name][rows]) for name in ['transit', 'east', 'west'])
+        return observableBetween(subset, startLST, stopLST)
+
+    def within(self, inner, outer):
+        '''
+            Checks if the night inner is inside the night outer, so the stars
+            observable in inner are some of those observable in outer.
+        '''
+        # A night starting and stopping at the same time is empty, not 24 h
+        if inner[0] % 24.0 == inner[1] % 24.0 or outer[0] % 24.0 == outer[1] % 24.0:
+            return tuple(inner) == tuple(outer)
+        offset = (inner[0] - outer[0]) % 24.0
+        return offset + (inner[1] - inner[0]) % 24.0 <= (outer[1] - outer[0]) % 24.0
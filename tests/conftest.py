@@ -0,0 +1,13 @@
+####################################
+# File name: conftest.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+import os
+import sys
+
+# The WDS_* modules live in the top folder of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,159 @@
+####################################
+# File name: test_WDS_Cache.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import WDS_Cache
+import WDS_Synthetic
+import WDS_Extraction_Tool as wdsExtractor
+
+preferences = {'latitude': '34:22:55.2', 'longitude': '-117:40:54.48', '+dec': '35:00:00.0',
+               '-dec': '35:00:00.0', 'westHA': '4:00:00.0', 'eastHA': '2:00:00.0',
+               'minAltitude': '30:00:00.0'}
+
+
+class CacheTest(unittest.TestCase):
+    '''
+        Checks that the catalog cache and the arrays cached with it are
+        rebuilt when the catalog changes.
+    '''
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'WDS_CSV_cat.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def writeCatalog(self, rows, seed=0):
+        WDS_Synthetic.writeSyntheticCatalog(self.filename, rows, seed)
+
+    def testTableRebuiltWhenCatalogChanges(self):
+        self.writeCatalog(300)
+        self.assertEqual(len(wdsExtractor.loadWds(self.filename)), 300)
+        self.writeCatalog(120)
+        self.assertEqual(len(wdsExtractor.loadWds(self.filename)), 120)
+
+    def testTableKeptWhenOnlyTouched(self):
+        self.writeCatalog(200)
+        first = wdsExtractor.loadWds(self.filename)
+        stat = os.stat(self.filename)
+        os.utime(self.filename, (stat.st_atime, stat.st_mtime + 100))
+        self.assertTrue(WDS_Cache.isCacheValid(self.filename, WDS_Cache.readManifest(
+            WDS_Cache.cacheDirFor(self.filename)))[0])
+        self.assertEqual(len(wdsExtractor.loadWds(self.filename)), len(first))
+
+    def testVisibilityIndexRebuiltWhenCatalogChanges(self):
+        self.writeCatalog(400)
+        index = wdsExtractor.Catalog(self.filename).getVisibilityIndex(preferences)
+        self.assertEqual(len(index['transit']), 400)
+
+        # A new Catalog is like a new process: only the disk cache is left
+        self.writeCatalog(150, seed=1)
+        catalog = wdsExtractor.Catalog(self.filename)
+        index = catalog.getVisibilityIndex(preferences)
+        self.assertEqual(len(index['transit']), len(catalog.table))
+        self.assertEqual(len(index['transit']), 150)
+
+    def testVisibilityIndexCachedForSameCatalog(self):
+        self.writeCatalog(250)
+        first = wdsExtractor.Catalog(self.filename).getVisibilityIndex(preferences)
+        second = wdsExtractor.Catalog(self.filename).getVisibilityIndex(preferences)
+        # The second one comes from the disk cache (memory mapped)
+        self.assertIsInstance(second['transit'], np.memmap)
+        for name in first:
+            np.testing.assert_array_equal(first[name], second[name])
+
+    def testCachedArraysRejectWrongLength(self):
+        self.writeCatalog(100)
+        wdsExtractor.loadWds(self.filename)
+        calls = []
+        def build():
+            calls.append(1)
+            return {'values': np.arange(len(calls) * 10)}
+        WDS_Cache.loadCachedArrays(self.filename, 'test', {'a': 1}, build)
+        arrays = WDS_Cache.loadCachedArrays(self.filename, 'test', {'a': 1}, build, length=20)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(arrays['values']), 20)
+
+    def testCachedArraysNotSavedForStaleCatalog(self):
+        # The catalog has never been loaded, so it has no table cache
+        self.writeCatalog(50)
+        WDS_Cache.loadCachedArrays(self.filename, 'test', {'a': 1}, lambda: {'values': np.arange(5)})
+        self.assertIsNone(WDS_Cache.catalogSource(self.filename))
+        self.assertFalse(os.path.isdir(WDS_Cache.cacheDirFor(self.filename)))
+
+
+class ResultCacheTest(unittest.TestCase):
+    '''
+        Checks the least recently used cache of query results keeps to its
+        limits, and counts its hits and misses.
+    '''
+
+    def result(self, numRows):
+        return {'rows': np.arange(numRows, dtype=np.int64)}
+
+    def testEvictsByEntries(self):
+        cache = WDS_Cache.ResultCache(maxEntries=3, maxBytes=1 << 20)
+        for key in ['a', 'b', 'c']:
+            cache.put(key, self.result(10))
+        # Using a makes b the least recently used
+        self.assertIsNotNone(cache.get('a'))
+        cache.put('d', self.result(10))
+        self.assertEqual(sorted(cache.entries), ['a', 'c', 'd'])
+        self.assertEqual(len(cache), 3)
+
+    def testEvictsByBytes(self):
+        cache = WDS_Cache.ResultCache(maxEntries=100, maxBytes=800)
+        cache.put('a', self.result(50))
+        cache.put('b', self.result(40))
+        self.assertEqual(cache.totalBytes, 720)
+        cache.put('c', self.result(20))
+        self.assertNotIn('a', cache)
+        self.assertEqual(cache.totalBytes, 480)
+        # Too big to keep at all
+        cache.put('d', self.result(101))
+        self.assertNotIn('d', cache)
+        self.assertEqual(cache.totalBytes, 480)
+
+    def testReplaceAndTrim(self):
+        cache = WDS_Cache.ResultCache(maxEntries=10, maxBytes=1 << 20)
+        cache.put('a', self.result(10))
+        cache.put('a', self.result(30))
+        self.assertEqual(cache.totalBytes, 240)
+        cache.put('b', self.result(10))
+        cache.maxEntries = 1
+        cache.trim()
+        self.assertEqual(list(cache.entries), ['b'])
+        cache.clear()
+        self.assertEqual((len(cache), cache.totalBytes), (0, 0))
+
+    def testStats(self):
+        cache = WDS_Cache.ResultCache()
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', self.result(10))
+        cache.get('a')
+        cache.get('a')
+        cache.get('b')
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 2, 'entries': 1, 'bytes': 80})
+
+    def testNormalizeKey(self):
+        self.assertEqual(WDS_Cache.normalizeKey({'b': (2, 1.0), 'a': True}),
+                         WDS_Cache.normalizeKey({'a': True, 'b': [2.0, 1.0000000001]}))
+        self.assertNotEqual(WDS_Cache.normalizeKey({'b': (2, 1)}), WDS_Cache.normalizeKey({'b': (2, 1.1)}))
+
+
+if __name__ == "__main__":
+    unittest.main()
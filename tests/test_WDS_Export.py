@@ -0,0 +1,111 @@
+####################################
+# File name: test_WDS_Export.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import io
+import os
+import csv
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import WDS_Export
+
+
+class ExportTest(unittest.TestCase):
+    '''
+        Checks that writing a result a few rows at a time gives the same
+        file as writing it all at once.
+    '''
+
+    def setUp(self):
+        import astropy.table
+        random = np.random.RandomState(3)
+        numRows = 23
+        self.table = astropy.table.Table(masked=True)
+        self.table['WDS Name'] = ['%05d+%04d' % (i, i) for i in range(numRows)]
+        self.table['RA'] = np.round(random.uniform(0.0, 235959.0, numRows), 2)
+        self.table['Dec'] = np.round(random.uniform(-895959.0, 895959.0, numRows), 1)
+        self.table['PriMag'] = random.normal(9.0, 2.0, numRows)
+        self.table['PriMag'].mask = random.uniform(size=numRows) < 0.2
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def exportBoth(self, format):
+        '''
+            Exports the table in one chunk and in chunks of 4 rows, and 
+            returns the contents of both files.
+        '''
+        contents = []
+        for chunkSize in [1000, 4]:
+            filename = os.path.join(self.folder, 'out%d%s' % (chunkSize, WDS_Export.exportFormats[format]))
+            WDS_Export.export(self.table, filename, chunkSize=chunkSize)
+            with open(filename, 'rb') as fp:
+                contents.append(fp.read())
+        return contents
+
+    def testFormatFromFilename(self):
+        self.assertEqual(WDS_Export.formatFromFilename('list.CSV'), 'csv')
+        self.assertEqual(WDS_Export.formatFromFilename('list.xml'), 'votable')
+        self.assertEqual(WDS_Export.formatFromFilename('object_list'), 'text')
+
+    def testText(self):
+        whole, chunked = self.exportBoth('text')
+        self.assertEqual(whole, chunked)
+        lines = whole.decode('ascii').split('\n')
+        self.assertEqual(len(lines), len(self.table) + 2)
+        self.assertIn('--', lines[2 + np.flatnonzero(self.table['PriMag'].mask)[0]])
+
+    def testCsv(self):
+        whole, chunked = self.exportBoth('csv')
+        self.assertEqual(whole, chunked)
+        rows = list(csv.reader(io.StringIO(whole.decode('ascii'))))
+        self.assertEqual(rows[0], self.table.colnames)
+        for row, line in zip(self.table, rows[1:]):
+            self.assertEqual(line[0], row['WDS Name'])
+            self.assertEqual(float(line[1]), row['RA'])
+            if row['PriMag'] is np.ma.masked:
+                self.assertEqual(line[3], '')
+            else:
+                self.assertEqual(float(line[3]), row['PriMag'])
+
+    def testFits(self):
+        from astropy.io import fits
+        whole, chunked = self.exportBoth('fits')
+        self.assertEqual(whole, chunked)
+        self.assertEqual(len(whole) % WDS_Export.fitsBlockSize, 0)
+        data = fits.open(io.BytesIO(whole))[1].data
+        np.testing.assert_array_equal(data['RA'], self.table['RA'])
+        np.testing.assert_array_equal(data['WDS Name'], self.table['WDS Name'])
+
+    def testVotable(self):
+        from astropy.io.votable import from_table
+        whole, chunked = self.exportBoth('votable')
+        self.assertEqual(whole, chunked)
+        document = io.BytesIO()
+        from_table(self.table).to_xml(document)
+        self.assertEqual(whole, document.getvalue())
+
+    def testEmpty(self):
+        empty = self.table[:0]
+        for format in WDS_Export.exportFormats:
+            filename = os.path.join(self.folder, 'empty' + WDS_Export.exportFormats[format])
+            WDS_Export.export(empty, filename)
+            self.assertGreater(os.path.getsize(filename), 0)
+
+    def testUnknownFormat(self):
+        self.assertRaises(ValueError, WDS_Export.export, self.table, io.BytesIO(), 'xls')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,213 @@
+####################################
+# File name: test_WDS_Extraction_Tool.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import subprocess
+import unittest
+
+import numpy as np
+
+import WDS_Synthetic
+import WDS_Extraction_Tool as wdsExtractor
+
+# The top folder of the repository, where the WDS_* modules are
+repoDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The telescope preferences the tests use (the same as WDS_Preferences.json)
+preferences = {'latitude': '34:22:55.2', 'longitude': '-117:40:54.48', '+dec': '35:00:00.0',
+               '-dec': '35:00:00.0', 'westHA': '4:00:00.0', 'eastHA': '2:00:00.0',
+               'minAltitude': '30:00:00.0'}
+
+
+def runPython(code):
+    '''
+        Runs code in a new Python process (so nothing this process has
+        imported counts), and returns what it printed.
+    '''
+    return subprocess.check_output([sys.executable, '-c', code], cwd=repoDir).decode('utf-8')
+
+
+class LazyImportTest(unittest.TestCase):
+    '''
+        Checks the module API doesn't import astropy until it is needed.
+    '''
+
+    def testSettingConstraintsDoesNotImportAstropy(self):
+        output = runPython('\n'.join([
+            "from __future__ import print_function",
+            "import sys",
+            "import WDS_Extraction_Tool as wdsExtractor",
+            "wdsExtractor.setStarConstraints((3.0, 0.3), (8.0, -10.0), (3.0, -3.0))",
+            "wdsExtractor.setLocationConstraints(340000.0, 350000.0)",
+            "print('astropy.time' in sys.modules, wdsExtractor.observing_date is None)"]))
+        self.assertEqual(output.split(), ['False', 'True'])
+
+
+def syntheticSession(folder, numRows=2000):
+    '''
+        Makes a fake catalog of numRows stars in folder, and a session of
+        it with constraints which match plenty of them.
+    '''
+    filename = os.path.join(folder, 'WDS_CSV_cat.txt')
+    WDS_Synthetic.writeSyntheticCatalog(filename, numRows)
+    session = wdsExtractor.CatalogSession(wdsExtractor.Catalog(filename), preferences)
+    session.setStarConstraints((30.0, 0.0), (14.0, -10.0), (9.0, -9.0))
+    session.setLocationConstraints(340000.0, 350000.0)
+    session.setTimeConstraints(190000.0, 240000.0)
+    return session
+
+
+class CancelTest(unittest.TestCase):
+    '''
+        Checks a cancelled query stops, and leaves the results as they were.
+    '''
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.session = syntheticSession(self.folder)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def testCancelledBeforeStarting(self):
+        self.session.constrain()
+        before = self.session.interestingHere
+        cancel = threading.Event()
+        cancel.set()
+        self.session.setStarConstraints((3.0, 0.3), (8.0, -10.0), (3.0, -3.0))
+        self.assertRaises(wdsExtractor.QueryCancelled, self.session.constrain, cancel=cancel)
+        self.assertIs(self.session.interestingHere, before)
+
+    def testCancelledBetweenSteps(self):
+        cancel = threading.Event()
+        # Cancel while the star constraints are looked up, which can't stop
+        # part way through, so it stops before the next step
+        engine = self.session.getConstraintEngine()
+        query = engine.query
+        def cancellingQuery(bounds):
+            cancel.set()
+            return query(bounds)
+        engine.query = cancellingQuery
+        self.assertRaises(wdsExtractor.QueryCancelled, self.session.constrain, cancel=cancel)
+
+
+class SessionThreadsTest(unittest.TestCase):
+    '''
+        Checks sessions of one catalog can constrain at the same time, from
+        different threads, without mixing up their results.
+    '''
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def testTwoThreads(self):
+        first = syntheticSession(self.folder, 20000)
+        catalog = first.catalog
+        # Every query does the work, rather than using the saved results
+        catalog.resultCache.maxEntries = 0
+        second = wdsExtractor.CatalogSession(catalog, preferences)
+        second.constraints = dict(first.constraints)
+        starConstraints = {first: [((30.0, 0.0), (14.0, -10.0), (9.0, -9.0)), ((5.0, 1.0), (10.0, -10.0), (2.0, -2.0))],
+                           second: [((3.0, 0.5), (9.0, -10.0), (3.0, -3.0)), ((50.0, 10.0), (12.0, 5.0), (1.0, -1.0))]}
+
+        # What each query should find, from a catalog of its own
+        expected = {}
+        for session in starConstraints:
+            alone = wdsExtractor.CatalogSession(wdsExtractor.Catalog(catalog.filename), preferences)
+            alone.constraints = dict(first.constraints)
+            for stars in starConstraints[session]:
+                alone.setStarConstraints(*stars)
+                alone.constrain()
+                expected[stars] = (alone.interesting.rows.copy(), alone.interestingHere.rows.copy())
+
+        # Neither session has loaded the catalog yet, so they race to do that too
+        errors = []
+        def run(session):
+            try:
+                for repeat in range(10):
+                    for stars in starConstraints[session]:
+                        session.setStarConstraints(*stars)
+                        session.constrain()
+                        np.testing.assert_array_equal(session.interesting.rows, expected[stars][0])
+                        np.testing.assert_array_equal(session.interestingHere.rows, expected[stars][1])
+            except Exception as error:
+                errors.append(error)
+        threads = [threading.Thread(target=run, args=(session,)) for session in starConstraints]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(catalog.table), 20000)
+
+
+class NightInputsTest(unittest.TestCase):
+    '''
+        Checks the start and stop times of a night are taken as local mean
+        solar time, or as clock time if there is a utcOffset.
+    '''
+
+    def testMeanSolarTime(self):
+        inputs = wdsExtractor.nightInputs('2017-07-05', '20:00', '24:00', preferences)
+        # 117.68 degrees west is 7 h 50 m 43.6 s behind UTC
+        self.assertEqual(inputs['date'].iso[:19], '2017-07-06 03:50:43')
+        self.assertEqual(inputs['endDate'].iso[:19], '2017-07-06 07:50:43')
+        self.assertEqual(inputs['startTime'], 200000.0)
+        self.assertEqual(wdsExtractor.clockDescription(preferences), "Local Mean Solar Time")
+
+    def testUtcOffset(self):
+        zonePreferences = dict(preferences, utcOffset='-7:00')
+        inputs = wdsExtractor.nightInputs('2017-07-05', '20:00', '24:00', zonePreferences)
+        self.assertEqual(inputs['date'].iso[:19], '2017-07-06 03:00:00')
+        self.assertEqual(inputs['endDate'].iso[:19], '2017-07-06 07:00:00')
+        # The same moment in mean solar time is 50 m 43.6 s earlier
+        self.assertAlmostEqual(inputs['startTime'], 190916.368, places=3)
+        self.assertAlmostEqual(inputs['stopTime'], 230916.368, places=3)
+        self.assertEqual(wdsExtractor.clockDescription(zonePreferences), "UTC-7:00")
+
+
+class AirmassTest(unittest.TestCase):
+    '''
+        Checks the airmasses of many stars at once against working them
+        out one star at a time.
+    '''
+
+    def testSameAsOneAtATime(self):
+        from astropy.time import Time
+        from astropy import units as u
+        from astropy.coordinates import SkyCoord, AltAz
+        random = np.random.RandomState(4)
+        ra = random.uniform(0.0, 360.0, 20)
+        # Both sides of the equator, since the old calculation got the
+        # sign of southern Decs wrong
+        dec = random.uniform(-40.0, 80.0, 20)
+        date = Time('2017-03-06 04:00:00', scale='utc')
+
+        done = []
+        def progress(stop, total):
+            done.append((stop, total))
+        secz = wdsExtractor.calcAirmasses(ra, dec, date, preferences, chunkSize=7, progress=progress)
+        self.assertEqual(done, [(7, 20), (14, 20), (20, 20)])
+
+        frame = AltAz(location=wdsExtractor.observingLocation(preferences), obstime=date)
+        for i in range(len(ra)):
+            expected = SkyCoord(ra[i], dec[i], unit=(u.deg, u.deg)).transform_to(frame).secz.value
+            self.assertAlmostEqual(secz[i], expected, places=9)
+
+
+if __name__ == "__main__":
+    unittest.main()
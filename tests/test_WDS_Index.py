@@ -0,0 +1,176 @@
+####################################
+# File name: test_WDS_Index.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import unittest
+import numpy as np
+
+import WDS_Index
+
+
+class IndexTest(unittest.TestCase):
+    '''
+        Checks the indexes find the same rows as masks over every row.
+    '''
+
+    def setUp(self):
+        random = np.random.RandomState(1)
+        self.numRows = 5000
+        self.ra = random.uniform(0.0, 360.0, self.numRows)
+        self.dec = np.degrees(np.arcsin(random.uniform(-1.0, 1.0, self.numRows)))
+        self.values = random.normal(0.0, 5.0, self.numRows)
+        # Some rows have no value
+        self.values[random.uniform(size=self.numRows) < 0.05] = np.nan
+        self.others = random.uniform(0.0, 10.0, self.numRows)
+        self.random = random
+
+    def boxMask(self, raMin, raMax, decMin, decMax):
+        if raMin > raMax:
+            inRa = (self.ra > raMin) | (self.ra < raMax)
+        else:
+            inRa = (self.ra > raMin) & (self.ra < raMax)
+        return inRa & (self.dec > decMin) & (self.dec < decMax)
+
+    def testRangeIndex(self):
+        index = WDS_Index.RangeIndex(self.values)
+        rows = np.arange(self.numRows)
+        for upper, lower in [(2.0, -1.0), (100.0, -100.0), (-1.0, 2.0), (0.0, 0.0)]:
+            with np.errstate(invalid='ignore'):
+                mask = (self.values > lower) & (self.values < upper)
+            np.testing.assert_array_equal(np.sort(index.rows(upper, lower)), np.flatnonzero(mask))
+            self.assertEqual(index.count(upper, lower), mask.sum())
+            np.testing.assert_array_equal(index.contains(rows, upper, lower), mask)
+
+    def testCircularRangeIndex(self):
+        index = WDS_Index.RangeIndex(self.ra, circular=True)
+        mask = (self.ra > 350.0) | (self.ra < 10.0)
+        np.testing.assert_array_equal(np.sort(index.rows(10.0, 350.0)), np.flatnonzero(mask))
+
+    def testMaskedRangeIndex(self):
+        values = np.ma.masked_array(self.others, mask=self.others < 1.0)
+        index = WDS_Index.RangeIndex(values)
+        mask = (self.others >= 1.0) & (self.others < 5.0)
+        np.testing.assert_array_equal(np.sort(index.rows(5.0, -1.0)), np.flatnonzero(mask))
+
+    def testRangeQuery(self):
+        indexes = {'values': WDS_Index.RangeIndex(self.values), 'others': WDS_Index.RangeIndex(self.others)}
+        bounds = {'values': (3.0, -2.0), 'others': (4.0, 1.0)}
+        with np.errstate(invalid='ignore'):
+            mask = (self.values > -2.0) & (self.values < 3.0) & (self.others > 1.0) & (self.others < 4.0)
+        np.testing.assert_array_equal(WDS_Index.rangeQuery(indexes, bounds), np.flatnonzero(mask))
+
+    def testZoneBox(self):
+        index = WDS_Index.ZoneIndex(self.ra, self.dec)
+        rows = np.arange(self.numRows)
+        for box in [(10.0, 50.0, -20.0, 30.0), (340.0, 20.0, -5.0, 5.0), (0.0, 360.0, 80.0, 90.0),
+                    (100.0, 100.5, -90.0, 90.0)]:
+            mask = self.boxMask(*box)
+            np.testing.assert_array_equal(index.box(*box), np.flatnonzero(mask))
+            np.testing.assert_array_equal(index.contains(rows, *box), mask)
+
+    def testZoneCone(self):
+        index = WDS_Index.ZoneIndex(self.ra, self.dec)
+        for ra, dec, radius in [(0.5, 0.0, 10.0), (200.0, 85.0, 8.0), (90.0, -45.0, 0.5)]:
+            distance = WDS_Index.angularDistance(ra, dec, self.ra, self.dec)
+            rows, distances = index.cone(ra, dec, radius)
+            np.testing.assert_array_equal(np.sort(rows), np.flatnonzero(distance <= radius))
+            self.assertTrue(np.all(np.diff(distances) >= 0.0))
+
+    def convexMask(self, ras, decs):
+        '''
+            Which stars are inside a convex polygon (corners going 
+            anticlockwise in RA and Dec), from which side of each edge 
+            they are on.
+        '''
+        ras = np.asarray(ras, dtype=float)
+        x = ras[0] + (self.ra - ras[0] + 180.0) % 360.0 - 180.0
+        ras = ras[0] + (ras - ras[0] + 180.0) % 360.0 - 180.0
+        inside = np.ones(self.numRows, dtype=bool)
+        for i in range(len(ras)):
+            x1, y1, x2, y2 = ras[i - 1], decs[i - 1], ras[i], decs[i]
+            inside &= (x2 - x1) * (self.dec - y1) - (y2 - y1) * (x - x1) > 0
+        return inside
+
+    def testZonePolygon(self):
+        index = WDS_Index.ZoneIndex(self.ra, self.dec)
+        for ras, decs in [([10.0, 60.0, 40.0], [-10.0, 0.0, 30.0]),
+                          # Across RA 0
+                          ([350.0, 20.0, 25.0, 340.0], [-20.0, -15.0, 10.0, 5.0]),
+                          ([100.0, 101.0, 101.0, 100.0], [50.0, 50.0, 51.0, 51.0])]:
+            np.testing.assert_array_equal(index.polygon(ras, decs), np.flatnonzero(self.convexMask(ras, decs)))
+
+    def testZoneConeEdges(self):
+        index = WDS_Index.ZoneIndex(self.ra, self.dec)
+        # Over the pole, across RA 0, the whole sky and nothing
+        for ra, dec, radius in [(10.0, 88.0, 5.0), (359.9, -30.0, 3.0), (0.0, 0.0, 180.0), (10.0, 10.0, 0.0)]:
+            distance = WDS_Index.angularDistance(ra, dec, self.ra, self.dec)
+            rows, distances = index.cone(ra, dec, radius)
+            np.testing.assert_array_equal(np.sort(rows), np.flatnonzero(distance <= radius))
+            np.testing.assert_allclose(distances, distance[rows])
+
+    def skyTrees(self):
+        '''
+            A SkyTree with a KD-tree (if scipy is installed), and one 
+            without, which compares against every star.
+        '''
+        trees = [WDS_Index.SkyTree(self.ra, self.dec)]
+        bruteForce = WDS_Index.SkyTree(self.ra, self.dec)
+        bruteForce.tree = None
+        return trees + [bruteForce]
+
+    def testSkyTreeCone(self):
+        oddRows = lambda rows: rows % 2 == 1
+        for tree in self.skyTrees():
+            for ra, dec, radius in [(0.5, 0.0, 10.0), (200.0, 89.0, 4.0), (90.0, -45.0, 0.5)]:
+                distance = WDS_Index.angularDistance(ra, dec, self.ra, self.dec)
+                rows, distances = tree.cone(ra, dec, radius)
+                np.testing.assert_array_equal(np.sort(rows), np.flatnonzero(distance <= radius))
+                np.testing.assert_allclose(distances, distance[rows], atol=1e-9)
+                self.assertTrue(np.all(np.diff(distances) >= 0.0))
+                rows, distances = tree.cone(ra, dec, radius, allowed=oddRows)
+                inside = (distance <= radius) & (np.arange(self.numRows) % 2 == 1)
+                np.testing.assert_array_equal(np.sort(rows), np.flatnonzero(inside))
+
+    def testSkyTreeNearest(self):
+        oddRows = lambda rows: rows % 2 == 1
+        for tree in self.skyTrees():
+            for ra, dec, k, radius in [(10.0, 20.0, 5, 180.0), (300.0, -60.0, 40, 180.0), (0.0, 0.0, 50, 3.0)]:
+                distance = WDS_Index.angularDistance(ra, dec, self.ra, self.dec)
+                rows, distances = tree.nearest(ra, dec, k, radius)
+                order = np.argsort(distance, kind='mergesort')
+                expected = order[distance[order] <= radius][:k]
+                np.testing.assert_allclose(distances, distance[expected], atol=1e-9)
+                np.testing.assert_array_equal(np.sort(rows), np.sort(expected))
+                # The k nearest odd rows
+                rows, distances = tree.nearest(ra, dec, k, radius, allowed=oddRows)
+                expected = [row for row in order if row % 2 == 1 and distance[row] <= radius][:k]
+                np.testing.assert_array_equal(np.sort(rows), np.sort(expected))
+        self.assertEqual(len(self.skyTrees()[0].nearest(0.0, 0.0, 0)[0]), 0)
+
+    def testConstraintEngine(self):
+        engine = WDS_Index.ConstraintEngine({'values': WDS_Index.RangeIndex(self.values),
+                                             'sky': WDS_Index.ZoneIndex(self.ra, self.dec)})
+        # Tighter, looser, then the same bounds, so each way of reusing
+        # old rows gets used
+        queries = [((5.0, -5.0), (0.0, 180.0, -40.0, 40.0)),
+                   ((3.0, -2.0), (10.0, 170.0, -30.0, 30.0)),
+                   ((3.0, -2.0), (10.0, 170.0, -30.0, 30.0)),
+                   ((6.0, -6.0), (300.0, 60.0, -60.0, 10.0)),
+                   ((1.0, -1.0), (310.0, 50.0, -50.0, 0.0))]
+        for values, sky in queries:
+            with np.errstate(invalid='ignore'):
+                mask = (self.values > values[1]) & (self.values < values[0]) & self.boxMask(*sky)
+            rows = engine.query({'values': values, 'sky': sky})
+            np.testing.assert_array_equal(rows, np.flatnonzero(mask))
+        self.assertEqual(engine.changes, {'values': 'narrowed', 'sky': 'narrowed'})
+
+
+if __name__ == "__main__":
+    unittest.main()
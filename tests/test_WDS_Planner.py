@@ -0,0 +1,76 @@
+####################################
+# File name: test_WDS_Planner.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import WDS_Synthetic
+import WDS_Planner
+import WDS_Extraction_Tool as wdsExtractor
+
+preferences = {'latitude': '34:22:55.2', 'longitude': '-117:40:54.48', '+dec': '35:00:00.0',
+               '-dec': '35:00:00.0', 'westHA': '4:00:00.0', 'eastHA': '2:00:00.0',
+               'minAltitude': '30:00:00.0'}
+starConstraints = {'separation': (20.0, 0.5), 'magnitude': (12.0, -10.0), 'deltaMag': (3.0, -3.0)}
+
+
+class PlannerTest(unittest.TestCase):
+    '''
+        Checks the planner finds the same stars as constraining each night
+        with a session.
+    '''
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        filename = os.path.join(self.folder, 'WDS_CSV_cat.txt')
+        WDS_Synthetic.writeSyntheticCatalog(filename, 10000)
+        self.catalog = wdsExtractor.Catalog(filename)
+        self.planner = WDS_Planner.NightPlanner(self.catalog, preferences, starConstraints['separation'],
+                                                starConstraints['magnitude'], starConstraints['deltaMag'])
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def testSameAsConstrain(self):
+        session = wdsExtractor.CatalogSession(self.catalog, preferences)
+        dates = wdsExtractor.dateRange('2017-01-01', '2017-12-31', 60)
+        plans = self.planner.planNights(dates, '18:00', '05:00')
+        self.assertEqual([plan['date'] for plan in plans], dates)
+        for plan in plans:
+            inputs = wdsExtractor.nightInputs(plan['date'], '18:00', '05:00', preferences)
+            inputs.update(starConstraints)
+            session.setInputs(inputs)
+            session.constrain()
+            self.assertGreater(len(plan['results']), 0)
+            np.testing.assert_array_equal(plan['results'].rows, session.interestingHere.rows)
+
+            results = plan['results']
+            self.assertTrue(np.all(results['WindowStart'] <= results['BestTime']))
+            self.assertTrue(np.all(results['BestTime'] <= results['WindowStop']))
+            self.assertTrue(np.all(results['MinsObservable'] >= 0.0))
+            self.assertTrue(np.all(results['MinsObservable'] <= 11 * 60 + 1e-6))
+            self.assertTrue(np.all(results['MinSecz'] >= 1.0))
+
+    def testBestNights(self):
+        plans = self.planner.planNights(['2017-01-15', '2017-04-15', '2017-07-15'], '20:00', '02:00')
+        best = WDS_Planner.bestNights(plans)
+        counts = [len(plan['results']) for plan in best]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertEqual(WDS_Planner.bestNights(plans, 1), best[:1])
+        # A header line and a line per night
+        self.assertEqual(len(WDS_Planner.plansToString(best).split('\n')), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
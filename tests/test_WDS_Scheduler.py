@@ -0,0 +1,137 @@
+####################################
+# File name: test_WDS_Scheduler.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import WDS_Synthetic
+import WDS_Scheduler
+import WDS_Visibility
+import WDS_Extraction_Tool as wdsExtractor
+
+preferences = {'latitude': '34:22:55.2', 'longitude': '-117:40:54.48', '+dec': '35:00:00.0',
+               '-dec': '35:00:00.0', 'westHA': '4:00:00.0', 'eastHA': '2:00:00.0',
+               'minAltitude': '30:00:00.0'}
+latitude, longitude = 34.382, -117.6818
+
+
+def randomScheduler(numStars=150, seed=3, duration=7.0, step=2, airmassCap=2.0):
+    '''
+        Makes a NightScheduler for random stars over a night at Table
+        Mountain, with their grid from calcGeometricGrid.
+    '''
+    from astropy.time import Time
+    random = np.random.RandomState(seed)
+    ra = random.uniform(0.0, 360.0, numStars)
+    dec = np.degrees(np.arcsin(random.uniform(-0.5, 1.0, numStars)))
+    times = WDS_Visibility.nightTimes(Time('2017-03-06 03:00'), Time('2017-03-06 13:00'), step)
+    grid = WDS_Visibility.calcGeometricGrid(ra / 15.0, dec, times, latitude, longitude)
+    return WDS_Scheduler.NightScheduler(ra, dec, grid, duration, step, airmassCap=airmassCap), grid
+
+
+class NightSchedulerTest(unittest.TestCase):
+    '''
+        Checks the sequences the scheduler makes can really be observed.
+    '''
+
+    def assertObservable(self, scheduler, grid, order, airmassCap=2.0):
+        # Each star once, one after another, and each inside its window
+        self.assertEqual(len(set(order)), len(order))
+        timings = scheduler.timings(order)
+        self.assertTrue(np.all(np.isfinite(timings['cost'])))
+        self.assertTrue(np.all(timings['start'][1:] >= timings['stop'][:-1] - 1e-9))
+        self.assertTrue(np.all(timings['stop'] > timings['start']))
+        self.assertTrue(np.all(timings['start'] >= 0.0))
+        numTimes = grid['secz'].shape[1]
+        self.assertTrue(np.all(timings['stop'] <= (numTimes - 1) * scheduler.step + 1e-9))
+
+        stars = np.asarray(order)
+        lengths = np.ceil(scheduler.duration[stars] / scheduler.step - 1e-9).astype(int)
+        for slots in [timings['slot'], timings['slot'] + lengths]:
+            self.assertTrue(np.all(slots < numTimes))
+            self.assertTrue(np.all(grid['alt'][stars, slots] > 0))
+            self.assertTrue(np.all(grid['secz'][stars, slots] <= airmassCap))
+
+    def testGreedy(self):
+        scheduler, grid = randomScheduler()
+        order = scheduler.greedy()
+        self.assertGreater(len(order), 10)
+        self.assertObservable(scheduler, grid, order)
+
+    def testImproveNeverWorse(self):
+        for seed in range(4):
+            scheduler, grid = randomScheduler(seed=seed)
+            greedy = scheduler.greedy()
+            improved = scheduler.improve(greedy, timeLimit=2.0)
+            self.assertEqual(sorted(improved), sorted(greedy))
+            self.assertObservable(scheduler, grid, improved)
+            self.assertLessEqual(scheduler.timings(improved)['cost'].sum(),
+                                 scheduler.timings(greedy)['cost'].sum() + 1e-6)
+
+    def testSchedule(self):
+        scheduler, grid = randomScheduler(airmassCap=1.5)
+        order = scheduler.schedule(timeLimit=2.0)
+        self.assertObservable(scheduler, grid, order, 1.5)
+
+    def testUnobservable(self):
+        # A star that never rises is never scheduled
+        scheduler, grid = randomScheduler(numStars=40, seed=5)
+        never = np.flatnonzero(~np.isfinite(scheduler.minSecz))
+        self.assertGreater(len(never), 0)
+        self.assertEqual(set(never) & set(scheduler.schedule(timeLimit=0.5)), set())
+
+
+class ScheduleSessionTest(unittest.TestCase):
+    '''
+        Checks scheduleSession on a constrained session of a fake catalog.
+    '''
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        filename = os.path.join(self.folder, 'WDS_CSV_cat.txt')
+        WDS_Synthetic.writeSyntheticCatalog(filename, 5000)
+        self.session = wdsExtractor.CatalogSession(wdsExtractor.Catalog(filename), preferences)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def testNoOverlaps(self):
+        inputs = wdsExtractor.nightInputs('2017-03-05', '19:00', '05:00', preferences)
+        inputs.update(separation=(100.0, 0.0), magnitude=(15.0, -10.0), deltaMag=(20.0, -20.0))
+        self.session.setInputs(inputs)
+        self.session.constrain()
+        numStars = len(self.session.interestingHere)
+
+        schedule = WDS_Scheduler.scheduleSession(self.session, exposure=5.0, overhead=2.0, timeLimit=1.0)
+        results = schedule['results']
+        self.assertGreater(len(results), 0)
+        self.assertEqual(len(results) + schedule['unscheduled'], numStars)
+        self.assertEqual(len(set(results.rows)), len(results))
+
+        # The times are to the minute, so each star starts no earlier than
+        # the minute the one before it stopped in
+        starts, stops = list(results['StartTime']), list(results['StopTime'])
+        self.assertEqual(starts, sorted(starts))
+        self.assertTrue(all(start >= stop for start, stop in zip(starts[1:], stops[:-1])))
+        self.assertTrue(all(start < stop for start, stop in zip(starts, stops)))
+        self.assertGreaterEqual(starts[0], self.session.observingDate.iso[:16])
+        self.assertLessEqual(stops[-1], self.session.observingEndDate.iso[:16])
+
+        self.assertTrue(np.all(results['ScheduledSecz'] <= 2.0))
+        self.assertTrue(np.all(results['ScheduledSecz'] >= results['MinSecz'] - 1e-9))
+        self.assertAlmostEqual(schedule['slew'], np.sum(results['SlewDeg']))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+####################################
+# File name: test_WDS_Sexagesimal.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import unittest
+import numpy as np
+
+import WDS_Sexagesimal
+
+
+class SexagesimalTest(unittest.TestCase):
+    '''
+        Checks the conversions between hhmmss.s, decimal and colon strings.
+    '''
+
+    def testToDecimal(self):
+        self.assertAlmostEqual(WDS_Sexagesimal.hhmmssToDecimal(123000.0), 12.5)
+        self.assertAlmostEqual(WDS_Sexagesimal.hhmmssToDecimal(-3000.0), -0.5)
+        np.testing.assert_allclose(WDS_Sexagesimal.hhmmssToDecimal([10000.0, 130.0]), [1.0, 1.0 / 60 + 0.5 / 60])
+
+    def testRoundTrip(self):
+        decimals = np.array([0.0, 0.5, -0.5, 12.582416666, 23.999999, -89.25])
+        back = WDS_Sexagesimal.hhmmssToDecimal(WDS_Sexagesimal.decimalToHhmmss(decimals))
+        np.testing.assert_allclose(back, decimals, atol=1e-9)
+
+    def testNoRoundingDown(self):
+        self.assertEqual(WDS_Sexagesimal.decimalToHhmmss(16.1666666667), 161000.0)
+
+    def testAddRollsOver(self):
+        self.assertEqual(WDS_Sexagesimal.hhmmssAdd(5959.5, 0.5), 10000.0)
+        self.assertEqual(WDS_Sexagesimal.hhmmssAdd(235959.0, 1.0), 240000.0)
+        self.assertEqual(WDS_Sexagesimal.hhmmssSubtract(10000.0, 0.5), 5959.5)
+        self.assertEqual(WDS_Sexagesimal.hhmmssSubtract(0.0, 3000.0), -3000.0)
+
+    def testColonToDecimal(self):
+        np.testing.assert_allclose(WDS_Sexagesimal.colonToDecimal(['-00:30:00', '12:30', '+5', ' 1:00:36 ']),
+                                   [-0.5, 12.5, 5.0, 1.01])
+        self.assertAlmostEqual(WDS_Sexagesimal.colonToDecimal('-117:40:54.48'), -117.6818, places=4)
+
+    def testColonString(self):
+        self.assertEqual(WDS_Sexagesimal.hhmmssToColonString(-3000.0), '-00:30:00.0')
+        self.assertEqual(WDS_Sexagesimal.hhmmssToColonString(123456.789), '12:34:56.79')
+        self.assertEqual(list(WDS_Sexagesimal.hhmmssToColonString([40505.5])), ['04:05:05.5'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+####################################
+# File name: test_WDS_Sidereal.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import unittest
+import numpy as np
+
+import WDS_Sidereal
+
+
+class SiderealTest(unittest.TestCase):
+    '''
+        Checks the memoized sidereal times against working them out 
+        directly, and that the memo stays small.
+    '''
+
+    longitude = -117.68
+
+    def times(self, days):
+        from astropy.time import Time
+        return Time(57817.0 + np.asarray(days, dtype=float), format='mjd', scale='utc')
+
+    def direct(self, times):
+        return (WDS_Sidereal.greenwichSiderealTime(times.jd1, times.jd2) + self.longitude / 15.0) % 24.0
+
+    def testSameAsDirect(self):
+        times = self.times(np.linspace(0.0, 30.0, 1000))
+        lst = WDS_Sidereal.localSiderealTime(times, self.longitude)
+        difference = (lst - self.direct(times) + 12.0) % 24.0 - 12.0
+        # Well under a millisecond of time
+        self.assertLess(np.abs(difference).max() * 3600.0, 1e-3)
+        self.assertAlmostEqual(WDS_Sidereal.localSiderealTime(times[7], self.longitude), lst[7])
+
+    def testTableBounded(self):
+        times = self.times(np.arange(0.0, WDS_Sidereal.dayTableSize * 2.0, 0.5))
+        first = WDS_Sidereal.localSiderealTime(times, self.longitude)
+        self.assertLessEqual(len(WDS_Sidereal._dayTable), WDS_Sidereal.dayTableSize)
+        # Days that were dropped are worked out again, the same
+        np.testing.assert_array_equal(WDS_Sidereal.localSiderealTime(times, self.longitude), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
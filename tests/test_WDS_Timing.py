@@ -0,0 +1,137 @@
+####################################
+# File name: test_WDS_Timing.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import os
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+import numpy as np
+
+import WDS_Timing
+
+
+class TracerTest(unittest.TestCase):
+    '''
+        Checks the spans a Tracer records, and what it does with them
+        when a trace finishes.
+    '''
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.logFilename = os.path.join(self.folder, 'timing.log')
+        self.tracer = WDS_Timing.Tracer(self.logFilename)
+        self.traces = []
+        self.tracer.addListener(self.traces.append)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def readLog(self):
+        with open(self.logFilename) as fp:
+            return [json.loads(line) for line in fp.read().splitlines()]
+
+    def testNesting(self):
+        with self.tracer.span('constrain', catalog='fake') as outer:
+            with self.tracer.span('positions') as inner:
+                inner['rows'] = np.int64(12)
+                # Nothing is passed on until the whole trace is done
+                self.assertEqual(self.traces, [])
+            with self.tracer.span('airmasses'):
+                with self.tracer.span('grid'):
+                    pass
+            outer['rows'] = 3
+
+        self.assertEqual(len(self.traces), 1)
+        spans = self.traces[0]
+        self.assertEqual([record['name'] for record in spans], ['constrain', 'positions', 'airmasses', 'grid'])
+        self.assertEqual([record['depth'] for record in spans], [0, 1, 1, 2])
+        self.assertEqual(set(record['trace'] for record in spans), set([spans[0]['trace']]))
+        self.assertEqual(spans[0]['catalog'], 'fake')
+        self.assertEqual(spans[0]['rows'], 3)
+        self.assertEqual(spans[1]['rows'], 12)
+        for record in spans:
+            self.assertGreaterEqual(record['seconds'], 0.0)
+        # An outer span takes at least as long as the spans inside it
+        self.assertGreaterEqual(spans[0]['seconds'], spans[1]['seconds'] + spans[2]['seconds'])
+        self.assertGreaterEqual(spans[2]['seconds'], spans[3]['seconds'])
+
+        # The log has the same spans, one per line, with plain numbers
+        self.assertEqual(self.readLog(), [dict(record) for record in spans])
+
+    def testSeparateTraces(self):
+        with self.tracer.span('first'):
+            pass
+        with self.tracer.span('second'):
+            pass
+        self.assertEqual(len(self.traces), 2)
+        self.assertEqual(self.traces[1][0]['depth'], 0)
+        self.assertEqual(self.traces[1][0]['trace'], self.traces[0][0]['trace'] + 1)
+        self.assertEqual([record['name'] for record in self.readLog()], ['first', 'second'])
+
+    def testError(self):
+        def fail():
+            with self.tracer.span('constrain'):
+                with self.tracer.span('positions'):
+                    raise ValueError("bad input")
+        self.assertRaises(ValueError, fail)
+        spans = self.traces[0]
+        self.assertEqual([record.get('error') for record in spans], ['ValueError', 'ValueError'])
+        self.assertIn('seconds', spans[1])
+
+        # The tracer carries on as normal afterwards
+        with self.tracer.span('next'):
+            pass
+        self.assertEqual(self.traces[1][0]['depth'], 0)
+        self.assertNotIn('error', self.traces[1][0])
+
+    def testThreads(self):
+        # Spans on another thread are a trace of their own, not part of
+        # the one running here
+        with self.tracer.span('main'):
+            thread = threading.Thread(target=self.runSpan, args=('worker',))
+            thread.start()
+            thread.join()
+        self.assertEqual(sorted(trace[0]['name'] for trace in self.traces), ['main', 'worker'])
+        for trace in self.traces:
+            self.assertEqual(len(trace), 1)
+            self.assertEqual(trace[0]['depth'], 0)
+
+    def runSpan(self, name):
+        with self.tracer.span(name):
+            pass
+
+    def testFinishTrace(self):
+        tracer = WDS_Timing.Tracer()
+        tracer.addListener(self.traces.append)
+        spans = [{'name': 'constrain', 'depth': 0, 'trace': 1, 'seconds': 0.5}]
+        tracer.finishTrace(spans)
+        self.assertEqual(self.traces, [spans])
+        # Without a log file, nothing is written
+        self.assertFalse(os.path.exists(self.logFilename))
+
+        self.tracer.finishTrace(spans)
+        self.tracer.finishTrace(spans)
+        self.assertEqual(self.readLog(), spans + spans)
+
+    def testSpansToString(self):
+        with self.tracer.span('constrain', rows=5):
+            with self.tracer.span('positions'):
+                pass
+        lines = WDS_Timing.spansToString(self.traces[0]).split('\n')
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].endswith('constrain  rows=5'))
+        self.assertIn('ms    positions', lines[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+####################################
+# File name: test_WDS_Visibility.py
+# Author: Sarah Hale
+# Email: shale@hmc.edu
+# Date last modified: 2026-10-18
+# Python Version: 2.7
+####################################
+
+# import the python3 print function
+from __future__ import print_function
+
+import unittest
+import numpy as np
+
+import WDS_Visibility
+
+
+class VisibilityTest(unittest.TestCase):
+    '''
+        Checks the visibility index against the altitude and hour angle of
+        the stars over a fine grid of sidereal times.
+    '''
+
+    latitude = 34.38
+    minAltitude = 30.0
+    eastHA = 2.0
+    westHA = 4.0
+
+    def setUp(self):
+        random = np.random.RandomState(2)
+        numStars = 2000
+        self.ra = random.uniform(0.0, 24.0, numStars)
+        self.dec = np.degrees(np.arcsin(random.uniform(-1.0, 1.0, numStars)))
+        self.index = WDS_Visibility.calcVisibilityIndex(self.ra, self.dec, self.latitude, self.minAltitude,
+                                                        self.eastHA, self.westHA)
+
+    def observableAt(self, lst):
+        '''
+            Whether each star is observable at each of the sidereal times
+            lst, the slow way.
+        '''
+        ha = (lst[:, np.newaxis] - self.ra[np.newaxis, :] + 12.0) % 24.0 - 12.0
+        lat = np.radians(self.latitude)
+        dec = np.radians(self.dec)
+        sinAlt = np.sin(lat) * np.sin(dec) + np.cos(lat) * np.cos(dec) * np.cos(np.radians(ha * 15.0))
+        return ((sinAlt >= np.sin(np.radians(self.minAltitude))) & (ha >= -self.eastHA)
+                & (ha <= self.westHA))
+
+    def nightLst(self, startLST, stopLST, step=1.0 / 600):
+        length = (stopLST - startLST) % 24.0
+        return startLST + np.arange(0.0, length + step / 2, step), length
+
+    def testObservableBetween(self):
+        for startLST, stopLST in [(6.0, 12.0), (20.0, 4.0), (23.5, 0.5)]:
+            lst, length = self.nightLst(startLST, stopLST)
+            slow = self.observableAt(lst % 24.0).any(axis=0)
+            fast = WDS_Visibility.observableBetween(self.index, startLST, stopLST)
+            # The grid can only miss stars which are up for less than a step
+            self.assertTrue(np.all(fast[slow]))
+            self.assertLessEqual((fast & ~slow).sum(), 2)
+
+    def testObservableWindows(self):
+        startLST, stopLST = 20.0, 4.0
+        lst, length = self.nightLst(startLST, stopLST)
+        slow = self.observableAt(lst % 24.0)
+        windows = WDS_Visibility.observableWindows(self.index, self.dec, self.latitude, startLST, stopLST)
+        fast = WDS_Visibility.observableBetween(self.index, startLST, stopLST)
+
+        np.testing.assert_array_equal(np.isfinite(windows['start']), fast)
+        hours = lst - startLST
+        for star in np.flatnonzero(slow.any(axis=0)):
+            # The window found is one of the stretches the star is up
+            up = hours[slow[:, star]]
+            self.assertGreaterEqual(windows['start'][star], up.min() - 0.01)
+            self.assertLessEqual(windows['stop'][star], up.max() + 0.01)
+            self.assertTrue(windows['start'][star] <= windows['best'][star] <= windows['stop'][star])
+        self.assertTrue(np.all(windows['secz'][fast] >= 1.0))
+        self.assertTrue(np.all(windows['secz'][fast] <= 1.0 / np.sin(np.radians(self.minAltitude)) + 1e-9))
+
+
+if __name__ == "__main__":
+    unittest.main()